@@ -96,15 +96,17 @@ export default function AdminLeaderboard({
 }) {
   const [data, setData] = React.useState(null);
   const [status, setStatus] = React.useState({ loading: true, error: null });
-  const [currentPage, setCurrentPage] = React.useState(1);
+  // Cursor of the page on screen (null = first page), reused by Retry
+  const [cursor, setCursor] = React.useState(null);
 
   const url = useApiUrl();
 
   const loadData = React.useCallback(
-    async (page = 1) => {
+    async (pageCursor = null) => {
       try {
         setStatus({ loading: true, error: null });
-        const response = await fetch(url(`/api/admin/leaderboard?page=${page}`), {
+        const query = pageCursor ? `?cursor=${encodeURIComponent(pageCursor)}` : "";
+        const response = await fetch(url(`/api/admin/leaderboard${query}`), {
           credentials: "include",
         });
         if (!response.ok) {
@@ -112,7 +114,7 @@ export default function AdminLeaderboard({
         }
         const result = await response.json();
         setData(result);
-        setCurrentPage(page);
+        setCursor(pageCursor);
         setStatus({ loading: false, error: null });
       } catch (err) {
         setStatus({ loading: false, error: err.message });
@@ -126,7 +128,7 @@ export default function AdminLeaderboard({
       setStatus({ loading: false, error: null });
       return;
     }
-    loadData(1);
+    loadData(null);
   }, [isAuthenticated, isAdmin, loadData]);
 
   const formatDate = (iso) => {
@@ -163,7 +165,7 @@ export default function AdminLeaderboard({
         <Card className="border-red-200 bg-red-50 mb-4">
           <CardContent className="p-4 text-red-700 text-sm">{status.error}</CardContent>
         </Card>
-        <Button onClick={() => loadData(currentPage)}>
+        <Button onClick={() => loadData(cursor)}>
           <RefreshCw className="h-4 w-4" />
           Retry
         </Button>
@@ -173,16 +175,6 @@ export default function AdminLeaderboard({
 
   const { economy_stats, leaderboard_stats = [], top_spenders = [], most_active = [], pagination } = data || {};
 
-  const pageNums = (() => {
-    if (!pagination || pagination.pages <= 1) return [];
-    const total = pagination.pages;
-    const cur = currentPage;
-    if (total <= 5) return Array.from({ length: total }, (_, i) => i + 1);
-    if (cur <= 3) return [1, 2, 3, 4, 5];
-    if (cur >= total - 2) return [total - 4, total - 3, total - 2, total - 1, total];
-    return [cur - 2, cur - 1, cur, cur + 1, cur + 2];
-  })();
-
   return (
     <div className="container py-5 space-y-6">
       {/* Header */}
@@ -377,36 +369,29 @@ export default function AdminLeaderboard({
           </div>
 
           {/* Pagination */}
-          {pagination && pagination.pages > 1 && (
+          {pagination && (pagination.has_prev || pagination.has_next) && (
             <div className="flex flex-col sm:flex-row items-center justify-between gap-3 px-4 py-3 border-t">
               <p className="text-sm text-gray-500">
                 Showing {(pagination.page - 1) * pagination.per_page + 1}–
-                {Math.min(pagination.page * pagination.per_page, pagination.total)} of {pagination.total} users
+                {(pagination.page - 1) * pagination.per_page + leaderboard_stats.length} of {pagination.total} users
               </p>
               <div className="flex items-center gap-1">
                 <Button
                   variant="outline"
                   size="icon"
                   disabled={!pagination.has_prev}
-                  onClick={() => loadData(pagination.prev_num)}
+                  onClick={() => loadData(pagination.prev_cursor)}
                 >
                   <ChevronLeft className="h-4 w-4" />
                 </Button>
-                {pageNums.map((n) => (
-                  <Button
-                    key={n}
-                    size="sm"
-                    variant={n === currentPage ? "default" : "outline"}
-                    onClick={() => loadData(n)}
-                  >
-                    {n}
-                  </Button>
-                ))}
+                <span className="px-2 text-sm text-gray-500">
+                  Page {pagination.page} of {pagination.pages}
+                </span>
                 <Button
                   variant="outline"
                   size="icon"
                   disabled={!pagination.has_next}
-                  onClick={() => loadData(pagination.next_num)}
+                  onClick={() => loadData(pagination.next_cursor)}
                 >
                   <ChevronRight className="h-4 w-4" />
                 </Button>
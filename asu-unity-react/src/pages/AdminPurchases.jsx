@@ -4,7 +4,6 @@ import {
   ChevronLeft,
   ChevronRight,
   ChevronsLeft,
-  ChevronsRight,
   Package,
   ShoppingBag,
   RefreshCw,
@@ -55,18 +54,20 @@ export default function AdminPurchases({
 }) {
   const [data, setData] = React.useState(null);
   const [status, setStatus] = React.useState({ loading: true, error: null });
-  const [currentPage, setCurrentPage] = React.useState(1);
+  // Cursor of the page on screen (null = first page), reused by Retry
+  const [cursor, setCursor] = React.useState(null);
 
   const url = useApiUrl();
 
-  const loadData = React.useCallback(async (page = 1) => {
+  const loadData = React.useCallback(async (pageCursor = null) => {
     try {
       setStatus({ loading: true, error: null });
-      const response = await fetch(url(`/api/admin/purchases?page=${page}`), { credentials: "include" });
+      const query = pageCursor ? `?cursor=${encodeURIComponent(pageCursor)}` : "";
+      const response = await fetch(url(`/api/admin/purchases${query}`), { credentials: "include" });
       if (!response.ok) throw new Error(`Failed to load purchases (${response.status})`);
       const result = await response.json();
       setData(result);
-      setCurrentPage(page);
+      setCursor(pageCursor);
       setStatus({ loading: false, error: null });
     } catch (err) {
       setStatus({ loading: false, error: err.message });
@@ -78,23 +79,12 @@ export default function AdminPurchases({
       setStatus({ loading: false, error: null });
       return;
     }
-    loadData(1);
+    loadData(null);
   }, [isAuthenticated, isAdmin, loadData]);
 
   const formatDate = (iso) => iso ? new Date(iso).toLocaleDateString() : "";
   const formatTime = (iso) => iso ? new Date(iso).toLocaleTimeString() : "";
 
-  const pageNums = (() => {
-    const pagination = data?.pagination;
-    if (!pagination || pagination.pages <= 1) return [];
-    const total = pagination.pages;
-    const cur = currentPage;
-    if (total <= 5) return Array.from({ length: total }, (_, i) => i + 1);
-    if (cur <= 3) return [1, 2, 3, 4, 5];
-    if (cur >= total - 2) return [total - 4, total - 3, total - 2, total - 1, total];
-    return [cur - 2, cur - 1, cur, cur + 1, cur + 2];
-  })();
-
   if (!isAuthenticated) {
     return (
       <div className="container py-5">
@@ -124,7 +114,7 @@ export default function AdminPurchases({
         <Card className="border-red-200 bg-red-50 mb-4">
           <CardContent className="p-4 text-red-700 text-sm">{status.error}</CardContent>
         </Card>
-        <Button onClick={() => loadData(currentPage)}>
+        <Button onClick={() => loadData(cursor)}>
           <RefreshCw className="h-4 w-4" /> Retry
         </Button>
       </div>
@@ -264,34 +254,28 @@ export default function AdminPurchases({
             </div>
 
             {/* Pagination */}
-            {pagination && pagination.pages > 1 && (
+            {pagination && (pagination.has_prev || pagination.has_next) && (
               <div className="flex flex-col sm:flex-row items-center justify-between gap-3 px-4 py-3 border-t">
                 <p className="text-sm text-gray-500">
                   Showing {(pagination.page - 1) * pagination.per_page + 1}–
-                  {Math.min(pagination.page * pagination.per_page, pagination.total)} of {pagination.total}
+                  {(pagination.page - 1) * pagination.per_page + purchases.length}
+                  {pagination.total != null && ` of ${pagination.total}`}
                 </p>
                 <div className="flex items-center gap-1">
                   {pagination.has_prev && (
-                    <Button variant="outline" size="icon" onClick={() => loadData(1)}>
+                    <Button variant="outline" size="icon" onClick={() => loadData(null)}>
                       <ChevronsLeft className="h-4 w-4" />
                     </Button>
                   )}
-                  <Button variant="outline" size="icon" disabled={!pagination.has_prev} onClick={() => loadData(pagination.prev_num)}>
+                  <Button variant="outline" size="icon" disabled={!pagination.has_prev} onClick={() => loadData(pagination.prev_cursor)}>
                     <ChevronLeft className="h-4 w-4" />
                   </Button>
-                  {pageNums.map((n) => (
-                    <Button key={n} size="sm" variant={n === currentPage ? "default" : "outline"} onClick={() => loadData(n)}>
-                      {n}
-                    </Button>
-                  ))}
-                  <Button variant="outline" size="icon" disabled={!pagination.has_next} onClick={() => loadData(pagination.next_num)}>
+                  <span className="px-2 text-sm text-gray-500">
+                    Page {pagination.page}{pagination.pages != null && ` of ${pagination.pages}`}
+                  </span>
+                  <Button variant="outline" size="icon" disabled={!pagination.has_next} onClick={() => loadData(pagination.next_cursor)}>
                     <ChevronRight className="h-4 w-4" />
                   </Button>
-                  {pagination.has_next && (
-                    <Button variant="outline" size="icon" onClick={() => loadData(pagination.pages)}>
-                      <ChevronsRight className="h-4 w-4" />
-                    </Button>
-                  )}
                 </div>
               </div>
             )}
@@ -0,0 +1,167 @@
+"""
+In-memory index of achievement thresholds and earned achievements, so the
+per-event "did this user just earn something?" check usually needs no DB reads.
+"""
+
+import bisect
+import logging
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+index_logger = logging.getLogger('achievement_index')
+
+ACHIEVEMENT_INDEX_MAX_USERS = int(os.getenv('ACHIEVEMENT_INDEX_MAX_USERS', 5000))
+
+# Detached snapshot of an Achievement row, safe to read from any thread
+AchievementInfo = namedtuple('AchievementInfo', 'id name description points type requirement')
+
+_SESSION_EVENTS = ('after_flush', 'do_orm_execute', 'after_commit', 'after_rollback')
+_DIRTY_KEY = 'achievement_index_dirty'
+_ALL = object()  # dirty marker: every user's bitmap
+
+
+class AchievementIndex:
+    """Sorted per-type achievement thresholds plus per-user earned bitmaps."""
+
+    def __init__(self, db, Achievement, UserAchievement, max_users=ACHIEVEMENT_INDEX_MAX_USERS):
+        self.db = db
+        self.Achievement = Achievement
+        self.UserAchievement = UserAchievement
+        self.max_users = max_users
+        self._lock = threading.RLock()
+        self._by_type = None          # type -> (sorted requirements, achievements in the same order)
+        self._earned = OrderedDict()  # user_id -> int bitmap (bit N = achievement N earned), LRU order
+        self._generation = 0          # bumped by every invalidation
+
+        for name in _SESSION_EVENTS:
+            event.listen(Session, name, getattr(self, f'_on_{name}'))
+
+    def close(self):
+        """Detach the invalidation listeners."""
+        for name in _SESSION_EVENTS:
+            event.remove(Session, name, getattr(self, f'_on_{name}'))
+
+    def invalidate(self):
+        """Drop the cached thresholds; they are reloaded on next use."""
+        with self._lock:
+            self._by_type = None
+            self._generation += 1
+
+    def invalidate_user(self, user_id=None):
+        """Drop one user's earned bitmap, or every user's when ``user_id`` is None."""
+        with self._lock:
+            if user_id is None:
+                self._earned.clear()
+            else:
+                self._earned.pop(str(user_id), None)
+            self._generation += 1
+
+    # Session hooks: collect writes at flush time, invalidate once they commit
+
+    def _mark(self, session, key):
+        session.info.setdefault(_DIRTY_KEY, set()).add(key)
+
+    def _on_after_flush(self, session, flush_context):
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, self.Achievement):
+                self._mark(session, self.Achievement)
+            elif isinstance(obj, self.UserAchievement):
+                self._mark(session, str(obj.user_id))
+
+    def _on_do_orm_execute(self, orm_execute_state):
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        table = getattr(getattr(orm_execute_state.statement, 'table', None), 'name', None)
+        if table == self.Achievement.__table__.name:
+            self._mark(orm_execute_state.session, self.Achievement)
+        elif table == self.UserAchievement.__table__.name:
+            self._mark(orm_execute_state.session, _ALL)
+
+    def _on_after_commit(self, session):
+        dirty = session.info.pop(_DIRTY_KEY, None)
+        if not dirty:
+            return
+        if self.Achievement in dirty:
+            self.invalidate()
+        if _ALL in dirty:
+            self.invalidate_user()
+        else:
+            for user_id in dirty - {self.Achievement}:
+                self.invalidate_user(user_id)
+
+    def _on_after_rollback(self, session):
+        session.info.pop(_DIRTY_KEY, None)
+
+    def pending(self, user_id, achievement_type, count):
+        """Achievements of a type reached by ``count`` but not yet earned.
+
+        Pure in-memory: returns None instead of touching the DB when the
+        thresholds or the user's bitmap aren't cached yet.
+        """
+        user_id = str(user_id)
+        with self._lock:
+            earned = self._earned.get(user_id)
+            if self._by_type is None or earned is None:
+                return None
+            self._earned.move_to_end(user_id)
+            return self._unearned(earned, achievement_type, count)
+
+    def unearned(self, user_id, achievement_type, count=None):
+        """Like ``pending`` but loads whatever isn't cached. Needs an app context.
+
+        With ``count=None`` every achievement of the type is considered reached.
+        """
+        user_id = str(user_id)
+        with self._lock:
+            generation = self._generation
+            by_type = self._by_type
+            earned = self._earned.get(user_id)
+        if by_type is None:
+            by_type = self._load_thresholds()
+        if earned is None:
+            earned = self._load_earned(user_id)
+
+        with self._lock:
+            # Don't publish rows read before a commit that invalidated them
+            if self._generation == generation:
+                if self._by_type is None:
+                    self._by_type = by_type
+                if user_id not in self._earned:
+                    self._earned[user_id] = earned
+                    while len(self._earned) > self.max_users:
+                        self._earned.popitem(last=False)
+            if user_id in self._earned:
+                self._earned.move_to_end(user_id)
+            return self._unearned(earned, achievement_type, count, by_type)
+
+    def _unearned(self, earned, achievement_type, count, by_type=None):
+        requirements, achievements = (by_type or self._by_type).get(achievement_type, ((), ()))
+        reached = len(achievements) if count is None else bisect.bisect_right(requirements, count)
+        return [a for a in achievements[:reached] if not earned >> a.id & 1]
+
+    def _load_thresholds(self):
+        rows = self.db.session.execute(
+            select(self.Achievement).order_by(self.Achievement.type, self.Achievement.requirement)
+        ).scalars()
+        grouped = {}
+        for a in rows:
+            grouped.setdefault(a.type, []).append(
+                AchievementInfo(a.id, a.name, a.description, a.points, a.type, a.requirement)
+            )
+        index_logger.info(f"Loaded {sum(len(v) for v in grouped.values())} achievement thresholds")
+        return {
+            achievement_type: (tuple(a.requirement for a in items), tuple(items))
+            for achievement_type, items in grouped.items()
+        }
+
+    def _load_earned(self, user_id):
+        bitmap = 0
+        for achievement_id in self.db.session.execute(
+            select(self.UserAchievement.achievement_id).where(self.UserAchievement.user_id == user_id)
+        ).scalars():
+            bitmap |= 1 << achievement_id
+        return bitmap
@@ -0,0 +1,171 @@
+"""
+Write-behind buffer that batches message, reaction and voice counter bumps into
+one bulk UPDATE per flush.
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import bindparam, func, select
+
+buffer_logger = logging.getLogger('activity_buffer')
+
+COUNTER_FIELDS = ('message_count', 'reaction_count', 'voice_minutes')
+
+
+class ActivityBuffer:
+    """Per-user counter deltas kept in memory and written back in bulk.
+
+    Running totals are only held for users with unflushed activity, so
+    counters edited outside the buffer are picked up after the next flush.
+    """
+
+    def __init__(self, app, db, User, max_events=200):
+        self.app = app
+        self.db = db
+        self.User = User
+        self.max_events = max_events
+        self._lock = threading.RLock()
+        self._deltas = {}    # user_id -> {field: pending delta}
+        self._profiles = {}  # user_id -> (username, avatar_url) for users missing from the DB
+        self._totals = {}    # user_id -> {field: persisted + pending total}, until flushed
+        self._pending_events = 0
+        self.last_flush = time.monotonic()
+
+        table = User.__table__
+        self._update_stmt = (
+            table.update()
+            .where(table.c.id == bindparam('b_id'))
+            .values({
+                field: func.coalesce(table.c[field], 0) + bindparam(f'b_{field}')
+                for field in COUNTER_FIELDS
+            })
+            # Counters only; balances and identities are untouched
+            # (see utils/leaderboard.py and utils/session_principal.py)
+            .execution_options(leaderboard_unaffected=True, identity_unaffected=True)
+        )
+
+    @property
+    def pending_events(self):
+        return self._pending_events
+
+    def should_flush(self):
+        """True once enough events are buffered to warrant an early flush."""
+        return self._pending_events >= self.max_events
+
+    def record(self, user_id, field, amount=1, username=None, avatar_url=None):
+        """Buffer ``amount`` for ``field`` and return the user's up-to-date total.
+
+        The first event for a user after a flush costs one primary-key read
+        to seed the running totals; later events are pure in-memory increments.
+        """
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown activity counter: {field}")
+
+        user_id = str(user_id)
+        while True:
+            looked_up = False
+            loaded = None
+            if not self.is_tracked(user_id):
+                # Read outside the lock so in-memory increments for other users never wait on the DB
+                loaded = self._load_totals(user_id)
+                looked_up = True
+
+            with self._lock:
+                totals = self._totals.get(user_id)
+                if totals is None:
+                    if not looked_up:
+                        # A flush dropped the totals after is_tracked(); read them again
+                        continue
+                    if loaded is None:
+                        loaded = dict.fromkeys(COUNTER_FIELDS, 0)
+                        self._profiles[user_id] = (username or user_id, avatar_url)
+                    totals = self._totals[user_id] = loaded
+
+                delta = self._deltas.setdefault(user_id, dict.fromkeys(COUNTER_FIELDS, 0))
+                delta[field] += amount
+                totals[field] += amount
+                self._pending_events += 1
+                return totals[field]
+
+    def is_tracked(self, user_id):
+        """True if the user's totals are cached, i.e. ``record`` won't touch the DB."""
+        return str(user_id) in self._totals
+
+    def total(self, user_id, field):
+        """Return the buffered total for a user, or None if it isn't tracked yet."""
+        totals = self._totals.get(str(user_id))
+        return totals[field] if totals else None
+
+    def _load_totals(self, user_id):
+        table = self.User.__table__
+        with self.app.app_context():
+            row = self.db.session.execute(
+                select(*(table.c[field] for field in COUNTER_FIELDS)).where(table.c.id == user_id)
+            ).first()
+        if row is None:
+            return None
+        return {field: value or 0 for field, value in zip(COUNTER_FIELDS, row)}
+
+    def flush(self):
+        """Write every buffered delta in a single transaction.
+
+        Users seen for the first time are inserted before the counters are
+        applied. Returns the number of user rows updated; on failure the
+        deltas are put back so the next flush retries them. On success the
+        flushed users' totals are dropped unless they recorded more activity
+        in the meantime.
+        """
+        with self._lock:
+            if not self._deltas:
+                return 0
+            deltas, self._deltas = self._deltas, {}
+            profiles, self._profiles = self._profiles, {}
+            pending_events, self._pending_events = self._pending_events, 0
+            self.last_flush = time.monotonic()
+
+        table = self.User.__table__
+        rows = [
+            {'b_id': user_id, **{f'b_{field}': delta[field] for field in COUNTER_FIELDS}}
+            for user_id, delta in deltas.items()
+        ]
+
+        with self.app.app_context():
+            session = self.db.session
+            try:
+                if profiles:
+                    existing = set(session.execute(
+                        select(table.c.id).where(table.c.id.in_(list(profiles)))
+                    ).scalars())
+                    new_users = [
+                        {'id': user_id, 'username': username, 'discord_id': user_id, 'avatar_url': avatar_url}
+                        for user_id, (username, avatar_url) in profiles.items()
+                        if user_id not in existing
+                    ]
+                    if new_users:
+                        session.execute(table.insert(), new_users)
+
+                session.execute(self._update_stmt, rows)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                self._requeue(deltas, profiles, pending_events)
+                buffer_logger.error(f"Error flushing activity buffer ({len(rows)} users): {e}")
+                return 0
+
+        with self._lock:
+            for user_id in deltas:
+                if user_id not in self._deltas:
+                    self._totals.pop(user_id, None)
+        return len(rows)
+
+    def _requeue(self, deltas, profiles, pending_events):
+        with self._lock:
+            for user_id, delta in deltas.items():
+                current = self._deltas.setdefault(user_id, dict.fromkeys(COUNTER_FIELDS, 0))
+                for field in COUNTER_FIELDS:
+                    current[field] += delta[field]
+            for user_id, profile in profiles.items():
+                self._profiles.setdefault(user_id, profile)
+            self._pending_events += pending_events
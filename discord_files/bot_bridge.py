@@ -0,0 +1,82 @@
+"""
+Bot state the economy cog publishes for Flask threads to read without touching
+discord.py objects, plus ``is_admin`` promotions queued for the bot to persist.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+GuildSnapshot = namedtuple('GuildSnapshot', 'guild_id name roles admin_ids published_at')
+
+
+class BotBridge:
+    """Latest per-guild snapshots published by the bot thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._guilds = {}  # guild_id -> GuildSnapshot
+        self._admin_promotions = set()  # user IDs whose is_admin flag the bot should persist
+
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def set_ready(self, ready=True):
+        if ready:
+            self._ready.set()
+        else:
+            self._ready.clear()
+
+    def publish_guild(self, guild_id, name, roles, admin_ids):
+        """Replace a guild's snapshot. ``roles`` are JSON-ready dicts, highest first."""
+        snapshot = GuildSnapshot(guild_id, name, tuple(roles), frozenset(admin_ids), time.time())
+        with self._lock:
+            self._guilds[guild_id] = snapshot
+
+    def publish_roles(self, guild_id, roles):
+        self._replace(guild_id, roles=tuple(roles))
+
+    def set_admin(self, guild_id, member_id, is_admin):
+        with self._lock:
+            snapshot = self._guilds.get(guild_id)
+            if snapshot is None or (member_id in snapshot.admin_ids) == is_admin:
+                return
+            admin_ids = snapshot.admin_ids | {member_id} if is_admin else snapshot.admin_ids - {member_id}
+            self._guilds[guild_id] = snapshot._replace(admin_ids=admin_ids, published_at=time.time())
+
+    def _replace(self, guild_id, **fields):
+        with self._lock:
+            snapshot = self._guilds.get(guild_id)
+            if snapshot is not None:
+                self._guilds[guild_id] = snapshot._replace(published_at=time.time(), **fields)
+
+    def queue_admin_promotion(self, member_id):
+        with self._lock:
+            self._admin_promotions.add(str(member_id))
+
+    def take_admin_promotions(self):
+        """Return and clear the queued admin promotions."""
+        with self._lock:
+            promotions, self._admin_promotions = self._admin_promotions, set()
+        return promotions
+
+    def discard(self, guild_id):
+        with self._lock:
+            self._guilds.pop(guild_id, None)
+
+    def guild(self, guild_id):
+        """Return the last GuildSnapshot for ``guild_id``, or None if the bot isn't in it."""
+        return self._guilds.get(int(guild_id))
+
+    def roles(self, guild_id):
+        snapshot = self.guild(guild_id)
+        return list(snapshot.roles) if snapshot else None
+
+    def is_admin(self, guild_id, member_id):
+        """True/False from the last snapshot, or None if the guild isn't known."""
+        snapshot = self.guild(guild_id)
+        return int(member_id) in snapshot.admin_ids if snapshot else None
+
+
+bot_bridge = BotBridge()
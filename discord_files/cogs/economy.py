@@ -2,15 +2,28 @@ import discord
 from discord.ext import commands, tasks
 from datetime import datetime, timedelta
 import asyncio
+import atexit
+import functools
 import logging
 import os
 import json
+import time
 import uuid
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import and_, or_, func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy import and_, or_, func, select
+from sqlalchemy.orm import joinedload
 import traceback
 from discord import app_commands
 
+from discord_files.achievement_index import AchievementIndex
+from discord_files.bot_bridge import bot_bridge
+from discord_files.activity_buffer import ActivityBuffer
+from discord_files.db_executor import DBExecutor
+from discord_files.message_cache import MessageCache
+from discord_files.restricted_roles import RestrictedRoleIndex
+from discord_files.role_cache import role_cache
+from utils.leaderboard import leaderboard as public_leaderboard
+
 # Configure logging
 cog_logger = logging.getLogger('economy_cog')
 cog_logger.setLevel(logging.INFO)
@@ -31,6 +44,13 @@ EVENTS_ENGAGE_EMOJI = os.getenv('EVENTS_ENGAGE_EMOJI', 'events_engage')
 CSD_FORKS_UP_EMOJI = os.getenv('CSD_FORKS_UP_EMOJI', 'CSD_forks_up')
 EVENT_POINTS = 25
 CSD_POINTS = 200
+AWARD_EMOJIS = {
+    CAMPUS_PICTURE_EMOJI,
+    DAILY_ENGAGEMENT_EMOJI,
+    ENROLLMENT_DEPOSIT_EMOJI,
+    EVENTS_ENGAGE_EMOJI,
+    CSD_FORKS_UP_EMOJI,
+}
 
 # Channel and role IDs
 GENERAL_CHANNEL_ID = os.getenv('GENERAL_CHANNEL_ID')
@@ -40,19 +60,51 @@ STAFF_ROLE_ID = os.getenv('STAFF_ROLE_ID', '1477021385187655740')
 ONBOARDING_ROLE_IDS = os.getenv('ONBOARDING_ROLE_IDS', '').split(',') if os.getenv('ONBOARDING_ROLE_IDS') else []
 BIRTHDAY_CHECK_TIME = os.getenv('BIRTHDAY_CHECK_TIME', '09:30')
 
+# Activity counter write-behind (see discord_files/activity_buffer.py)
+ACTIVITY_FLUSH_INTERVAL_MS = int(os.getenv('ACTIVITY_FLUSH_INTERVAL_MS', 5000))
+ACTIVITY_FLUSH_MAX_EVENTS = int(os.getenv('ACTIVITY_FLUSH_MAX_EVENTS', 200))
+
+# DB worker pool for the cog's SQLAlchemy work (see discord_files/db_executor.py)
+DB_EXECUTOR_WORKERS = int(os.getenv('DB_EXECUTOR_WORKERS', 2))
+DB_EXECUTOR_MAX_QUEUE = int(os.getenv('DB_EXECUTOR_MAX_QUEUE', 100))
+
+# Recently fetched messages kept for staff award reactions
+MESSAGE_CACHE_SIZE = int(os.getenv('MESSAGE_CACHE_SIZE', 256))
+
+# Post-purchase fulfillment queue (role assignments and admin purchase alerts)
+FULFILLMENT_POLL_SECONDS = int(os.getenv('FULFILLMENT_POLL_SECONDS', 5))
+FULFILLMENT_MAX_ATTEMPTS = int(os.getenv('FULFILLMENT_MAX_ATTEMPTS', 5))
+FULFILLMENT_RETRY_SECONDS = int(os.getenv('FULFILLMENT_RETRY_SECONDS', 30))  # doubled after each failed attempt
+FULFILLMENT_BATCH_SIZE = 20
+
+# How often guild administrators are persisted as User.is_admin (batched)
+ADMIN_SYNC_SECONDS = 5
+
+# Minimum seconds between progress edits on long-running admin commands
+BULK_PROGRESS_INTERVAL = 2
+
+# Points ledger reconciliation and balance checkpoints (see utils/ledger.py)
+LEDGER_CHECKPOINT_HOURS = float(os.getenv('LEDGER_CHECKPOINT_HOURS', 24))
+
+# How often the in-memory leaderboard is reloaded from the DB (see utils/leaderboard.py)
+LEADERBOARD_RECONCILE_SECONDS = float(os.getenv('LEADERBOARD_RECONCILE_SECONDS', 300))
+
 # Role management constants
 UNVERIFIED_ROLE_NAME = os.getenv('UNVERIFIED_ROLE_NAME', 'Unverified')  # Role that triggers removal
 COMMITTED_ROLE_NAME = os.getenv('COMMITTED_ROLE_NAME', 'Committed')  # Role to remove/prevent from unverified users
+RESTRICTED_ROLE_BATCH_SIZE = int(os.getenv('RESTRICTED_ROLE_BATCH_SIZE', 5))  # Committed-role removals per tick
+RESTRICTED_ROLE_INTERVAL_SECONDS = float(os.getenv('RESTRICTED_ROLE_INTERVAL_SECONDS', 2))
+
+def get_emoji_name(emoji):
+    """Return the bare name of a custom emoji (``<:name:id>``) or the unicode emoji itself"""
+    emoji_str = str(emoji)
+    return emoji_str.split(':')[1] if ':' in emoji_str else emoji_str
 
 def get_role_by_name(guild, role_name):
-    """Helper function to get a role by name"""
+    """Helper function to get a role by name (case-insensitive, via the role cache)"""
     if not guild or not role_name:
         return None
-    
-    for role in guild.roles:
-        if role.name.lower() == role_name.lower():
-            return role
-    return None
+    return role_cache.get_by_name(guild, role_name)
 
 class RoleRemovalConfirmationView(discord.ui.View):
     def __init__(self, cog, admin_user_id, affected_users):
@@ -155,6 +207,45 @@ class EconomyCog(commands.Cog):
         self.UserAchievement = UserAchievement
         # In-memory map of member_id -> datetime they joined their current voice channel
         self.voice_join_times = {}
+        # All blocking DB work runs on this pool instead of the event loop
+        self.db_executor = DBExecutor(
+            app, db, max_workers=DB_EXECUTOR_WORKERS, max_queue=DB_EXECUTOR_MAX_QUEUE
+        )
+        # Buffered message/reaction/voice counters, flushed in bulk
+        self.activity_buffer = ActivityBuffer(app, db, User, max_events=ACTIVITY_FLUSH_MAX_EVENTS)
+        atexit.register(self.activity_buffer.flush)
+        # Cached achievement thresholds and per-user earned bitmaps
+        self.achievement_index = AchievementIndex(db, Achievement, UserAchievement)
+        # Messages fetched for staff award reactions, keyed by message ID
+        self.message_cache = MessageCache(maxsize=MESSAGE_CACHE_SIZE)
+        # Members holding the Unverified/Committed roles, kept current from member events
+        self.restricted_roles = RestrictedRoleIndex(UNVERIFIED_ROLE_NAME, COMMITTED_ROLE_NAME, get_role_by_name)
+
+    def _find_user(self, user_id):
+        """DB unit of work: look up a user by Discord ID."""
+        return self.User.query.filter_by(id=str(user_id)).first()
+
+    def _get_or_create_user(self, user_id, username, avatar_url=None, commit=False):
+        """DB unit of work: look up a user by Discord ID, creating the row if needed."""
+        user = self._find_user(user_id)
+        if not user:
+            user = self.User(
+                id=str(user_id),
+                username=username,
+                discord_id=str(user_id),
+                avatar_url=avatar_url
+            )
+            self.db.session.add(user)
+            if commit:
+                self.db.session.commit()
+            else:
+                self.db.session.flush()
+        return user
+
+    def _add_points(self, user, amount, source, reference_id=None):
+        """Credit ``amount`` to ``user`` and record it in the points ledger (caller commits)."""
+        from utils.ledger import add_points
+        add_points(user, amount, source, reference_id)
 
     def is_staff_or_admin(self, member):
         """Return True if member has administrator permissions or the staff role."""
@@ -167,20 +258,51 @@ class EconomyCog(commands.Cog):
         try:
             self.daily_birthday_check.cancel()
             self.monitor_restricted_role_task.cancel()
+            self.enforce_restricted_roles_task.cancel()
+            self.sync_admin_flags_task.cancel()
+            self.flush_activity_task.cancel()
+            self.fulfillment_task.cancel()
+            self.ledger_checkpoint_task.cancel()
+            self.leaderboard_reconcile_task.cancel()
         except:
             pass
+        # Don't lose buffered counters when the cog is removed or the bot closes
+        self.activity_buffer.flush()
+        self.db_executor.shutdown(wait=True)
+        self.achievement_index.close()
 
     @commands.Cog.listener()
     async def on_ready(self):
         """Called when the bot is ready"""
         cog_logger.info("Economy cog is ready!")
 
+        # Index roles and restricted-role holders before events start updating them
+        for guild in self.bot.guilds:
+            self._publish_guild(guild)
+            for member_id in bot_bridge.guild(guild.id).admin_ids:
+                bot_bridge.queue_admin_promotion(member_id)
+            for member_id in self.restricted_roles.rebuild(guild):
+                self.restricted_roles.queue_removal(guild.id, member_id)
+        bot_bridge.set_ready()
+
         # Start background tasks only after bot is ready
         try:
             if not self.daily_birthday_check.is_running():
                 self.daily_birthday_check.start()
             if not self.monitor_restricted_role_task.is_running():
                 self.monitor_restricted_role_task.start()
+            if not self.enforce_restricted_roles_task.is_running():
+                self.enforce_restricted_roles_task.start()
+            if not self.sync_admin_flags_task.is_running():
+                self.sync_admin_flags_task.start()
+            if not self.flush_activity_task.is_running():
+                self.flush_activity_task.start()
+            if not self.fulfillment_task.is_running():
+                self.fulfillment_task.start()
+            if not self.ledger_checkpoint_task.is_running():
+                self.ledger_checkpoint_task.start()
+            if not self.leaderboard_reconcile_task.is_running():
+                self.leaderboard_reconcile_task.start()
             print("Background tasks started successfully!")
         except Exception as e:
             print(f"Warning: Could not start background tasks: {e}")
@@ -199,82 +321,96 @@ class EconomyCog(commands.Cog):
         if message.author.bot:
             return
         
-        with self.app.app_context():
-            try:
-                # Get or create user
-                user = self.User.query.filter_by(id=str(message.author.id)).first()
-                if not user:
-                    user = self.User(
-                        id=str(message.author.id),
-                        username=message.author.name,
-                        discord_id=str(message.author.id),
-                        avatar_url=str(message.author.avatar.url) if message.author.avatar else None
-                    )
-                    self.db.session.add(user)
-                    self.db.session.commit()
-                
-                # Update message count
-                user.message_count += 1
-                self.db.session.commit()
-                
-                # Check for message-based achievements
-                await self.check_achievements(user, 'messages', user.message_count)
-                
-            except Exception as e:
-                cog_logger.error(f"Error processing message: {e}")
+        try:
+            message_count = await self.record_activity(message.author, 'message_count')
+
+            # Check for message-based achievements against the buffered total
+            await self.check_activity_achievements(message.author.id, 'messages', message_count)
+
+        except Exception as e:
+            cog_logger.error(f"Error processing message: {e}")
+
+    async def record_activity(self, member, field, amount=1):
+        """Buffer an activity counter bump and return the member's running total."""
+        avatar = getattr(member, 'avatar', None)
+        record = functools.partial(
+            self.activity_buffer.record,
+            member.id,
+            field,
+            amount,
+            username=getattr(member, 'name', None),
+            avatar_url=str(avatar.url) if avatar else None
+        )
+        if self.activity_buffer.is_tracked(member.id):
+            total = record()  # in-memory only
+        else:
+            total = await self.db_executor.run(record)
+
+        if self.activity_buffer.should_flush():
+            await self.db_executor.run(self.activity_buffer.flush)
+        return total
+
+    @tasks.loop(seconds=ACTIVITY_FLUSH_INTERVAL_MS / 1000)
+    async def flush_activity_task(self):
+        """Periodically write buffered activity counters to the database"""
+        try:
+            await self.db_executor.run(self.activity_buffer.flush)
+        except Exception as e:
+            cog_logger.error(f"Error flushing activity counters: {e}")
 
     async def process_reaction(self, payload):
-        """Process reaction data - can be called from main.py or internally"""
+        """Process a raw reaction - can be called from main.py or internally
+
+        Plain reactions are counted straight from the payload. The message is
+        only fetched (through the LRU cache) for staff reactions that use one
+        of the award emojis.
+        """
         if payload.user_id == self.bot.user.id:
             return
 
-        with self.app.app_context():
-            try:
-                # Get the channel and message
-                channel = self.bot.get_channel(payload.channel_id)
-                if not channel:
-                    return
+        try:
+            if not payload.guild_id:
+                return
+            guild = self.bot.get_guild(payload.guild_id)
+            member = payload.member or (guild.get_member(payload.user_id) if guild else None)
 
-                try:
-                    message = await channel.fetch_message(payload.message_id)
-                except Exception as e:
-                    return
-
-                # Create a fake reaction object for compatibility
-                class FakeReaction:
-                    def __init__(self, message, emoji):
-                        self.message = message
-                        self.emoji = emoji
-                        self.count = 1
-
-                reaction = FakeReaction(message, payload.emoji)
-
-                guild = channel.guild
-                if guild:
-                    member = guild.get_member(payload.user_id)
-
-                    # Track reaction count for the reacting user
-                    reactor = self.User.query.filter_by(id=str(payload.user_id)).first()
-                    if not reactor:
-                        reactor = self.User(
-                            id=str(payload.user_id),
-                            username=member.name if member else str(payload.user_id),
-                            discord_id=str(payload.user_id),
-                            avatar_url=str(member.avatar.url) if member and member.avatar else None
-                        )
-                        self.db.session.add(reactor)
-                        self.db.session.commit()
+            # Track reaction count for the reacting user
+            reaction_count = await self.record_activity(
+                member or discord.Object(id=payload.user_id), 'reaction_count'
+            )
+            await self.check_activity_achievements(payload.user_id, 'reactions', reaction_count)
 
-                    reactor.reaction_count += 1
-                    self.db.session.commit()
-                    await self.check_achievements(reactor, 'reactions', reactor.reaction_count)
+            # Only staff reactions with an award emoji need the message itself
+            if get_emoji_name(payload.emoji) not in AWARD_EMOJIS:
+                return
+            if not member or not self.is_staff_or_admin(member):
+                return
 
-                    # Check if this is an admin or staff reaction
-                    if member and self.is_staff_or_admin(member):
-                        await self.check_admin_reactions(reaction, member)
+            channel = self.bot.get_channel(payload.channel_id)
+            if not channel:
+                return
 
+            try:
+                message = await self.message_cache.fetch(channel, payload.message_id)
             except Exception as e:
-                cog_logger.error(f"Error processing reaction: {e}")
+                cog_logger.error(f"Error fetching message {payload.message_id}: {e}")
+                return
+
+            # Create a fake reaction object for compatibility
+            class FakeReaction:
+                def __init__(self, message, emoji):
+                    self.message = message
+                    self.emoji = emoji
+                    self.count = 1
+
+            await self.check_admin_reactions(FakeReaction(message, payload.emoji), member)
+
+        except Exception as e:
+            cog_logger.error(f"Error processing reaction: {e}")
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        self.message_cache.discard(payload.message_id)
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
@@ -309,80 +445,132 @@ class EconomyCog(commands.Cog):
         if minutes_to_add <= 0:
             return
 
-        with self.app.app_context():
-            try:
-                user = self.User.query.filter_by(id=str(member.id)).first()
-                if not user:
-                    user = self.User(
-                        id=str(member.id),
-                        username=member.name,
-                        discord_id=str(member.id)
-                    )
-                    self.db.session.add(user)
-                    self.db.session.commit()
-
-                user.voice_minutes += minutes_to_add
-                self.db.session.commit()
-
-                await self.check_achievements(user, 'voice', user.voice_minutes)
+        try:
+            voice_minutes = await self.record_activity(member, 'voice_minutes', minutes_to_add)
+            await self.check_activity_achievements(member.id, 'voice', voice_minutes)
 
-            except Exception as e:
-                cog_logger.error(f"Error processing voice state update: {e}")
+        except Exception as e:
+            cog_logger.error(f"Error processing voice state update: {e}")
 
     @commands.Cog.listener()
     async def on_member_update(self, before, after):
         if before.bot:
+            if self.bot.user and after.id == self.bot.user.id and before.roles != after.roles:
+                self._refresh_roles(after.guild)  # changes which roles the bot can manage
             return
+
+        if before.guild_permissions.administrator != after.guild_permissions.administrator:
+            bot_bridge.set_admin(after.guild.id, after.id, after.guild_permissions.administrator)
+            if after.guild_permissions.administrator:
+                bot_bridge.queue_admin_promotion(after.id)
         
-        with self.app.app_context():
-            try:
-                # Check for verification bonus
-                if VERIFIED_ROLE_ID:
-                    verified_role = after.guild.get_role(int(VERIFIED_ROLE_ID))
-                    if verified_role and verified_role in after.roles and verified_role not in before.roles:
-                        await self.handle_verification_bonus(after)
-                
-                # Check for enrollment deposit role
-                if ENROLLMENT_DEPOSIT_ROLE_ID:
-                    deposit_role = after.guild.get_role(int(ENROLLMENT_DEPOSIT_ROLE_ID))
-                    if deposit_role and deposit_role in after.roles and deposit_role not in before.roles:
-                        await self.handle_enrollment_deposit_bonus(after)
-
-                # Check for server boost
-                if before.premium_since is None and after.premium_since is not None:
-                    await self.handle_boost_bonus(after)
-
-                # Monitor and prevent restricted role assignment
-                await self.monitor_restricted_role(before, after)
-                
-            except Exception as e:
-                cog_logger.error(f"Error processing member update: {e}")
-    
-    async def monitor_restricted_role(self, before, after):
-        """Monitor and prevent assignment of committed role to unverified users"""
         try:
-            committed_role = get_role_by_name(after.guild, COMMITTED_ROLE_NAME)
-            unverified_role = get_role_by_name(after.guild, UNVERIFIED_ROLE_NAME)
+            # Check for verification bonus
+            if VERIFIED_ROLE_ID:
+                verified_role = after.guild.get_role(int(VERIFIED_ROLE_ID))
+                if verified_role and verified_role in after.roles and verified_role not in before.roles:
+                    await self.handle_verification_bonus(after)
             
-            if not committed_role or not unverified_role:
-                return
+            # Check for enrollment deposit role
+            if ENROLLMENT_DEPOSIT_ROLE_ID:
+                deposit_role = after.guild.get_role(int(ENROLLMENT_DEPOSIT_ROLE_ID))
+                if deposit_role and deposit_role in after.roles and deposit_role not in before.roles:
+                    await self.handle_enrollment_deposit_bonus(after)
+
+            # Check for server boost
+            if before.premium_since is None and after.premium_since is not None:
+                await self.handle_boost_bonus(after)
+
+            # Monitor and prevent restricted role assignment
+            await self.monitor_restricted_role(before, after)
             
-            # Check if the committed role was just added
-            if committed_role in after.roles and committed_role not in before.roles:
-                # Someone just got the committed role, remove it immediately if they're unverified
-                if unverified_role in after.roles:
-                    await after.remove_roles(committed_role, reason="Committed role automatically removed from unverified user")
-                    await self.log_role_removal(after, "Committed role prevented from being assigned to unverified user")
-                    cog_logger.info(f"Prevented committed role assignment to unverified user {after.name} ({after.id})")
-            
-            # Check if someone with the unverified role has the committed role
-            if unverified_role in after.roles and committed_role in after.roles:
-                await after.remove_roles(committed_role, reason="Committed role removed due to unverified status")
-                await self.log_role_removal(after, "Has unverified role")
-                cog_logger.info(f"Removed committed role from unverified user {after.name} ({after.id})")
-                
+        except Exception as e:
+            cog_logger.error(f"Error processing member update: {e}")
+    
+    async def monitor_restricted_role(self, before, after):
+        """Re-index a member's restricted roles and queue removal of the committed role if they're unverified"""
+        try:
+            if self.restricted_roles.update_member(after):
+                self.restricted_roles.queue_removal(after.guild.id, after.id)
         except Exception as e:
             cog_logger.error(f"Error monitoring restricted role: {e}")
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self._refresh_roles(role.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        self._refresh_roles(after.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self._refresh_roles(role.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self._refresh_roles(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        role_cache.discard(guild.id)
+        bot_bridge.discard(guild.id)
+
+    def _publish_guild(self, guild):
+        """Refresh the role cache and publish the guild's roles and administrators for Flask"""
+        role_cache.refresh(guild)
+        bot_bridge.publish_guild(
+            guild.id,
+            guild.name,
+            role_cache.manageable_roles(guild),
+            (member.id for member in guild.members if member.guild_permissions.administrator)
+        )
+
+    def _promote_admins(self, user_ids):
+        """DB unit of work: set is_admin for the given users in one UPDATE. Returns rows changed."""
+        promoted = self.db.session.execute(
+            self.User.__table__.update()
+            .where(
+                self.User.id.in_(list(user_ids)),
+                or_(self.User.is_admin.is_(None), self.User.is_admin == False)
+            )
+            .values(is_admin=True)
+        ).rowcount
+        self.db.session.commit()
+        return promoted
+
+    @tasks.loop(seconds=ADMIN_SYNC_SECONDS)
+    async def sync_admin_flags_task(self):
+        """Persist queued guild-administrator promotions in one batch"""
+        user_ids = bot_bridge.take_admin_promotions()
+        if not user_ids:
+            return
+        try:
+            promoted = await self.db_executor.run(self._promote_admins, user_ids)
+            if promoted:
+                cog_logger.info(f"Promoted {promoted} guild administrator(s) to site admin")
+        except Exception as e:
+            for user_id in user_ids:
+                bot_bridge.queue_admin_promotion(user_id)
+            cog_logger.error(f"Error syncing admin flags: {e}")
+
+    def _refresh_roles(self, guild):
+        """Republish a guild after a role change and re-index restricted roles if they moved"""
+        # A role's permissions may have changed too, so administrators are recomputed
+        self._publish_guild(guild)
+        if self.restricted_roles.roles_changed(guild):
+            for member_id in self.restricted_roles.rebuild(guild):
+                self.restricted_roles.queue_removal(guild.id, member_id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        if self.restricted_roles.update_member(member):
+            self.restricted_roles.queue_removal(member.guild.id, member.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.restricted_roles.remove_member(member.guild.id, member.id)
+        bot_bridge.set_admin(member.guild.id, member.id, False)
     
     async def log_role_removal(self, member, reason):
         """Log role removal with member details"""
@@ -404,139 +592,179 @@ class EconomyCog(commands.Cog):
         #         await channel.send(f"🚫 **Role Removed**: {member.mention} - {reason}")
     
     async def scan_and_remove_restricted_roles(self):
-        """Scan all members and remove committed role from those with unverified role"""
-        removed_count = 0
+        """Consistency check over the restricted-role index; queues removals for current violators.
+
+        Only the indexed violators are re-checked against the member cache. A
+        guild is fully re-indexed only when its Unverified/Committed roles were
+        created, deleted or renamed. Returns the number of removals queued.
+        """
+        queued = 0
         for guild in self.bot.guilds:
             try:
-                committed_role = get_role_by_name(guild, COMMITTED_ROLE_NAME)
-                unverified_role = get_role_by_name(guild, UNVERIFIED_ROLE_NAME)
-                
-                if not committed_role or not unverified_role:
-                    continue
-                
-                for member in guild.members:
-                    if member.bot:
-                        continue
-                    
-                    # If member has both unverified role and committed role, remove committed role
-                    if unverified_role in member.roles and committed_role in member.roles:
-                        try:
-                            await member.remove_roles(committed_role, reason="Bulk removal: has unverified role")
-                            await self.log_role_removal(member, "Bulk scan - has unverified role")
-                            removed_count += 1
-                        except Exception as e:
-                            cog_logger.error(f"Failed to remove role from {member.name}: {e}")
-                            
+                if self.restricted_roles.roles_changed(guild):
+                    violators = self.restricted_roles.rebuild(guild)
+                else:
+                    violators = set()
+                    for member_id in self.restricted_roles.violators(guild.id):
+                        member = guild.get_member(member_id)
+                        if member is None:
+                            self.restricted_roles.remove_member(guild.id, member_id)
+                        elif self.restricted_roles.update_member(member):
+                            violators.add(member_id)
+
+                for member_id in violators:
+                    self.restricted_roles.queue_removal(guild.id, member_id)
+                queued += len(violators)
+
             except Exception as e:
-                cog_logger.error(f"Error scanning guild {guild.name}: {e}")
-        
-        return removed_count
+                cog_logger.error(f"Error checking restricted roles in guild {guild.name}: {e}")
+
+        return queued
+
+    @tasks.loop(seconds=RESTRICTED_ROLE_INTERVAL_SECONDS)
+    async def enforce_restricted_roles_task(self):
+        """Remove the committed role from queued unverified members, a few per tick"""
+        for guild_id, member_id in self.restricted_roles.next_batch(RESTRICTED_ROLE_BATCH_SIZE):
+            guild = self.bot.get_guild(guild_id)
+            member = guild.get_member(member_id) if guild else None
+            # Skip members who left or were fixed since they were queued
+            if member is None or not self.restricted_roles.update_member(member):
+                continue
+            try:
+                committed_role = guild.get_role(self.restricted_roles.committed_role_id(guild_id))
+                await member.remove_roles(committed_role, reason="Committed role removed due to unverified status")
+                await self.log_role_removal(member, "Has unverified role")
+                cog_logger.info(f"Removed committed role from unverified user {member.name} ({member.id})")
+            except Exception as e:
+                cog_logger.error(f"Failed to remove role from {member.name}: {e}")
+
+    @enforce_restricted_roles_task.before_loop
+    async def before_enforce_restricted_roles(self):
+        await self.bot.wait_until_ready()
     
     async def get_affected_users(self):
         """Get list of users who would be affected by role removal (for confirmation)"""
         affected_users = []
         for guild in self.bot.guilds:
-            try:
-                committed_role = get_role_by_name(guild, COMMITTED_ROLE_NAME)
-                unverified_role = get_role_by_name(guild, UNVERIFIED_ROLE_NAME)
-                
-                if not committed_role or not unverified_role:
+            for member_id in self.restricted_roles.violators(guild.id):
+                member = guild.get_member(member_id)
+                if member is None or not self.restricted_roles.update_member(member):
                     continue
-                
-                for member in guild.members:
-                    if member.bot:
-                        continue
-                    
-                    # If member has both unverified role and committed role
-                    if unverified_role in member.roles and committed_role in member.roles:
-                        affected_users.append({
-                            'name': f"{member.name}#{member.discriminator}",
-                            'id': member.id,
-                            'member': member
-                        })
-                        
-            except Exception as e:
-                cog_logger.error(f"Error scanning guild {guild.name}: {e}")
-        
+                affected_users.append({
+                    'name': f"{member.name}#{member.discriminator}",
+                    'id': member.id,
+                    'member': member
+                })
         return affected_users
 
+    def _grant_verification_bonus(self, user_id, username):
+        """DB unit of work: award the one-time verification bonus. Returns the user if awarded."""
+        user = self._get_or_create_user(user_id, username)
+
+        # Check if user already received verification bonus
+        if user.verification_bonus_received:
+            return None
+
+        self._add_points(user, 300, 'verification_bonus')
+        user.verification_bonus_received = True
+        self.db.session.commit()
+        return user
+
     async def handle_verification_bonus(self, member):
         """Handle verification role bonus"""
-        with self.app.app_context():
-            try:
-                user = self.User.query.filter_by(id=str(member.id)).first()
-                if not user:
-                    user = self.User(
-                        id=str(member.id),
-                        username=member.name,
-                        discord_id=str(member.id)
-                    )
-                    self.db.session.add(user)
-                    self.db.session.flush()
-                
-                # Check if user already received verification bonus
-                if not user.verification_bonus_received:
-                    user.balance += 300
-                    user.points += 300
-                    user.verification_bonus_received = True
-                    self.db.session.commit()
-
-                    # Send announcement
-                    if GENERAL_CHANNEL_ID:
-                        channel = self.bot.get_channel(int(GENERAL_CHANNEL_ID))
-                        if channel:
-                            embed = discord.Embed(
-                                title="🎉 Verification Bonus!",
-                                description=f"Congratulations {member.mention} **({member.display_name})**! You've received **300 pitchforks** for getting verified!",
-                                color=discord.Color.gold()
-                            )
-                            embed.add_field(
-                                name="💰 New Balance",
-                                value=f"{user.balance} pitchforks",
-                                inline=True
-                            )
-                            await channel.send(embed=embed)
-
-                    cog_logger.info(f"Verification bonus awarded to {member.name}: 300 points")
-                
-            except Exception as e:
-                cog_logger.error(f"Error handling verification bonus: {e}")
+        try:
+            user = await self.db_executor.run(self._grant_verification_bonus, member.id, member.name)
+            if user:
+                # Send announcement
+                if GENERAL_CHANNEL_ID:
+                    channel = self.bot.get_channel(int(GENERAL_CHANNEL_ID))
+                    if channel:
+                        embed = discord.Embed(
+                            title="🎉 Verification Bonus!",
+                            description=f"Congratulations {member.mention} **({member.display_name})**! You've received **300 pitchforks** for getting verified!",
+                            color=discord.Color.gold()
+                        )
+                        embed.add_field(
+                            name="💰 New Balance",
+                            value=f"{user.balance} pitchforks",
+                            inline=True
+                        )
+                        await channel.send(embed=embed)
+
+                cog_logger.info(f"Verification bonus awarded to {member.name}: 300 points")
+            
+        except Exception as e:
+            cog_logger.error(f"Error handling verification bonus: {e}")
+
+    def _grant_boost_bonus(self, user_id, username):
+        """DB unit of work: award the one-time boost bonus. Returns the user if awarded."""
+        user = self._get_or_create_user(user_id, username)
+        if user.has_boosted:
+            return None
+
+        self._add_points(user, 500, 'boost_bonus')
+        user.has_boosted = True
+        self.db.session.commit()
+        return user
 
     async def handle_boost_bonus(self, member):
         """Award 500 pitchforks for boosting the server (once per user)."""
-        with self.app.app_context():
-            try:
-                user = self.User.query.filter_by(id=str(member.id)).first()
-                if not user:
-                    user = self.User(id=str(member.id), username=member.name, discord_id=str(member.id))
-                    self.db.session.add(user)
-                    self.db.session.flush()
-
-                if not user.has_boosted:
-                    user.balance += 500
-                    user.points += 500
-                    user.has_boosted = True
-                    self.db.session.commit()
-
-                    if GENERAL_CHANNEL_ID:
-                        channel = self.bot.get_channel(int(GENERAL_CHANNEL_ID))
-                        if channel:
-                            embed = discord.Embed(
-                                title="🚀 Server Boost!",
-                                description=f"Thank you {member.mention} for boosting the server! You've received **500 pitchforks**!",
-                                color=discord.Color.purple()
-                            )
-                            embed.add_field(name="💰 New Balance", value=f"{user.balance} pitchforks", inline=True)
-                            await channel.send(embed=embed)
-                    cog_logger.info(f"Boost bonus awarded to {member.name}: 500 points")
-            except Exception as e:
-                cog_logger.error(f"Error handling boost bonus: {e}")
+        try:
+            user = await self.db_executor.run(self._grant_boost_bonus, member.id, member.name)
+            if user:
+                await self.announce_boost_bonus(member, user.balance)
+        except Exception as e:
+            cog_logger.error(f"Error handling boost bonus: {e}")
+
+    async def announce_boost_bonus(self, member, balance):
+        if GENERAL_CHANNEL_ID:
+            channel = self.bot.get_channel(int(GENERAL_CHANNEL_ID))
+            if channel:
+                embed = discord.Embed(
+                    title="🚀 Server Boost!",
+                    description=f"Thank you {member.mention} for boosting the server! You've received **500 pitchforks**!",
+                    color=discord.Color.purple()
+                )
+                embed.add_field(name="💰 New Balance", value=f"{balance} pitchforks", inline=True)
+                await channel.send(embed=embed)
+        cog_logger.info(f"Boost bonus awarded to {member.name}: 500 points")
+
+    def _backfill_boost_bonus(self, profiles):
+        """DB unit of work: bulk-award the boost bonus to (id, name, avatar_url) boosters.
+
+        Returns ``{user_id: new_balance}`` for the boosters that were awarded.
+        """
+        from utils.bulk_awards import bulk_award, ensure_users
+        ensure_users(profiles)
+        awarded = bulk_award(
+            500, 'boost_bonus', user_ids=[user_id for user_id, _, _ in profiles], flag='has_boosted'
+        )
+        if not awarded:
+            return {}
+        return dict(self.db.session.execute(
+            select(self.User.id, self.User.balance).where(self.User.id.in_(awarded))
+        ).all())
 
     async def _retroactive_boost_check(self):
-        for guild in self.bot.guilds:
-            for member in guild.members:
-                if member.premium_since is not None and not member.bot:
-                    await self.handle_boost_bonus(member)
+        boosters = {
+            str(member.id): member
+            for guild in self.bot.guilds
+            for member in guild.members
+            if member.premium_since is not None and not member.bot
+        }
+        if not boosters:
+            return
+        profiles = [
+            (user_id, member.name, str(member.avatar.url) if member.avatar else None)
+            for user_id, member in boosters.items()
+        ]
+        try:
+            balances = await self.db_executor.run(self._backfill_boost_bonus, profiles)
+        except Exception as e:
+            cog_logger.error(f"Error backfilling boost bonuses: {e}")
+            return
+        for user_id, balance in balances.items():
+            await self.announce_boost_bonus(boosters[user_id], balance)
 
     async def _retroactive_enrollment_deposit_check(self):
         if not ENROLLMENT_DEPOSIT_ROLE_ID:
@@ -549,81 +777,84 @@ class EconomyCog(commands.Cog):
                 if not member.bot and deposit_role in member.roles:
                     await self.handle_enrollment_deposit_bonus(member)
 
+    def _grant_enrollment_deposit_bonus(self, user_id, username):
+        """DB unit of work: award the one-time enrollment deposit bonus. Returns the user if awarded."""
+        user = self._get_or_create_user(user_id, username)
+        if user.enrollment_deposit_received:
+            return None
+
+        self._add_points(user, ENROLLMENT_DEPOSIT_POINTS, 'enrollment_deposit')
+        user.enrollment_deposit_received = True
+        self.db.session.commit()
+        return user
+
     async def handle_enrollment_deposit_bonus(self, member):
         """Award enrollment deposit bonus when a member receives the enrollment deposit role."""
-        with self.app.app_context():
-            try:
-                user = self.User.query.filter_by(id=str(member.id)).first()
-                if not user:
-                    user = self.User(
-                        id=str(member.id),
-                        username=member.name,
-                        discord_id=str(member.id)
-                    )
-                    self.db.session.add(user)
-                    self.db.session.flush()
-
-                if not user.enrollment_deposit_received:
-                    user.balance += ENROLLMENT_DEPOSIT_POINTS
-                    user.points += ENROLLMENT_DEPOSIT_POINTS
-                    user.enrollment_deposit_received = True
-                    self.db.session.commit()
-
-                    await self.check_achievements(user, 'enrollment_deposit')
-
-                    if GENERAL_CHANNEL_ID:
-                        channel = self.bot.get_channel(int(GENERAL_CHANNEL_ID))
-                        if channel:
-                            embed = discord.Embed(
-                                title="🎉 Enrollment Deposit Approved!",
-                                description=f"Congratulations {member.mention}! Your enrollment deposit has been approved!",
-                                color=discord.Color.green()
-                            )
-                            embed.add_field(
-                                name="💰 Points Earned",
-                                value=f"+{ENROLLMENT_DEPOSIT_POINTS} pitchforks",
-                                inline=True
-                            )
-                            embed.add_field(
-                                name="💎 New Balance",
-                                value=f"{user.balance} pitchforks",
-                                inline=True
-                            )
-                            embed.add_field(
-                                name="🎓 Next Steps",
-                                value="You're now eligible for campus activities and exclusive benefits!",
-                                inline=False
-                            )
-                            await channel.send(embed=embed)
-
-                    cog_logger.info(f"Enrollment deposit bonus awarded to {member.name}: {ENROLLMENT_DEPOSIT_POINTS} points")
+        try:
+            user = await self.db_executor.run(self._grant_enrollment_deposit_bonus, member.id, member.name)
+            if user:
+                await self.check_achievements(user, 'enrollment_deposit')
 
-            except Exception as e:
-                self.db.session.rollback()
-                cog_logger.error(f"Error handling enrollment deposit bonus: {e}")
+                if GENERAL_CHANNEL_ID:
+                    channel = self.bot.get_channel(int(GENERAL_CHANNEL_ID))
+                    if channel:
+                        embed = discord.Embed(
+                            title="🎉 Enrollment Deposit Approved!",
+                            description=f"Congratulations {member.mention}! Your enrollment deposit has been approved!",
+                            color=discord.Color.green()
+                        )
+                        embed.add_field(
+                            name="💰 Points Earned",
+                            value=f"+{ENROLLMENT_DEPOSIT_POINTS} pitchforks",
+                            inline=True
+                        )
+                        embed.add_field(
+                            name="💎 New Balance",
+                            value=f"{user.balance} pitchforks",
+                            inline=True
+                        )
+                        embed.add_field(
+                            name="🎓 Next Steps",
+                            value="You're now eligible for campus activities and exclusive benefits!",
+                            inline=False
+                        )
+                        await channel.send(embed=embed)
+
+                cog_logger.info(f"Enrollment deposit bonus awarded to {member.name}: {ENROLLMENT_DEPOSIT_POINTS} points")
+
+        except Exception as e:
+            cog_logger.error(f"Error handling enrollment deposit bonus: {e}")
+
+    def _apply_daily_engagement(self, user_id):
+        """DB unit of work: credit a daily engagement approval. Returns (success, reason, user)."""
+        user = self._find_user(user_id)
+
+        # Check if user has reached daily engagement limit
+        daily_engagement_count = getattr(user, 'daily_engagement_count', 0) or 0
+        if daily_engagement_count >= 3:  # Max 3 daily engagements per day
+            return False, "Daily engagement limit reached", user
+
+        # Check if user already got daily engagement today
+        current_time = datetime.now()
+        if user.last_daily_engagement and user.last_daily_engagement.date() == current_time.date():
+            return False, "Daily engagement already claimed today", user
+
+        # Award points
+        self._add_points(user, DAILY_ENGAGEMENT_POINTS, 'daily_engagement')
+        user.last_daily_engagement = current_time
+        if not hasattr(user, 'daily_engagement_count') or user.daily_engagement_count is None:
+            user.daily_engagement_count = 0
+        user.daily_engagement_count += 1
+
+        self.db.session.commit()
+        return True, None, user
 
     async def award_daily_engagement_points(self, user, message):
         """Award points for daily engagement approval"""
         try:
-            # Check if user has reached daily engagement limit
-            daily_engagement_count = getattr(user, 'daily_engagement_count', 0) or 0
-            if daily_engagement_count >= 3:  # Max 3 daily engagements per day
-                return False, "Daily engagement limit reached"
-            
-            # Check if user already got daily engagement today
-            current_time = datetime.now()
-            if user.last_daily_engagement and user.last_daily_engagement.date() == current_time.date():
-                return False, "Daily engagement already claimed today"
-            
-            # Award points
-            user.balance += DAILY_ENGAGEMENT_POINTS
-            user.points += DAILY_ENGAGEMENT_POINTS
-            user.last_daily_engagement = current_time
-            if not hasattr(user, 'daily_engagement_count') or user.daily_engagement_count is None:
-                user.daily_engagement_count = 0
-            user.daily_engagement_count += 1
-            
-            self.db.session.commit()
+            success, reason, user = await self.db_executor.run(self._apply_daily_engagement, user.id)
+            if not success:
+                return False, reason
             
             # Check for achievements
             await self.check_achievements(user, 'daily_engagement')
@@ -640,112 +871,116 @@ class EconomyCog(commands.Cog):
 
     async def check_admin_reactions(self, reaction, admin_user):
         """Check if admin reaction is for point awarding"""
-        with self.app.app_context():
-            try:
-                # Extract emoji name from the full emoji string
-                emoji_str = str(reaction.emoji)
-                emoji_name = emoji_str.split(':')[1] if ':' in emoji_str else emoji_str
-                
-                # Check for daily engagement emoji
-                if emoji_name == DAILY_ENGAGEMENT_EMOJI:
-                    user = self.User.query.filter_by(id=str(reaction.message.author.id)).first()
-                    if user:
-                        success, message = await self.award_daily_engagement_points(user, reaction.message)
-                        await self.send_admin_reaction_dm(admin_user, reaction, reaction.message, "daily_engagement", DAILY_ENGAGEMENT_POINTS if success else 0)
-                        # Add checkmark reaction if successful
-                        if success:
-                            try:
-                                await reaction.message.add_reaction("✅")
-                            except Exception as e:
-                                cog_logger.error(f"Error adding checkmark reaction: {e}")
-                    else:
-                        cog_logger.warning(f"User {reaction.message.author.name} not found in database")
-                
-                # Check for campus picture emoji
-                elif emoji_name == CAMPUS_PICTURE_EMOJI:
-                    user = self.User.query.filter_by(id=str(reaction.message.author.id)).first()
-                    if user:
-                        success, message = await self.award_campus_picture_points(user, reaction.message)
-                        await self.send_admin_reaction_dm(admin_user, reaction, reaction.message, "campus_picture", CAMPUS_PICTURE_POINTS if success else 0)
-                        # Add checkmark reaction if successful
-                        if success:
-                            try:
-                                await reaction.message.add_reaction("✅")
-                            except Exception as e:
-                                cog_logger.error(f"Error adding checkmark reaction: {e}")
-                    else:
-                        cog_logger.warning(f"User {reaction.message.author.name} not found in database")
-                
-                # Check for enrollment deposit emoji
-                elif emoji_name == ENROLLMENT_DEPOSIT_EMOJI:
-                    user = self.User.query.filter_by(id=str(reaction.message.author.id)).first()
-                    if user:
-                        success, message = await self.award_enrollment_deposit_points(user, reaction.message)
-                        await self.send_admin_reaction_dm(admin_user, reaction, reaction.message, "enrollment_deposit", ENROLLMENT_DEPOSIT_POINTS if success else 0)
-                        # Add checkmark reaction if successful
-                        if success:
-                            try:
-                                await reaction.message.add_reaction("✅")
-                            except Exception as e:
-                                cog_logger.error(f"Error adding checkmark reaction: {e}")
-                    else:
-                        cog_logger.warning(f"User {reaction.message.author.name} not found in database")
-
-                # Check for events engagement emoji
-                elif emoji_name == EVENTS_ENGAGE_EMOJI:
-                    user = self.User.query.filter_by(id=str(reaction.message.author.id)).first()
-                    if not user:
-                        # Create user if they don't exist yet
-                        member = reaction.message.author
-                        user = self.User(
-                            id=str(member.id),
-                            username=member.name,
-                            discord_id=str(member.id),
-                            avatar_url=str(member.avatar.url) if member.avatar else None
-                        )
-                        self.db.session.add(user)
-                        self.db.session.commit()
-                    success, msg = await self.award_event_points(user, reaction.message)
-                    await self.send_admin_reaction_dm(admin_user, reaction, reaction.message, "event_attendance", EVENT_POINTS if success else 0)
+        try:
+            # Extract emoji name from the full emoji string
+            emoji_name = get_emoji_name(reaction.emoji)
+            author_id = reaction.message.author.id
+            
+            # Check for daily engagement emoji
+            if emoji_name == DAILY_ENGAGEMENT_EMOJI:
+                user = await self.db_executor.run(self._find_user, author_id)
+                if user:
+                    success, message = await self.award_daily_engagement_points(user, reaction.message)
+                    await self.send_admin_reaction_dm(admin_user, reaction, reaction.message, "daily_engagement", DAILY_ENGAGEMENT_POINTS if success else 0)
+                    # Add checkmark reaction if successful
+                    if success:
+                        try:
+                            await reaction.message.add_reaction("✅")
+                        except Exception as e:
+                            cog_logger.error(f"Error adding checkmark reaction: {e}")
+                else:
+                    cog_logger.warning(f"User {reaction.message.author.name} not found in database")
+            
+            # Check for campus picture emoji
+            elif emoji_name == CAMPUS_PICTURE_EMOJI:
+                user = await self.db_executor.run(self._find_user, author_id)
+                if user:
+                    success, message = await self.award_campus_picture_points(user, reaction.message)
+                    await self.send_admin_reaction_dm(admin_user, reaction, reaction.message, "campus_picture", CAMPUS_PICTURE_POINTS if success else 0)
+                    # Add checkmark reaction if successful
+                    if success:
+                        try:
+                            await reaction.message.add_reaction("✅")
+                        except Exception as e:
+                            cog_logger.error(f"Error adding checkmark reaction: {e}")
+                else:
+                    cog_logger.warning(f"User {reaction.message.author.name} not found in database")
+            
+            # Check for enrollment deposit emoji
+            elif emoji_name == ENROLLMENT_DEPOSIT_EMOJI:
+                user = await self.db_executor.run(self._find_user, author_id)
+                if user:
+                    success, message = await self.award_enrollment_deposit_points(user, reaction.message)
+                    await self.send_admin_reaction_dm(admin_user, reaction, reaction.message, "enrollment_deposit", ENROLLMENT_DEPOSIT_POINTS if success else 0)
+                    # Add checkmark reaction if successful
+                    if success:
+                        try:
+                            await reaction.message.add_reaction("✅")
+                        except Exception as e:
+                            cog_logger.error(f"Error adding checkmark reaction: {e}")
+                else:
+                    cog_logger.warning(f"User {reaction.message.author.name} not found in database")
+
+            # Check for events engagement emoji
+            elif emoji_name == EVENTS_ENGAGE_EMOJI:
+                # Create user if they don't exist yet
+                member = reaction.message.author
+                user = await self.db_executor.run(
+                    self._get_or_create_user,
+                    member.id,
+                    member.name,
+                    avatar_url=str(member.avatar.url) if member.avatar else None,
+                    commit=True
+                )
+                success, msg = await self.award_event_points(user, reaction.message)
+                await self.send_admin_reaction_dm(admin_user, reaction, reaction.message, "event_attendance", EVENT_POINTS if success else 0)
+                if success:
+                    try:
+                        await reaction.message.add_reaction("✅")
+                    except Exception as e:
+                        cog_logger.error(f"Error adding checkmark reaction: {e}")
+
+            # Check for college signing day emoji
+            elif emoji_name == CSD_FORKS_UP_EMOJI:
+                user = await self.db_executor.run(self._find_user, author_id)
+                if user:
+                    success, message = await self.award_csd_points(user, reaction.message)
+                    await self.send_admin_reaction_dm(admin_user, reaction, reaction.message, "college_signing_day", CSD_POINTS if success else 0)
                     if success:
                         try:
                             await reaction.message.add_reaction("✅")
                         except Exception as e:
                             cog_logger.error(f"Error adding checkmark reaction: {e}")
+                else:
+                    cog_logger.warning(f"User {reaction.message.author.name} not found in database")
 
-                # Check for college signing day emoji
-                elif emoji_name == CSD_FORKS_UP_EMOJI:
-                    user = self.User.query.filter_by(id=str(reaction.message.author.id)).first()
-                    if user:
-                        success, message = await self.award_csd_points(user, reaction.message)
-                        await self.send_admin_reaction_dm(admin_user, reaction, reaction.message, "college_signing_day", CSD_POINTS if success else 0)
-                        if success:
-                            try:
-                                await reaction.message.add_reaction("✅")
-                            except Exception as e:
-                                cog_logger.error(f"Error adding checkmark reaction: {e}")
-                    else:
-                        cog_logger.warning(f"User {reaction.message.author.name} not found in database")
+            else:
+                cog_logger.info(f"Emoji {emoji_name} did not match any configured emojis")
+            
+        except Exception as e:
+            cog_logger.error(f"Error checking admin reactions: {e}")
 
-                else:
-                    cog_logger.info(f"Emoji {emoji_name} did not match any configured emojis")
-                
-            except Exception as e:
-                cog_logger.error(f"Error checking admin reactions: {e}")
+    def _apply_campus_picture(self, user_id):
+        """DB unit of work: credit a campus picture approval. Returns (success, reason, user)."""
+        user = self._find_user(user_id)
+
+        # Check if user already received campus picture points
+        if getattr(user, 'campus_photos_count', 0) >= 1:
+            return False, "Campus picture points already awarded", user
+
+        # Award points
+        self._add_points(user, CAMPUS_PICTURE_POINTS, 'campus_picture')
+        user.campus_photos_count = 1
+
+        self.db.session.commit()
+        return True, None, user
 
     async def award_campus_picture_points(self, user, message):
         """Award points for campus picture approval"""
         try:
-            # Check if user already received campus picture points
-            if getattr(user, 'campus_photos_count', 0) >= 1:
-                return False, "Campus picture points already awarded"
-            
-            # Award points
-            user.balance += CAMPUS_PICTURE_POINTS
-            user.points += CAMPUS_PICTURE_POINTS
-            user.campus_photos_count = 1
-            
-            self.db.session.commit()
+            success, reason, user = await self.db_executor.run(self._apply_campus_picture, user.id)
+            if not success:
+                return False, reason
             
             # Check for achievements
             await self.check_achievements(user, 'campus_picture')
@@ -760,17 +995,24 @@ class EconomyCog(commands.Cog):
             cog_logger.error(f"Error awarding campus picture points: {e}")
             return False, "Error awarding points"
 
+    def _apply_csd(self, user_id):
+        """DB unit of work: credit a college signing day picture. Returns (success, reason, user)."""
+        user = self._find_user(user_id)
+        if user.csd_bonus_received:
+            return False, "College signing day points already awarded", user
+
+        self._add_points(user, CSD_POINTS, 'college_signing_day')
+        user.csd_bonus_received = True
+
+        self.db.session.commit()
+        return True, None, user
+
     async def award_csd_points(self, user, message):
         """Award points for college signing day picture"""
         try:
-            if user.csd_bonus_received:
-                return False, "College signing day points already awarded"
-
-            user.balance += CSD_POINTS
-            user.points += CSD_POINTS
-            user.csd_bonus_received = True
-
-            self.db.session.commit()
+            success, reason, user = await self.db_executor.run(self._apply_csd, user.id)
+            if not success:
+                return False, reason
 
             await self.send_csd_announcement(user, message)
 
@@ -813,22 +1055,28 @@ class EconomyCog(commands.Cog):
         except Exception as e:
             cog_logger.error(f"Error sending college signing day announcement: {e}")
 
+    def _apply_enrollment_deposit(self, user_id):
+        """DB unit of work: credit an enrollment deposit approval. Returns (success, reason, user)."""
+        user = self._find_user(user_id)
+
+        # Check if user already received enrollment deposit points
+        if user.enrollment_deposit_received:
+            return False, "Enrollment deposit points already awarded", user
+
+        # Award points
+        self._add_points(user, ENROLLMENT_DEPOSIT_POINTS, 'enrollment_deposit')
+        user.enrollment_deposit_received = True
+
+        # Commit the changes
+        self.db.session.commit()
+        return True, None, user
+
     async def award_enrollment_deposit_points(self, user, message):
         """Award points for enrollment deposit approval"""
         try:
-            # Check if user already received enrollment deposit points
-            if user.enrollment_deposit_received:
-                return False, "Enrollment deposit points already awarded"
-            
-            # Award points
-            old_balance = user.balance
-            old_points = user.points
-            user.balance += ENROLLMENT_DEPOSIT_POINTS
-            user.points += ENROLLMENT_DEPOSIT_POINTS
-            user.enrollment_deposit_received = True
-            
-            # Commit the changes
-            self.db.session.commit()
+            success, reason, user = await self.db_executor.run(self._apply_enrollment_deposit, user.id)
+            if not success:
+                return False, reason
             
             # Check for achievements
             await self.check_achievements(user, 'enrollment_deposit')
@@ -840,16 +1088,20 @@ class EconomyCog(commands.Cog):
             return True, f"Awarded {ENROLLMENT_DEPOSIT_POINTS} points for enrollment deposit"
             
         except Exception as e:
-            self.db.session.rollback()
             cog_logger.error(f"Error awarding enrollment deposit points: {e}")
             return False, "Error awarding points"
 
+    def _apply_event(self, user_id):
+        """DB unit of work: credit one event attendance. Returns (success, reason, user)."""
+        user = self._find_user(user_id)
+        self._add_points(user, EVENT_POINTS, 'event')
+        self.db.session.commit()
+        return True, None, user
+
     async def award_event_points(self, user, message):
         """Award points for attending an event (no per-user limit — one award per reaction)."""
         try:
-            user.balance += EVENT_POINTS
-            user.points += EVENT_POINTS
-            self.db.session.commit()
+            success, reason, user = await self.db_executor.run(self._apply_event, user.id)
 
             await self.send_event_announcement(user)
 
@@ -857,7 +1109,6 @@ class EconomyCog(commands.Cog):
             return True, f"Awarded {EVENT_POINTS} points for event attendance"
 
         except Exception as e:
-            self.db.session.rollback()
             cog_logger.error(f"Error awarding event points: {e}")
             return False, "Error awarding points"
 
@@ -891,44 +1142,50 @@ class EconomyCog(commands.Cog):
             except Exception as e:
                 cog_logger.error(f"Error sending event announcement: {e}")
 
+    def _grant_birthday_gifts(self):
+        """DB unit of work: award today's birthday gifts. Returns the users who were gifted."""
+        current_date = datetime.now().date()
+        users_with_birthdays = self.User.query.filter(
+            and_(
+                self.User.birthday.isnot(None),
+                func.extract('month', self.User.birthday) == current_date.month,
+                func.extract('day', self.User.birthday) == current_date.day
+            )
+        ).all()
+
+        for user in users_with_birthdays:
+            # Award birthday points
+            self._add_points(user, 100, 'birthday')
+        self.db.session.commit()
+        return users_with_birthdays
+
     async def check_birthdays(self):
         """Check for birthdays and send announcements"""
-        with self.app.app_context():
-            try:
-                current_date = datetime.now().date()
-                users_with_birthdays = self.User.query.filter(
-                    and_(
-                        self.User.birthday.isnot(None),
-                        func.extract('month', self.User.birthday) == current_date.month,
-                        func.extract('day', self.User.birthday) == current_date.day
-                    )
-                ).all()
-                
-                if users_with_birthdays and GENERAL_CHANNEL_ID:
-                    channel = self.bot.get_channel(int(GENERAL_CHANNEL_ID))
-                    if channel:
-                        for user in users_with_birthdays:
-                            embed = discord.Embed(
-                                title="🎂 Happy Birthday!",
-                                description=f"Today is **{user.username}**'s birthday! 🎉",
-                                color=discord.Color.pink()
-                            )
-                            embed.add_field(
-                                name="🎁 Birthday Gift",
-                                value="You've received **100 pitchforks** as a birthday gift!",
-                                inline=True
-                            )
-                            await channel.send(embed=embed)
-                            
-                            # Award birthday points
-                            user.balance += 100
-                            user.points += 100
-                            self.db.session.commit()
-                            
-                            cog_logger.info(f"Birthday gift awarded to {user.username}: 100 points")
-                
-            except Exception as e:
-                cog_logger.error(f"Error checking birthdays: {e}")
+        try:
+            if not GENERAL_CHANNEL_ID:
+                return
+            channel = self.bot.get_channel(int(GENERAL_CHANNEL_ID))
+            if not channel:
+                return
+
+            users_with_birthdays = await self.db_executor.run(self._grant_birthday_gifts)
+            for user in users_with_birthdays:
+                embed = discord.Embed(
+                    title="🎂 Happy Birthday!",
+                    description=f"Today is **{user.username}**'s birthday! 🎉",
+                    color=discord.Color.pink()
+                )
+                embed.add_field(
+                    name="🎁 Birthday Gift",
+                    value="You've received **100 pitchforks** as a birthday gift!",
+                    inline=True
+                )
+                await channel.send(embed=embed)
+                
+                cog_logger.info(f"Birthday gift awarded to {user.username}: 100 points")
+            
+        except Exception as e:
+            cog_logger.error(f"Error checking birthdays: {e}")
 
     @tasks.loop(time=datetime.strptime(BIRTHDAY_CHECK_TIME, "%H:%M").time())
     async def daily_birthday_check(self):
@@ -950,12 +1207,12 @@ class EconomyCog(commands.Cog):
 
     @tasks.loop(minutes=10)
     async def monitor_restricted_role_task(self):
-        """Periodically check and remove restricted roles from users with trigger role"""
+        """Periodically re-check the restricted-role index and queue any missed removals"""
         try:
-            removed_count = await self.scan_and_remove_restricted_roles()
-            if removed_count > 0:
-                print(f"Periodic role monitoring: Removed restricted role from {removed_count} users")
-                cog_logger.info(f"Periodic monitoring removed restricted role from {removed_count} users")
+            queued_count = await self.scan_and_remove_restricted_roles()
+            if queued_count > 0:
+                print(f"Periodic role monitoring: Queued restricted role removal for {queued_count} users")
+                cog_logger.info(f"Periodic monitoring queued restricted role removal for {queued_count} users")
         except Exception as e:
             cog_logger.error(f"Error in periodic role monitoring: {e}")
 
@@ -1017,43 +1274,233 @@ class EconomyCog(commands.Cog):
             cog_logger.error(error_msg)
             return False, error_msg
 
+    def _confirm_unearned(self, user_id, candidates):
+        """Drop candidates the DB already records as earned (e.g. by a maintenance script)."""
+        if not candidates:
+            return []
+        earned_ids = set(self.db.session.execute(
+            select(self.UserAchievement.achievement_id).where(
+                self.UserAchievement.user_id == str(user_id),
+                self.UserAchievement.achievement_id.in_([a.id for a in candidates])
+            )
+        ).scalars())
+        return [a for a in candidates if a.id not in earned_ids]
+
+    def _award_reached_milestones(self, user_id, achievement_type, count):
+        """DB unit of work: grant activity milestones reached by ``count``. Returns (user, awarded)."""
+        unearned = self._confirm_unearned(
+            user_id, self.achievement_index.unearned(user_id, achievement_type, count)
+        )
+        if not unearned:
+            return None, []
+
+        self.activity_buffer.flush()
+        user = self._find_user(user_id)
+        if not user:
+            return None, []
+        awarded = [a for a in unearned if self._grant_achievement(user, a)]
+        return user, awarded
+
+    def _due_fulfillment_jobs(self):
+        """DB unit of work: return (due role assignments, purchases awaiting an admin alert)."""
+        from shared import Purchase, RoleAssignment
+
+        assignments = RoleAssignment.query.filter(
+            RoleAssignment.status == 'pending',
+            or_(RoleAssignment.next_attempt_at.is_(None), RoleAssignment.next_attempt_at <= datetime.utcnow())
+        ).order_by(RoleAssignment.id).limit(FULFILLMENT_BATCH_SIZE).all()
+
+        # Eager-load what send_purchase_notification reads; the session closes before it runs
+        notifications = Purchase.query.options(
+            joinedload(Purchase.user), joinedload(Purchase.product)
+        ).filter(Purchase.admin_notified == False).order_by(Purchase.id).limit(FULFILLMENT_BATCH_SIZE).all()
+
+        return assignments, notifications
+
+    def _mark_purchases_notified(self, purchase_ids):
+        from shared import Purchase
+
+        Purchase.query.filter(Purchase.id.in_(purchase_ids)).update(
+            {'admin_notified': True}, synchronize_session=False
+        )
+        self.db.session.commit()
+
+    def _record_role_assignment(self, assignment_id, success, message):
+        """DB unit of work: store a role assignment attempt and schedule a retry if needed."""
+        from shared import Purchase, RoleAssignment
+
+        assignment = self.db.session.get(RoleAssignment, assignment_id)
+        purchase = self.db.session.get(Purchase, assignment.purchase_id)
+        assignment.attempts = (assignment.attempts or 0) + 1
+
+        if success:
+            assignment.status = 'completed'
+            assignment.completed_at = datetime.utcnow()
+            assignment.error_message = None
+            purchase.status = 'completed'
+            purchase.delivery_info = f"Role assigned successfully: {message}"
+        elif assignment.attempts >= FULFILLMENT_MAX_ATTEMPTS:
+            assignment.status = 'failed'
+            assignment.error_message = message
+            purchase.status = 'failed'
+            purchase.delivery_info = f"Role assignment failed: {message}"
+        else:
+            backoff = FULFILLMENT_RETRY_SECONDS * 2 ** (assignment.attempts - 1)
+            assignment.error_message = message
+            assignment.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff)
+
+        self.db.session.commit()
+        return assignment.status
+
+    @tasks.loop(seconds=FULFILLMENT_POLL_SECONDS)
+    async def fulfillment_task(self):
+        """Deliver queued purchase alerts and role assignments"""
+        try:
+            assignments, notifications = await self.db_executor.run(self._due_fulfillment_jobs)
+
+            for purchase in notifications:
+                await self.send_purchase_notification(
+                    purchase.user, purchase.product, purchase.points_spent, purchase.id
+                )
+            if notifications:
+                await self.db_executor.run(self._mark_purchases_notified, [p.id for p in notifications])
+
+            for assignment in assignments:
+                success, message = await self.assign_role_to_user(
+                    assignment.user_id, assignment.role_id, assignment.purchase_id
+                )
+                status = await self.db_executor.run(
+                    self._record_role_assignment, assignment.id, success, message
+                )
+                if status == 'failed':
+                    cog_logger.error(f"Role assignment for purchase {assignment.purchase_id} failed permanently: {message}")
+                elif not success:
+                    cog_logger.warning(f"Role assignment for purchase {assignment.purchase_id} will be retried: {message}")
+
+        except Exception as e:
+            cog_logger.error(f"Error processing fulfillment queue: {e}")
+
+    @fulfillment_task.before_loop
+    async def before_fulfillment_task(self):
+        await self.bot.wait_until_ready()
+
+    def _reconcile_and_checkpoint(self):
+        """DB unit of work: compare balances with the ledger, then checkpoint them.
+
+        Returns ``(drifted, checkpointed)``. Drift is logged, not corrected.
+        The first run only records opening balances for the ledger to build on.
+        """
+        from utils.ledger import reconcile_balances, checkpoint_balances, has_checkpoints
+        drifted = 0
+        if not has_checkpoints():
+            return drifted, checkpoint_balances()
+        for user_id, expected, actual in reconcile_balances():
+            drifted += 1
+            if drifted <= 20:
+                cog_logger.warning(f"Ledger drift for user {user_id}: ledger says {expected}, balance is {actual}")
+        return drifted, checkpoint_balances()
+
+    @tasks.loop(hours=LEDGER_CHECKPOINT_HOURS)
+    async def ledger_checkpoint_task(self):
+        """Periodically reconcile balances against the points ledger and checkpoint them"""
+        try:
+            drifted, checkpointed = await self.db_executor.run(self._reconcile_and_checkpoint)
+            cog_logger.info(f"Ledger checkpoint: {checkpointed} balances snapshotted, {drifted} drifted")
+        except Exception as e:
+            cog_logger.error(f"Error checkpointing balances: {e}")
+
+    @ledger_checkpoint_task.before_loop
+    async def before_ledger_checkpoint_task(self):
+        await self.bot.wait_until_ready()
+
+    def _reconcile_leaderboard(self):
+        """DB unit of work: reload the leaderboard. Returns (totals before, totals after)."""
+        before = public_leaderboard.totals() if public_leaderboard.is_current() else None
+        public_leaderboard.invalidate()
+        return before, public_leaderboard.reload()[1]
+
+    @tasks.loop(seconds=LEADERBOARD_RECONCILE_SECONDS)
+    async def leaderboard_reconcile_task(self):
+        """Periodically reload the in-memory leaderboard to pick up writes it couldn't follow"""
+        try:
+            before, after = await self.db_executor.run(self._reconcile_leaderboard)
+            if before is not None and before != after:
+                cog_logger.warning(f"Leaderboard totals drifted: {before} -> {after}")
+        except Exception as e:
+            cog_logger.error(f"Error reconciling leaderboard: {e}")
+
+    async def check_activity_achievements(self, user_id, achievement_type, count):
+        """Award message/reaction/voice milestones crossed by a buffered counter total.
+
+        When the achievement index is warm and no unearned threshold has been
+        reached this returns without touching the database. The user row is
+        only loaded (after flushing the buffer so it exists and is current)
+        when an unearned milestone has actually been reached.
+        """
+        try:
+            if self.achievement_index.pending(user_id, achievement_type, count) == []:
+                return
+
+            user, awarded = await self.db_executor.run(
+                self._award_reached_milestones, user_id, achievement_type, count
+            )
+            for achievement in awarded:
+                await self.announce_achievement(user, achievement)
+
+        except Exception as e:
+            cog_logger.error(f"Error checking activity achievements: {e}")
+
+    def _award_earned_achievements(self, user_id, achievement_type):
+        """DB unit of work: grant every unearned achievement of a type the user qualifies for."""
+        candidates = self.achievement_index.unearned(user_id, achievement_type)
+        if not candidates:
+            return None, []
+
+        user = self._find_user(user_id)
+        if not user:
+            return None, []
+
+        awarded = []
+        for achievement in self._confirm_unearned(user.id, candidates):
+            # Check if user meets the requirement
+            if achievement_type == 'messages' and user.message_count >= achievement.requirement:
+                meets_requirement = True
+            elif achievement_type == 'reactions' and user.reaction_count >= achievement.requirement:
+                meets_requirement = True
+            elif achievement_type == 'voice' and user.voice_minutes >= achievement.requirement:
+                meets_requirement = True
+            elif achievement_type == 'daily' and user.daily_claims_count >= achievement.requirement:
+                meets_requirement = True
+            elif achievement_type == 'daily_engagement' and user.daily_engagement_count >= achievement.requirement:
+                meets_requirement = True
+            elif achievement_type == 'campus_picture' and user.campus_photos_count == 0:
+                meets_requirement = True
+            elif achievement_type == 'enrollment_deposit' and user.enrollment_deposit_received:
+                meets_requirement = True
+            elif achievement_type == 'birthday' and user.birthday is not None:
+                meets_requirement = True
+            else:
+                meets_requirement = False
+
+            if meets_requirement and self._grant_achievement(user, achievement):
+                awarded.append(achievement)
+        
+        return user, awarded
+
     async def check_achievements(self, user, achievement_type, count=None):
         """Check and award achievements based on user activity"""
-        with self.app.app_context():
-            try:
-                # Get all achievements of this type
-                achievements = self.Achievement.query.filter_by(type=achievement_type).all()
-                
-                for achievement in achievements:
-                    # Check if user already has this achievement
-                    existing = self.UserAchievement.query.filter_by(
-                        user_id=user.id,
-                        achievement_id=achievement.id
-                    ).first()
-                    
-                    if existing:
-                        continue
-                    
-                    # Check if user meets the requirement
-                    if achievement_type == 'messages' and user.message_count >= achievement.requirement:
-                        await self.award_achievement(user, achievement)
-                    elif achievement_type == 'reactions' and user.reaction_count >= achievement.requirement:
-                        await self.award_achievement(user, achievement)
-                    elif achievement_type == 'voice' and user.voice_minutes >= achievement.requirement:
-                        await self.award_achievement(user, achievement)
-                    elif achievement_type == 'daily' and user.daily_claims_count >= achievement.requirement:
-                        await self.award_achievement(user, achievement)
-                    elif achievement_type == 'daily_engagement' and user.daily_engagement_count >= achievement.requirement:
-                        await self.award_achievement(user, achievement)
-                    elif achievement_type == 'campus_picture' and user.campus_photos_count == 0:
-                        await self.award_achievement(user, achievement)
-                    elif achievement_type == 'enrollment_deposit' and user.enrollment_deposit_received:
-                        await self.award_achievement(user, achievement)
-                    elif achievement_type == 'birthday' and user.birthday is not None:
-                        await self.award_achievement(user, achievement)
-                
-            except Exception as e:
-                cog_logger.error(f"Error checking achievements: {e}")
+        try:
+            if self.achievement_index.pending(user.id, achievement_type, None) == []:
+                return
+
+            user, awarded = await self.db_executor.run(
+                self._award_earned_achievements, user.id, achievement_type
+            )
+            for achievement in awarded:
+                await self.announce_achievement(user, achievement)
+            
+        except Exception as e:
+            cog_logger.error(f"Error checking achievements: {e}")
 
     async def send_achievement_announcement(self, user, achievement):
         """Send achievement announcement"""
@@ -1321,285 +1768,356 @@ class EconomyCog(commands.Cog):
         except Exception as e:
             cog_logger.error(f"Error sending admin reaction DM: {e}")
 
-    async def award_achievement(self, user, achievement):
-        """Award an achievement to a user"""
-        with self.app.app_context():
-            try:
-                # Create user achievement record
-                user_achievement = self.UserAchievement(
-                    user_id=user.id,
-                    achievement_id=achievement.id
-                )
-                self.db.session.add(user_achievement)
-                
-                # Award points
-                user.balance += achievement.points
-                user.points += achievement.points
-                
-                self.db.session.commit()
-                
-                # Send announcement
-                await self.send_achievement_announcement(user, achievement)
-                
-                cog_logger.info(f"Achievement '{achievement.name}' awarded to {user.username}: {achievement.points} points")
-                
-            except Exception as e:
-                self.db.session.rollback()
-                cog_logger.error(f"Error awarding achievement: {e}")
+    def _grant_achievement(self, user, achievement):
+        """Record an achievement and credit its points inside a DB unit of work. Returns True on success."""
+        try:
+            # Create user achievement record
+            user_achievement = self.UserAchievement(
+                user_id=user.id,
+                achievement_id=achievement.id
+            )
+            self.db.session.add(user_achievement)
+            
+            # Award points
+            self._add_points(user, achievement.points, 'achievement', achievement.id)
+            
+            self.db.session.commit()
+            return True
+        except IntegrityError:
+            # uq_user_achievement: another award of the same achievement won the race
+            self.db.session.rollback()
+            cog_logger.info(
+                f"Achievement {user_achievement.achievement_id} already recorded for "
+                f"{user_achievement.user_id}; not awarded twice"
+            )
+            return False
+        except Exception as e:
+            self.db.session.rollback()
+            cog_logger.error(f"Error awarding achievement: {e}")
+            return False
+
+    async def announce_achievement(self, user, achievement):
+        """Announce and log an achievement that has already been granted"""
+        await self.send_achievement_announcement(user, achievement)
+        cog_logger.info(f"Achievement '{achievement.name}' awarded to {user.username}: {achievement.points} points")
 
     async def cog_load(self):
         # Discord.py automatically registers app_commands when the cog is added
         # No need to manually add commands here
         pass
 
+    def _load_achievements(self, user_id, username):
+        """DB unit of work: return (user, [(achievement, user_achievement), ...])."""
+        user = self._get_or_create_user(user_id, username, commit=True)
+
+        # Get user's achievements with their definitions in one query
+        rows = self.db.session.query(self.Achievement, self.UserAchievement).join(
+            self.UserAchievement, self.UserAchievement.achievement_id == self.Achievement.id
+        ).filter(self.UserAchievement.user_id == user.id).all()
+        return user, rows
+
     @app_commands.command(name="achievements", description="View your achievements")
     async def achievements(self, interaction: discord.Interaction):
         """View your achievements"""
-        with self.app.app_context():
-            user = self.User.query.filter_by(id=str(interaction.user.id)).first()
-            if not user:
-                user = self.User(id=str(interaction.user.id), username=interaction.user.name)
-                self.db.session.add(user)
-                self.db.session.commit()
-            
-            # Get user's achievements
-            user_achievements = self.UserAchievement.query.filter_by(user_id=user.id).all()
-            
-            embed = discord.Embed(
-                title="🏆 Your Achievements",
-                color=discord.Color.gold()
-            )
-            
-            if not user_achievements:
-                embed.description = "You haven't unlocked any achievements yet!"
-            else:
-                for ua in user_achievements:
-                    achievement = self.Achievement.query.get(ua.achievement_id)
-                    embed.add_field(
-                        name=f"🎖️ {achievement.name}",
-                        value=f"{achievement.description}\n**Points:** {achievement.points}",
-                        inline=False
-                    )
-            
-            embed.set_footer(text=f"Total Points Earned: {user.balance}")
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+        user, user_achievements = await self.db_executor.run(
+            self._load_achievements, interaction.user.id, interaction.user.name
+        )
+        
+        embed = discord.Embed(
+            title="🏆 Your Achievements",
+            color=discord.Color.gold()
+        )
+        
+        if not user_achievements:
+            embed.description = "You haven't unlocked any achievements yet!"
+        else:
+            for achievement, ua in user_achievements:
+                embed.add_field(
+                    name=f"🎖️ {achievement.name}",
+                    value=f"{achievement.description}\n**Points:** {achievement.points}",
+                    inline=False
+                )
+        
+        embed.set_footer(text=f"Total Points Earned: {user.balance}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    def _set_birthday(self, user_id, username, birthday):
+        """DB unit of work: store a birthday. Returns (user, birthday_already_set)."""
+        user = self._get_or_create_user(user_id, username)
+        
+        # Check if birthday is already set
+        birthday_already_set = user.birthday is not None
+        
+        user.birthday = birthday
+        
+        # Award points for setting birthday (only if not already set)
+        if not birthday_already_set and not user.birthday_points_received:
+            self._add_points(user, BIRTHDAY_SETUP_POINTS, 'birthday_setup')
+            user.birthday_points_received = True
+        
+        self.db.session.commit()
+        return user, birthday_already_set
 
     @app_commands.command(name="birthday", description="Set your birthday to receive points and birthday announcements")
     async def set_birthday(self, interaction: discord.Interaction, month: int, day: int):
         """Set your birthday (month and day)"""
-        with self.app.app_context():
-            # Validate input
-            if month < 1 or month > 12:
-                await interaction.response.send_message("Invalid month! Please enter a number between 1 and 12.", ephemeral=True)
-                return
-            
-            if day < 1 or day > 31:
-                await interaction.response.send_message("Invalid day! Please enter a number between 1 and 31.", ephemeral=True)
-                return
-            
-            # Validate day for specific months
-            days_in_month = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-            if day > days_in_month[month - 1]:
-                await interaction.response.send_message(f"Invalid day for month {month}! Please enter a valid day.", ephemeral=True)
-                return
+        # Validate input
+        if month < 1 or month > 12:
+            await interaction.response.send_message("Invalid month! Please enter a number between 1 and 12.", ephemeral=True)
+            return
+        
+        if day < 1 or day > 31:
+            await interaction.response.send_message("Invalid day! Please enter a number between 1 and 31.", ephemeral=True)
+            return
+        
+        # Validate day for specific months
+        days_in_month = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+        if day > days_in_month[month - 1]:
+            await interaction.response.send_message(f"Invalid day for month {month}! Please enter a valid day.", ephemeral=True)
+            return
+        
+        # Set the birthday
+        from datetime import date
+        try:
+            birthday = date(2000, month, day)  # Use 2000 as placeholder year
+            user, birthday_already_set = await self.db_executor.run(
+                self._set_birthday, interaction.user.id, interaction.user.name, birthday
+            )
             
-            # Get or create user
-            user = self.User.query.filter_by(id=str(interaction.user.id)).first()
-            if not user:
-                user = self.User(id=str(interaction.user.id), username=interaction.user.name, discord_id=str(interaction.user.id))
-                self.db.session.add(user)
-                self.db.session.flush()
+            # Check for birthday achievements
+            await self.check_achievements(user, 'birthday')
             
-            # Check if birthday is already set
-            birthday_already_set = user.birthday is not None
+            # Create response embed
+            embed = discord.Embed(
+                title="🎂 Birthday Set!",
+                description=f"Your birthday has been set to **{user.birthday.strftime('%B %d')}**!",
+                color=discord.Color.gold()
+            )
             
-            # Set the birthday
-            from datetime import date
-            try:
-                user.birthday = date(2000, month, day)  # Use 2000 as placeholder year
-                
-                # Award points for setting birthday (only if not already set)
-                if not birthday_already_set and not user.birthday_points_received:
-                    user.balance += BIRTHDAY_SETUP_POINTS
-                    user.points += BIRTHDAY_SETUP_POINTS
-                    user.birthday_points_received = True
-                
-                self.db.session.commit()
-                
-                # Check for birthday achievements
-                await self.check_achievements(user, 'birthday')
-                
-                # Create response embed
-                embed = discord.Embed(
-                    title="🎂 Birthday Set!",
-                    description=f"Your birthday has been set to **{user.birthday.strftime('%B %d')}**!",
-                    color=discord.Color.gold()
-                )
-                
-                if not birthday_already_set:
-                    embed.add_field(
-                        name="🎉 Bonus Points!",
-                        value=f"You received **{BIRTHDAY_SETUP_POINTS} points** for setting up your birthday!",
-                        inline=False
-                    )
-                    embed.add_field(
-                        name="💰 New Balance",
-                        value=f"{user.balance} pitchforks",
-                        inline=True
-                    )
-                
+            if not birthday_already_set:
                 embed.add_field(
-                    name="🎈 Birthday Announcements",
-                    value="You'll receive special birthday announcements on your special day!",
+                    name="🎉 Bonus Points!",
+                    value=f"You received **{BIRTHDAY_SETUP_POINTS} points** for setting up your birthday!",
                     inline=False
                 )
-                
-                await interaction.response.send_message(embed=embed, ephemeral=True)
-                cog_logger.info(f"Birthday set for {user.username}: {user.birthday.strftime('%B %d')}")
-                
-            except ValueError as e:
-                await interaction.response.send_message("Invalid date! Please check your month and day values.", ephemeral=True)
-            except Exception as e:
-                self.db.session.rollback()
-                await interaction.response.send_message("An error occurred while setting your birthday. Please try again.", ephemeral=True)
-                cog_logger.error(f"Error setting birthday for {interaction.user.name}: {e}")
+                embed.add_field(
+                    name="💰 New Balance",
+                    value=f"{user.balance} pitchforks",
+                    inline=True
+                )
+            
+            embed.add_field(
+                name="🎈 Birthday Announcements",
+                value="You'll receive special birthday announcements on your special day!",
+                inline=False
+            )
+            
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            cog_logger.info(f"Birthday set for {user.username}: {user.birthday.strftime('%B %d')}")
+            
+        except ValueError as e:
+            await interaction.response.send_message("Invalid date! Please check your month and day values.", ephemeral=True)
+        except Exception as e:
+            await interaction.response.send_message("An error occurred while setting your birthday. Please try again.", ephemeral=True)
+            cog_logger.error(f"Error setting birthday for {interaction.user.name}: {e}")
 
     @app_commands.command(name="balance", description="Check your current pitchfork balance")
     async def balance(self, interaction: discord.Interaction):
         """Check your current pitchfork balance"""
-        with self.app.app_context():
-            user = self.User.query.filter_by(id=str(interaction.user.id)).first()
-            if not user:
-                user = self.User(id=str(interaction.user.id), username=interaction.user.name)
-                self.db.session.add(user)
-                self.db.session.commit()
-            embed = discord.Embed(
-                title="Pitchfork Balance",
-                description=f"Your current balance: {user.balance} pitchforks",
-                color=discord.Color.green()
-            )
-            await interaction.response.send_message(embed=embed)
+        user = await self.db_executor.run(
+            self._get_or_create_user, interaction.user.id, interaction.user.name, commit=True
+        )
+        embed = discord.Embed(
+            title="Pitchfork Balance",
+            description=f"Your current balance: {user.balance} pitchforks",
+            color=discord.Color.green()
+        )
+        await interaction.response.send_message(embed=embed)
+
+    def _claim_daily(self, user_id, username):
+        """DB unit of work: claim the daily reward. Returns (status, user, time_left)."""
+        settings = self.EconomySettings.query.first()
+        if not settings or not settings.economy_enabled:
+            return 'disabled', None, None
+        
+        user = self._get_or_create_user(user_id, username, commit=True)
+        
+        # Check if user has reached maximum daily claims
+        daily_claims = getattr(user, 'daily_claims_count', 0) or 0
+        if daily_claims >= MAX_DAILY_CLAIMS:
+            return 'limit', user, None
+        
+        current_time = datetime.now()
+        if user.last_daily and (current_time - user.last_daily) < timedelta(days=1):
+            return 'cooldown', user, user.last_daily + timedelta(days=1) - current_time
+        
+        # Award daily reward and increment counter
+        self._add_points(user, 85, 'daily')
+        user.last_daily = current_time
+        if not hasattr(user, 'daily_claims_count') or user.daily_claims_count is None:
+            user.daily_claims_count = 0
+        user.daily_claims_count += 1
+        
+        self.db.session.commit()
+        return 'claimed', user, None
 
     @app_commands.command(name="daily", description="Claim your daily pitchfork reward")
     async def daily(self, interaction: discord.Interaction):
         """Claim your daily pitchforks with atomic transaction"""
-        with self.app.app_context():
-            try:
-                settings = self.EconomySettings.query.first()
-                if not settings or not settings.economy_enabled:
-                    embed = discord.Embed(
-                        title="🔒 Economy Disabled",
-                        description="The economy system is currently disabled. Contact an admin for more information.",
-                        color=discord.Color.red()
-                    )
-                    await interaction.response.send_message(embed=embed, ephemeral=True)
-                    return
-                
-                user = self.User.query.filter_by(id=str(interaction.user.id)).first()
-                if not user:
-                    user = self.User(id=str(interaction.user.id), username=interaction.user.name)
-                    self.db.session.add(user)
-                    self.db.session.commit()
-                
-                # Check if user has reached maximum daily claims
-                daily_claims = getattr(user, 'daily_claims_count', 0) or 0
-                if daily_claims >= MAX_DAILY_CLAIMS:
-                    embed = discord.Embed(
-                        title="🚫 Daily Limit Reached",
-                        description=f"You have reached the maximum of {MAX_DAILY_CLAIMS} daily claims. No more daily rewards available!",
-                        color=discord.Color.red()
-                    )
-                    await interaction.response.send_message(embed=embed, ephemeral=True)
-                    return
-                
-                current_time = datetime.now()
-                if user.last_daily and (current_time - user.last_daily) < timedelta(days=1):
-                    time_left = user.last_daily + timedelta(days=1) - current_time
-                    hours = int(time_left.total_seconds() // 3600)
-                    minutes = int((time_left.total_seconds() % 3600) // 60)
-                    embed = discord.Embed(
-                        title="⏰ Daily Reward Not Ready",
-                        description=f"You can claim your daily pitchforks again in {hours} hours and {minutes} minutes.",
-                        color=discord.Color.red()
-                    )
-                    await interaction.response.send_message(embed=embed, ephemeral=True)
-                    return
-                
-                # Award daily reward and increment counter
-                user.balance += 85
-                user.points += 85
-                user.last_daily = current_time
-                if not hasattr(user, 'daily_claims_count') or user.daily_claims_count is None:
-                    user.daily_claims_count = 0
-                user.daily_claims_count += 1
-                
-                self.db.session.commit()
-                
-                # Check for daily achievements
-                await self.check_achievements(user, 'daily')
-                
-                # Format the new embed as requested
-                remaining_claims = 90 - user.daily_claims_count
+        try:
+            status, user, time_left = await self.db_executor.run(
+                self._claim_daily, interaction.user.id, interaction.user.name
+            )
+            if status == 'disabled':
                 embed = discord.Embed(
-                    title="🎉 Daily Reward Claimed!",
-                    description=f"You have received 85 pitchforks. Your new balance is {user.balance} pitchforks.",
-                    color=discord.Color.green()
+                    title="🔒 Economy Disabled",
+                    description="The economy system is currently disabled. Contact an admin for more information.",
+                    color=discord.Color.red()
                 )
-                embed.add_field(
-                    name="Daily Claims Remaining",
-                    value=f"{remaining_claims} out of 90",
-                    inline=False
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+                return
+            
+            if status == 'limit':
+                embed = discord.Embed(
+                    title="🚫 Daily Limit Reached",
+                    description=f"You have reached the maximum of {MAX_DAILY_CLAIMS} daily claims. No more daily rewards available!",
+                    color=discord.Color.red()
                 )
-                
                 await interaction.response.send_message(embed=embed, ephemeral=True)
-                cog_logger.info(f"Daily reward claimed by {user.username}: 85 points")
-                
-            except Exception as e:
-                self.db.session.rollback()
-                await interaction.response.send_message("An error occurred while claiming your daily reward. Please try again.", ephemeral=True)
-                cog_logger.error(f"Error claiming daily reward for {interaction.user.name}: {e}")
-
-    @app_commands.command(name="leaderboard", description="Show the top 10 users by pitchfork balance")
-    async def leaderboard(self, interaction: discord.Interaction):
-        """Show the top 10 users by pitchfork balance"""
-        with self.app.app_context():
-            top_users = self.User.query.filter(self.User.is_admin == False).order_by(self.User.balance.desc()).limit(10).all()
+                return
+            
+            if status == 'cooldown':
+                hours = int(time_left.total_seconds() // 3600)
+                minutes = int((time_left.total_seconds() % 3600) // 60)
+                embed = discord.Embed(
+                    title="⏰ Daily Reward Not Ready",
+                    description=f"You can claim your daily pitchforks again in {hours} hours and {minutes} minutes.",
+                    color=discord.Color.red()
+                )
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+                return
+            
+            # Check for daily achievements
+            await self.check_achievements(user, 'daily')
             
+            # Format the new embed as requested
+            remaining_claims = 90 - user.daily_claims_count
             embed = discord.Embed(
-                title="🏆 Pitchfork Leaderboard",
-                color=discord.Color.gold()
+                title="🎉 Daily Reward Claimed!",
+                description=f"You have received 85 pitchforks. Your new balance is {user.balance} pitchforks.",
+                color=discord.Color.green()
+            )
+            embed.add_field(
+                name="Daily Claims Remaining",
+                value=f"{remaining_claims} out of 90",
+                inline=False
             )
             
-            for i, user in enumerate(top_users, 1):
-                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-                embed.add_field(
-                    name=f"{medal} {user.username}",
-                    value=f"{user.balance} pitchforks",
-                    inline=False
-                )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            cog_logger.info(f"Daily reward claimed by {user.username}: 85 points")
             
-            await interaction.response.send_message(embed=embed)
+        except Exception as e:
+            await interaction.response.send_message("An error occurred while claiming your daily reward. Please try again.", ephemeral=True)
+            cog_logger.error(f"Error claiming daily reward for {interaction.user.name}: {e}")
+
+    def _top_users(self, limit=10):
+        """DB unit of work: top non-admin users by balance (reloads the leaderboard if stale)."""
+        return public_leaderboard.top(limit)
+
+    @app_commands.command(name="leaderboard", description="Show the top 10 users by pitchfork balance")
+    async def leaderboard(self, interaction: discord.Interaction):
+        """Show the top 10 users by pitchfork balance"""
+        # Served from memory; only a stale leaderboard needs a trip to the DB workers
+        top_users = public_leaderboard.top(reload=False)
+        if top_users is None:
+            top_users = await self.db_executor.run(self._top_users)
+        
+        embed = discord.Embed(
+            title="🏆 Pitchfork Leaderboard",
+            color=discord.Color.gold()
+        )
+        
+        for i, user in enumerate(top_users, 1):
+            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
+            embed.add_field(
+                name=f"{medal} {user.username}",
+                value=f"{user.balance} pitchforks",
+                inline=False
+            )
+        
+        await interaction.response.send_message(embed=embed)
+
+    def _give_all(self, amount, run_id, progress=None):
+        """DB unit of work: credit every user not yet paid by run ``run_id``.
+
+        Returns the number of users credited; raises BulkAwardError if a chunk fails.
+        """
+        from utils.bulk_awards import bulk_award
+        return len(bulk_award(amount, 'give_all', reference_id=run_id, progress=progress))
+
+    def _interaction_progress(self, interaction, label):
+        """Return a ``progress(done, total)`` callback, safe to call from DB workers,
+        that edits the deferred response with a throttled progress line."""
+        loop = asyncio.get_running_loop()
+        last_report = 0.0
+
+        def progress(done, total):
+            nonlocal last_report
+            now = time.monotonic()
+            if done >= total or now - last_report < BULK_PROGRESS_INTERVAL:
+                return
+            last_report = now
+            asyncio.run_coroutine_threadsafe(
+                interaction.edit_original_response(content=f"{label}: {done}/{total} users processed..."),
+                loop
+            )
+        return progress
 
     @app_commands.command(name="give_all", description="Give pitchforks to all users (Admin only)")
-    async def give_all(self, interaction: discord.Interaction, amount: int):
-        """Give pitchforks to all users (Admin only)"""
+    async def give_all(self, interaction: discord.Interaction, amount: int, resume: str = None):
+        """Give pitchforks to all users (Admin only)
+
+        Each run is keyed by its interaction id; passing a failed run's id as
+        ``resume`` pays only the users that run didn't reach.
+        """
         if not self.is_staff_or_admin(interaction.user):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        with self.app.app_context():
-            users = self.User.query.all()
-            for user in users:
-                user.balance += amount
-                user.points += amount
-            self.db.session.commit()
-            
+        run_id = resume.strip() if resume else str(interaction.id)
+        await interaction.response.defer()
+        progress = self._interaction_progress(interaction, "💰 Mass giveaway")
+        try:
+            user_count = await self.db_executor.run(self._give_all, amount, run_id, progress)
+        except Exception as e:
+            # BulkAwardError carries the users whose chunks committed before the failure
+            credited = len(getattr(e, 'awarded', ()))
+            error = getattr(e, 'error', e)
+            cog_logger.error(f"give_all run {run_id} failed after {credited} users: {error}")
             embed = discord.Embed(
-                title="💰 Mass Giveaway Complete!",
-                description=f"Gave {amount} pitchforks to {len(users)} users!",
-                color=discord.Color.green()
+                title="❌ Mass Giveaway Interrupted",
+                description=(
+                    f"Gave {amount} pitchforks to {credited} users before an error: {error}\n"
+                    f"Run `/give_all amount:{amount} resume:{run_id}` to pay the remaining users."
+                ),
+                color=discord.Color.red()
             )
-            await interaction.response.send_message(embed=embed)
+            await interaction.edit_original_response(content=None, embed=embed)
+            return
+        
+        embed = discord.Embed(
+            title="💰 Mass Giveaway Complete!",
+            description=f"Gave {amount} pitchforks to {user_count} users!",
+            color=discord.Color.green()
+        )
+        await interaction.edit_original_response(content=None, embed=embed)
+
+    def _give(self, user_id, username, amount):
+        """DB unit of work: credit one user. Returns the updated user."""
+        db_user = self._get_or_create_user(user_id, username)
+        self._add_points(db_user, amount, 'give')
+        self.db.session.commit()
+        return db_user
 
     @app_commands.command(name="give", description="Give pitchforks to a specific user (Admin only)")
     async def give(self, interaction: discord.Interaction, user: discord.Member, amount: int):
@@ -1608,27 +2126,28 @@ class EconomyCog(commands.Cog):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        with self.app.app_context():
-            db_user = self.User.query.filter_by(id=str(user.id)).first()
-            if not db_user:
-                db_user = self.User(id=str(user.id), username=user.name, discord_id=str(user.id))
-                self.db.session.add(db_user)
-            
-            db_user.balance += amount
-            db_user.points += amount
-            self.db.session.commit()
-            
-            embed = discord.Embed(
-                title="💰 Giveaway Complete!",
-                description=f"Gave {amount} pitchforks to {user.mention}!",
-                color=discord.Color.green()
-            )
-            embed.add_field(
-                name="💎 New Balance",
-                value=f"{db_user.balance} pitchforks",
-                inline=True
-            )
-            await interaction.response.send_message(embed=embed)
+        db_user = await self.db_executor.run(self._give, user.id, user.name, amount)
+        
+        embed = discord.Embed(
+            title="💰 Giveaway Complete!",
+            description=f"Gave {amount} pitchforks to {user.mention}!",
+            color=discord.Color.green()
+        )
+        embed.add_field(
+            name="💎 New Balance",
+            value=f"{db_user.balance} pitchforks",
+            inline=True
+        )
+        await interaction.response.send_message(embed=embed)
+
+    def _set_economy_enabled(self, enabled):
+        """DB unit of work: toggle the economy on or off."""
+        settings = self.EconomySettings.query.first()
+        if not settings:
+            settings = self.EconomySettings(economy_enabled=False)
+            self.db.session.add(settings)
+        settings.economy_enabled = enabled
+        self.db.session.commit()
 
     @app_commands.command(name="economy", description="Enable or disable the economy system (Admin only)")
     async def economy_toggle(self, interaction: discord.Interaction, action: str):
@@ -1637,93 +2156,91 @@ class EconomyCog(commands.Cog):
             await interaction.response.send_message("You don't have permission to use this command.", ephemeral=True)
             return
         
-        with self.app.app_context():
-            settings = self.EconomySettings.query.first()
-            if not settings:
-                settings = self.EconomySettings(economy_enabled=False)
-                self.db.session.add(settings)
-            
-            if action.lower() == "enable":
-                settings.economy_enabled = True
-                embed = discord.Embed(
-                    title="✅ Economy Enabled",
-                    description="The economy system is now active!",
-                    color=discord.Color.green()
-                )
-            elif action.lower() == "disable":
-                settings.economy_enabled = False
-                embed = discord.Embed(
-                    title="❌ Economy Disabled",
-                    description="The economy system is now inactive.",
-                    color=discord.Color.red()
-                )
-            else:
-                await interaction.response.send_message("Invalid action! Use 'enable' or 'disable'.", ephemeral=True)
-                return
-            
-            self.db.session.commit()
-            await interaction.response.send_message(embed=embed)
+        if action.lower() == "enable":
+            enabled = True
+            embed = discord.Embed(
+                title="✅ Economy Enabled",
+                description="The economy system is now active!",
+                color=discord.Color.green()
+            )
+        elif action.lower() == "disable":
+            enabled = False
+            embed = discord.Embed(
+                title="❌ Economy Disabled",
+                description="The economy system is now inactive.",
+                color=discord.Color.red()
+            )
+        else:
+            await interaction.response.send_message("Invalid action! Use 'enable' or 'disable'.", ephemeral=True)
+            return
+        
+        await self.db_executor.run(self._set_economy_enabled, enabled)
+        await interaction.response.send_message(embed=embed)
+
+    def _load_limits(self, user_id, username):
+        """DB unit of work: return (user, achievements unlocked, total achievements)."""
+        # Make sure buffered message/voice counters are reflected below
+        self.activity_buffer.flush()
+        user = self._get_or_create_user(user_id, username, commit=True)
+        user_achievements = self.UserAchievement.query.filter_by(user_id=user.id).count()
+        total_achievements = self.Achievement.query.count()
+        return user, user_achievements, total_achievements
 
     @app_commands.command(name="limits", description="View your earning limits and theoretical maximum pitchforks")
     async def limits(self, interaction: discord.Interaction):
         """View your earning limits and theoretical maximum pitchforks"""
-        with self.app.app_context():
-            user = self.User.query.filter_by(id=str(interaction.user.id)).first()
-            if not user:
-                user = self.User(id=str(interaction.user.id), username=interaction.user.name)
-                self.db.session.add(user)
-                self.db.session.commit()
-            
-            embed = discord.Embed(
-                title="📊 Your Earning Limits",
-                color=discord.Color.blue()
-            )
-            
-            # Daily limits
-            daily_claims = getattr(user, 'daily_claims_count', 0) or 0
-            embed.add_field(
-                name="📅 Daily Claims",
-                value=f"{daily_claims}/{MAX_DAILY_CLAIMS} used today",
-                inline=True
-            )
-            
-            # Message count
-            embed.add_field(
-                name="💬 Messages",
-                value=f"{user.message_count} messages sent",
-                inline=True
-            )
-            
-            # Voice minutes
-            embed.add_field(
-                name="🎤 Voice Time",
-                value=f"{user.voice_minutes} minutes in voice",
-                inline=True
-            )
-            
-            # Achievements
-            user_achievements = self.UserAchievement.query.filter_by(user_id=user.id).count()
-            total_achievements = self.Achievement.query.count()
-            embed.add_field(
-                name="🏆 Achievements",
-                value=f"{user_achievements}/{total_achievements} unlocked",
-                inline=True
-            )
-            
-            # Theoretical maximum calculation
-            theoretical_max = (
-                user.balance +  # Current balance
-                (MAX_DAILY_CLAIMS - daily_claims) * 85 +  # Remaining daily claims
-                (total_achievements - user_achievements) * 50  # Remaining achievements (assuming 50 points each)
-            )
-            
-            embed.add_field(
-                name="🎯 Theoretical Maximum",
-                value=f"{theoretical_max} pitchforks possible",
-                inline=False
-            )
-            
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+        user, user_achievements, total_achievements = await self.db_executor.run(
+            self._load_limits, interaction.user.id, interaction.user.name
+        )
+        
+        embed = discord.Embed(
+            title="📊 Your Earning Limits",
+            color=discord.Color.blue()
+        )
+        
+        # Daily limits
+        daily_claims = getattr(user, 'daily_claims_count', 0) or 0
+        embed.add_field(
+            name="📅 Daily Claims",
+            value=f"{daily_claims}/{MAX_DAILY_CLAIMS} used today",
+            inline=True
+        )
+        
+        # Message count
+        embed.add_field(
+            name="💬 Messages",
+            value=f"{user.message_count} messages sent",
+            inline=True
+        )
+        
+        # Voice minutes
+        embed.add_field(
+            name="🎤 Voice Time",
+            value=f"{user.voice_minutes} minutes in voice",
+            inline=True
+        )
+        
+        # Achievements
+        embed.add_field(
+            name="🏆 Achievements",
+            value=f"{user_achievements}/{total_achievements} unlocked",
+            inline=True
+        )
+        
+        # Theoretical maximum calculation
+        theoretical_max = (
+            user.balance +  # Current balance
+            (MAX_DAILY_CLAIMS - daily_claims) * 85 +  # Remaining daily claims
+            (total_achievements - user_achievements) * 50  # Remaining achievements (assuming 50 points each)
+        )
+        
+        embed.add_field(
+            name="🎯 Theoretical Maximum",
+            value=f"{theoretical_max} pitchforks possible",
+            inline=False
+        )
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(name="help", description="Learn how to earn pitchforks in the Devil2Devil economy")
     async def help_command(self, interaction: discord.Interaction):
@@ -1789,9 +2306,15 @@ class EconomyCog(commands.Cog):
             value="Online and responsive",
             inline=True
         )
+        db_stats = self.db_executor.metrics()
         embed.add_field(
             name="💾 Database",
-            value="Connected and operational",
+            value=(
+                f"Connected and operational\n"
+                f"Workers: {db_stats['running']}/{db_stats['pool_size']} busy, "
+                f"queue {db_stats['queue_depth']} (peak {db_stats['peak_queue_depth']}), "
+                f"{db_stats['completed']} done, {db_stats['failed']} failed"
+            ),
             inline=True
         )
         embed.add_field(
@@ -1868,6 +2391,15 @@ class EconomyCog(commands.Cog):
             await interaction.followup.send(embed=error_embed, ephemeral=True)
             cog_logger.error(f"Error in remove_restricted_roles command: {e}")
 
+    def _backfill_verification_bonus(self, members):
+        """DB unit of work: award the 200 point backfill to (id, name, avatar_url) members.
+
+        Returns (created, awarded, skipped).
+        """
+        from utils.bulk_awards import backfill_bonus
+        created, awarded = backfill_bonus(members, 200, 'verification_backfill', 'verification_bonus_received')
+        return created, awarded, len(members) - awarded
+
     @app_commands.command(
         name="award_verification",
         description="Backfill verification bonus to all verified members who haven't received it (Admin only)"
@@ -1911,50 +2443,21 @@ class EconomyCog(commands.Cog):
             )
             return
 
-        awarded_count = 0
-        skipped_count = 0
-        error_count = 0
-
-        with self.app.app_context():
-            try:
-                for member in guild.members:
-                    if member.bot:
-                        continue
-                    if verified_role not in member.roles:
-                        continue
-
-                    try:
-                        user = self.User.query.filter_by(id=str(member.id)).first()
-                        if not user:
-                            user = self.User(
-                                id=str(member.id),
-                                username=member.name,
-                                discord_id=str(member.id),
-                                avatar_url=str(member.avatar.url) if member.avatar else None
-                            )
-                            self.db.session.add(user)
-                            self.db.session.flush()
-
-                        if user.verification_bonus_received:
-                            skipped_count += 1
-                            continue
-
-                        user.balance += 200
-                        user.points += 200
-                        user.verification_bonus_received = True
-                        awarded_count += 1
-
-                    except Exception as e:
-                        error_count += 1
-                        cog_logger.error(f"Error processing verification bonus for {member.name}: {e}")
+        # Snapshot the verified members on the event loop; the DB work runs on a worker
+        members = [
+            (member.id, member.name, str(member.avatar.url) if member.avatar else None)
+            for member in verified_role.members
+            if not member.bot
+        ]
 
-                self.db.session.commit()
-
-            except Exception as e:
-                self.db.session.rollback()
-                await interaction.followup.send(f"❌ Database error: {str(e)}", ephemeral=True)
-                cog_logger.error(f"Error in award_verification command: {e}")
-                return
+        try:
+            created_count, awarded_count, skipped_count = await self.db_executor.run(
+                self._backfill_verification_bonus, members
+            )
+        except Exception as e:
+            await interaction.followup.send(f"❌ Database error: {str(e)}", ephemeral=True)
+            cog_logger.error(f"Error in award_verification command: {e}")
+            return
 
         embed = discord.Embed(
             title="✅ Verification Bonus Backfill Complete",
@@ -1962,7 +2465,7 @@ class EconomyCog(commands.Cog):
         )
         embed.add_field(
             name="✅ Awarded",
-            value=f"**{awarded_count}** member(s) received **200 pitchforks**",
+            value=f"**{awarded_count}** member(s) received **200 pitchforks** ({created_count} new to the economy)",
             inline=False
         )
         embed.add_field(
@@ -1970,12 +2473,6 @@ class EconomyCog(commands.Cog):
             value=f"**{skipped_count}** member(s) already had the bonus",
             inline=False
         )
-        if error_count:
-            embed.add_field(
-                name="❌ Errors",
-                value=f"**{error_count}** member(s) could not be processed — check bot logs",
-                inline=False
-            )
         embed.add_field(name="🎯 Verified Role", value=verified_role.name, inline=True)
         embed.add_field(name="💰 Points Per User", value="200 pitchforks", inline=True)
         embed.set_footer(text="Only members missing the bonus were awarded — no double-awards.")
@@ -1983,7 +2480,7 @@ class EconomyCog(commands.Cog):
         await interaction.followup.send(embed=embed, ephemeral=True)
         cog_logger.info(
             f"award_verification run by {interaction.user.name}: "
-            f"{awarded_count} awarded, {skipped_count} skipped, {error_count} errors"
+            f"{awarded_count} awarded ({created_count} new users), {skipped_count} skipped"
         )
 
 
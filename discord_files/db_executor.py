@@ -0,0 +1,87 @@
+"""
+Thread-pool executor that runs the bot's database work off the discord.py event
+loop, each unit in its own Flask app context and scoped session.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+executor_logger = logging.getLogger('db_executor')
+
+
+class DBExecutor:
+    """Bounded pool of DB worker threads with queue-depth metrics."""
+
+    def __init__(self, app, db, max_workers=2, max_queue=100):
+        self.app = app
+        self.db = db
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='economy-db')
+        # Bounds queued + running units so a burst applies backpressure to handlers
+        self._slots = asyncio.Semaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._peak_queue_depth = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on a DB worker and return its result.
+
+        ``fn`` is responsible for committing. Anything it returns is read back
+        on the event loop after the worker's session has been closed, so it
+        should be plain data or ORM objects whose columns are already loaded.
+        """
+        async with self._slots:
+            with self._lock:
+                self._queued += 1
+                self._peak_queue_depth = max(self._peak_queue_depth, self._queued)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._pool, functools.partial(self._call, fn, args, kwargs)
+            )
+
+    def _call(self, fn, args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            with self.app.app_context():
+                # Keep committed attributes readable once the session is closed
+                self.db.session().expire_on_commit = False
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception:
+                    self.db.session.rollback()
+                    with self._lock:
+                        self._failed += 1
+                    raise
+                finally:
+                    self.db.session.remove()
+            with self._lock:
+                self._completed += 1
+            return result
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def metrics(self):
+        """Snapshot of pool size, queue depth and throughput counters."""
+        with self._lock:
+            return {
+                'pool_size': self.max_workers,
+                'max_queue': self.max_queue,
+                'queue_depth': self._queued,
+                'running': self._running,
+                'peak_queue_depth': self._peak_queue_depth,
+                'completed': self._completed,
+                'failed': self._failed,
+            }
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
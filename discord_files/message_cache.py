@@ -0,0 +1,37 @@
+"""
+Small LRU cache of fetched Discord messages, so repeated reactions on one post
+don't refetch it.
+"""
+
+from collections import OrderedDict
+
+
+class MessageCache:
+    """Bounded, least-recently-used map of message_id -> discord.Message."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._messages = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def fetch(self, channel, message_id):
+        """Return the message, fetching it from Discord only on a cache miss."""
+        message = self._messages.get(message_id)
+        if message is not None:
+            self._messages.move_to_end(message_id)
+            self.hits += 1
+            return message
+
+        self.misses += 1
+        message = await channel.fetch_message(message_id)
+        self._messages[message_id] = message
+        if len(self._messages) > self.maxsize:
+            self._messages.popitem(last=False)
+        return message
+
+    def discard(self, message_id):
+        self._messages.pop(message_id, None)
+
+    def __len__(self):
+        return len(self._messages)
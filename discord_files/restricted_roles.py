@@ -0,0 +1,100 @@
+"""
+Incremental index of members holding the Unverified and Committed roles, kept
+from member events so the violators are the intersection of two sets.
+"""
+
+from collections import OrderedDict
+
+
+class _GuildRoles:
+    __slots__ = ('unverified_role_id', 'committed_role_id', 'unverified', 'committed')
+
+    def __init__(self, unverified_role_id, committed_role_id):
+        self.unverified_role_id = unverified_role_id
+        self.committed_role_id = committed_role_id
+        self.unverified = set()
+        self.committed = set()
+
+
+class RestrictedRoleIndex:
+    """Per-guild sets of Unverified/Committed member IDs plus a removal queue."""
+
+    def __init__(self, unverified_role_name, committed_role_name, find_role):
+        self.unverified_role_name = unverified_role_name
+        self.committed_role_name = committed_role_name
+        self._find_role = find_role     # (guild, name) -> discord.Role or None
+        self._guilds = {}               # guild_id -> _GuildRoles
+        self._pending = OrderedDict()   # (guild_id, member_id) -> None, in arrival order
+
+    def rebuild(self, guild):
+        """(Re)load a guild's role holder sets. Returns the guild's violators."""
+        unverified_role = self._find_role(guild, self.unverified_role_name)
+        committed_role = self._find_role(guild, self.committed_role_name)
+        if not unverified_role or not committed_role:
+            self._guilds.pop(guild.id, None)
+            return set()
+
+        entry = _GuildRoles(unverified_role.id, committed_role.id)
+        entry.unverified = {member.id for member in unverified_role.members if not member.bot}
+        entry.committed = {member.id for member in committed_role.members if not member.bot}
+        self._guilds[guild.id] = entry
+        return entry.unverified & entry.committed
+
+    def roles_changed(self, guild):
+        """True if the tracked role IDs no longer match the guild's roles by name."""
+        entry = self._guilds.get(guild.id)
+        unverified_role = self._find_role(guild, self.unverified_role_name)
+        committed_role = self._find_role(guild, self.committed_role_name)
+        current = (
+            (unverified_role.id, committed_role.id)
+            if unverified_role and committed_role else None
+        )
+        tracked = (entry.unverified_role_id, entry.committed_role_id) if entry else None
+        return current != tracked
+
+    def update_member(self, member):
+        """Re-index one member from their current roles. Returns True if they now violate."""
+        entry = self._guilds.get(member.guild.id)
+        if entry is None or member.bot:
+            return False
+        for role_id, holders in (
+            (entry.unverified_role_id, entry.unverified),
+            (entry.committed_role_id, entry.committed),
+        ):
+            if member.get_role(role_id) is not None:
+                holders.add(member.id)
+            else:
+                holders.discard(member.id)
+        return member.id in entry.unverified and member.id in entry.committed
+
+    def remove_member(self, guild_id, member_id):
+        entry = self._guilds.get(guild_id)
+        if entry:
+            entry.unverified.discard(member_id)
+            entry.committed.discard(member_id)
+        self._pending.pop((guild_id, member_id), None)
+
+    def violators(self, guild_id):
+        entry = self._guilds.get(guild_id)
+        return entry.unverified & entry.committed if entry else set()
+
+    def committed_role_id(self, guild_id):
+        entry = self._guilds.get(guild_id)
+        return entry.committed_role_id if entry else None
+
+    def is_tracked(self, guild_id):
+        return guild_id in self._guilds
+
+    def queue_removal(self, guild_id, member_id):
+        self._pending[(guild_id, member_id)] = None
+
+    def next_batch(self, size):
+        """Pop up to ``size`` queued ``(guild_id, member_id)`` removals."""
+        batch = []
+        while self._pending and len(batch) < size:
+            batch.append(self._pending.popitem(last=False)[0])
+        return batch
+
+    @property
+    def pending(self):
+        return len(self._pending)
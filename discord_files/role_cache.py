@@ -0,0 +1,59 @@
+"""
+Per-guild role lookup index, refreshed from guild role events as immutable
+snapshots that Flask threads can read while the bot refreshes.
+"""
+
+from collections import namedtuple
+
+_GuildRoleSnapshot = namedtuple('_GuildRoleSnapshot', 'by_id by_name manageable')
+
+
+class RoleCache:
+    """Role lookups keyed by guild, then by role ID or lower-cased name."""
+
+    def __init__(self):
+        self._guilds = {}  # guild_id -> _GuildRoleSnapshot
+
+    def refresh(self, guild):
+        """Rebuild the snapshot for ``guild`` from discord.py's role cache."""
+        roles = list(guild.roles)
+        by_name = {}
+        # Keep the first role per name, matching the old linear search
+        for role in roles:
+            by_name.setdefault(role.name.lower(), role)
+
+        me = guild.me
+        manageable = tuple(
+            {
+                'id': str(role.id),
+                'name': role.name,
+                'color': f'#{role.color.value:06x}',
+                'position': role.position,
+                'mentionable': role.mentionable,
+                'hoist': role.hoist
+            }
+            for role in sorted(roles, key=lambda r: r.position, reverse=True)
+            if not role.is_default() and me is not None and me.top_role > role
+        )
+        snapshot = _GuildRoleSnapshot({role.id: role for role in roles}, by_name, manageable)
+        self._guilds[guild.id] = snapshot
+        return snapshot
+
+    def discard(self, guild_id):
+        self._guilds.pop(guild_id, None)
+
+    def _snapshot(self, guild):
+        return self._guilds.get(guild.id) or self.refresh(guild)
+
+    def get_by_name(self, guild, name):
+        return self._snapshot(guild).by_name.get(name.lower())
+
+    def get_by_id(self, guild, role_id):
+        return self._snapshot(guild).by_id.get(int(role_id))
+
+    def manageable_roles(self, guild):
+        """Roles below the bot's top role (no @everyone), highest first, as JSON-ready dicts."""
+        return list(self._snapshot(guild).manageable)
+
+
+role_cache = RoleCache()
@@ -1,15 +1,18 @@
-from shared import app, bot, db, User, EconomySettings, Achievement, UserAchievement, login_manager, Product
-from discord_files.cogs.economy import EconomyCog
+from shared import app, get_bot, db, User, EconomySettings, Achievement, UserAchievement, login_manager, Product, SchemaMeta
 from routes.auth import auth, handle_callback
 from routes.main import main
 from routes.api import api as api_bp
+from discord_files.bot_bridge import bot_bridge
+from utils.leaderboard import leaderboard
+from utils.session_principal import SessionPrincipalCache
+from utils.startup_manifest import StartupManifest, digest, has_column, has_index, metadata_digest
 import dotenv
 import os
 import time
 import asyncio
 import threading
 from flask import redirect, url_for, jsonify
-from sqlalchemy import text
+from sqlalchemy import func, select, text
 
 # Load environment variables
 dotenv.load_dotenv()
@@ -19,10 +22,22 @@ app.register_blueprint(auth, url_prefix='/auth')
 app.register_blueprint(main)
 app.register_blueprint(api_bp)
 
-# User loader for Flask-Login
+# User loader for Flask-Login: a cached slim identity; the full row loads on demand
+session_principals = SessionPrincipalCache(db, User)
+session_principals.watch()
+
+# Keep the in-memory public leaderboard in step with committed balance changes
+leaderboard.watch()
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(user_id)
+    principal = session_principals.load(user_id)
+    guild_id = os.getenv('DISCORD_GUILD_ID')
+    # Guild administrators per the bot's last snapshot count as admins before the bot persists is_admin
+    if principal is not None and not principal.is_admin and guild_id and bot_bridge.is_admin(guild_id, principal.id):
+        principal.is_admin = True
+        bot_bridge.queue_admin_promotion(principal.id)
+    return principal
 
 # Discord OAuth callback route (at root level to match Discord's redirect)
 @app.route('/callback')
@@ -47,74 +62,63 @@ token = os.getenv("DISCORD_TOKEN")
 # Global reference to the economy cog
 economy_cog = None
 
-@bot.event
-async def on_raw_reaction_add(payload):
-    """Handles reactions on ALL messages, including older ones not in cache"""
-    # Skip bot reactions
-    if payload.user_id == bot.user.id:
-        return
-    
-    # Get the channel and user objects
-    channel = bot.get_channel(payload.channel_id)
-    user = bot.get_user(payload.user_id)
-    
-    if channel and user:
-        try:
-            # Try to fetch the message (this works even for uncached messages)
-            message = await channel.fetch_message(payload.message_id)
-            print(f"🚀 RAW Reaction detected: {payload.emoji} by {user.name}")
-            print(f"   - Message ID: {payload.message_id}")
-            print(f"   - Channel: {channel.name}")
-            print(f"   - Message content: '{message.content[:50]}...'")
-            print(f"   - Message author: {message.author.name}")
-            print(f"   - Message created: {message.created_at}")
-            
-            # Pass the reaction data to the economy cog for processing
-            if economy_cog:
-                await economy_cog.process_reaction(payload)
-            else:
-                print("⚠️ Economy cog not available for reaction processing")
-                
-        except Exception as e:
-            print(f"❌ Error fetching message: {e}")
-            # Even if we can't fetch the message, we still know about the reaction
-            print(f"🚀 RAW Reaction detected: {payload.emoji} by {user.name} on message {payload.message_id}")
-            
-            # Still try to process the reaction even if we can't fetch the message
-            if economy_cog:
-                await economy_cog.process_reaction(payload)
-
-@bot.event
-async def on_message(message):
-    if not message.author.bot:  # Ignore bot messages
-        print(f"Message from {message.author.name}: {message.content}")
-    
-    # Process commands
-    await bot.process_commands(message)
-
-# Add a test command to create a message we can react to
-@bot.command(name='test')
-async def test_command(ctx):
-    """Send a test message for reactions"""
-    await ctx.send("React to this message to test the reaction handler! 👍")
-
-
-@bot.command(name='oldmsg')
-async def old_message_test(ctx):
-    """Explains how to test reactions on old messages"""
-    await ctx.send(
-        "To test reactions on old messages:\n"
-        "1. Find any old message in this server\n"
-        "2. React to it with any emoji\n"
-        "3. Check the bot console - it should detect the reaction via `on_raw_reaction_add`!\n\n"
-        "The bot will detect reactions on ANY message, regardless of when it was sent."
-    )
+def register_bot_handlers(bot):
+    """Attach the raw reaction/message listeners and test commands to ``bot``"""
+    @bot.event
+    async def on_raw_reaction_add(payload):
+        """Handles reactions on ALL messages, including older ones not in cache"""
+        # Skip bot reactions
+        if payload.user_id == bot.user.id:
+            return
+
+        # Prefer the cog registered by setup_hook so reactions share its activity buffer
+        cog = bot.get_cog('EconomyCog') or economy_cog
+
+        # The payload carries everything needed to count the reaction; the cog only
+        # fetches the message for staff award reactions
+        print(f"🚀 RAW Reaction detected: {payload.emoji} by {payload.user_id} on message {payload.message_id}")
+
+        if cog:
+            await cog.process_reaction(payload)
+        else:
+            print("⚠️ Economy cog not available for reaction processing")
+
+    @bot.event
+    async def on_message(message):
+        if not message.author.bot:  # Ignore bot messages
+            print(f"Message from {message.author.name}: {message.content}")
+
+        # Process commands
+        await bot.process_commands(message)
+
+    # Add a test command to create a message we can react to
+    @bot.command(name='test')
+    async def test_command(ctx):
+        """Send a test message for reactions"""
+        await ctx.send("React to this message to test the reaction handler! 👍")
+
+
+    @bot.command(name='oldmsg')
+    async def old_message_test(ctx):
+        """Explains how to test reactions on old messages"""
+        await ctx.send(
+            "To test reactions on old messages:\n"
+            "1. Find any old message in this server\n"
+            "2. React to it with any emoji\n"
+            "3. Check the bot console - it should detect the reaction via `on_raw_reaction_add`!\n\n"
+            "The bot will detect reactions on ANY message, regardless of when it was sent."
+        )
 
 async def setup_bot():
     """Setup the bot asynchronously"""
     global economy_cog
-    
+
+    # discord.py is only imported once the bot actually starts
+    from discord_files.cogs.economy import EconomyCog
+
     print("Starting bot setup...")
+    bot = get_bot()
+    register_bot_handlers(bot)
     
     # Set the bot token
     bot.set_token(token)
@@ -167,137 +171,134 @@ def run_bot():
         import traceback
         traceback.print_exc()
 
+# Column migrations — each is applied once, only if the column is missing
+_column_migrations = [
+    ('user', 'csd_bonus_received', 'BOOLEAN DEFAULT 0'),
+    # Existing purchases were already notified inline, so they default to notified
+    ('purchase', 'admin_notified', 'BOOLEAN DEFAULT 1'),
+    ('role_assignment', 'attempts', 'INTEGER DEFAULT 0'),
+    ('role_assignment', 'next_attempt_at', 'DATETIME'),
+]
+
+# Achievements that must exist for the economy to function correctly.
+# Keyed by (type, requirement); existing rows are never modified.
+achievements_to_seed = [
+    # Reaction milestones
+    {'name': 'Reactor I',   'description': 'Add 10 reactions to messages.',    'points': 200, 'type': 'reactions', 'requirement': 10},
+    {'name': 'Reactor II',  'description': 'Add 500 reactions to messages.',   'points': 500, 'type': 'reactions', 'requirement': 500},
+    # Voice milestones
+    {'name': 'Voice Regular', 'description': 'Spend 60 minutes in voice channels.',    'points': 200, 'type': 'voice', 'requirement': 60},
+    {'name': 'Voice Veteran', 'description': 'Spend 720 minutes in voice channels.',   'points': 500, 'type': 'voice', 'requirement': 720},
+    {'name': 'Voice Legend',  'description': 'Spend 1,440 minutes in voice channels.', 'points': 700, 'type': 'voice', 'requirement': 1440},
+    # Message milestones
+    {'name': 'First Message', 'description': 'Send your first message in any chat.',  'points': 200, 'type': 'messages', 'requirement': 1},
+    {'name': 'Chatterbox',    'description': 'Reach 100 total messages sent.',        'points': 300, 'type': 'messages', 'requirement': 100},
+    {'name': 'Active Member', 'description': 'Reach 1,000 total messages sent.',      'points': 500, 'type': 'messages', 'requirement': 1000},
+    {'name': 'Legend',        'description': 'Reach 100,000 total messages sent.',    'points': 900, 'type': 'messages', 'requirement': 100000},
+]
+
+def _create_tables(conn):
+    db.metadata.create_all(bind=conn)
+
+def _add_column(table, column, ddl):
+    def apply(conn):
+        if has_column(conn, table, column):
+            return 'already present'
+        conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+        return 'added'
+    return apply
+
+def _dedupe_user_achievements(conn):
+    # Keep the first award of each achievement so the unique index can be built
+    return conn.execute(text(
+        "DELETE FROM user_achievement WHERE id NOT IN "
+        "(SELECT MIN(id) FROM user_achievement GROUP BY user_id, achievement_id)"
+    )).rowcount
+
+# Cleanup that must run before an index can be created on existing data
+def _drop_uncoalesced_activity_index(conn):
+    # ix_user_activity summed the raw counters, which activity_score_expr() no longer matches
+    conn.execute(text('DROP INDEX IF EXISTS ix_user_activity'))
+    return 0
+
+_index_preparations = {
+    'uq_user_achievement': _dedupe_user_achievements,
+    'ix_user_activity_score': _drop_uncoalesced_activity_index,
+}
+
+def _create_index(index):
+    def apply(conn):
+        if has_index(conn, index.table.name, index.name):
+            return 'already present'
+        prepare = _index_preparations.get(index.name)
+        removed = prepare(conn) if prepare else 0
+        index.create(conn)
+        return f'created (removed {removed} duplicate row(s))' if removed else 'created'
+    return apply
+
+def _seed_achievements(conn):
+    achievements = Achievement.__table__
+    existing = set(conn.execute(select(achievements.c.type, achievements.c.requirement)).all())
+    missing = [a for a in achievements_to_seed if (a['type'], a['requirement']) not in existing]
+    if missing:
+        conn.execute(achievements.insert(), missing)
+    return f'seeded {len(missing)} new achievement(s)'
+
+def _fix_image_paths(conn):
+    # Older uploads stored '/static/uploads/<file>'; templates expect just the filename
+    products = Product.__table__
+    prefix = '/static/uploads/'
+    fixed = conn.execute(
+        products.update()
+        .where(products.c.image_url.like(f'{prefix}%'))
+        .values(image_url=func.substr(products.c.image_url, len(prefix) + 1))
+    ).rowcount
+    return f'fixed {fixed} image path(s)'
+
+def _fix_uploads_permissions():
+    uploads_dir = os.path.join('static', 'uploads')
+    if not os.path.exists(uploads_dir):
+        os.makedirs(uploads_dir, mode=0o775)
+        print(f"📁 Created uploads directory: {uploads_dir}")
+    # 775 = rwxrwxr-x: owner and group can write, others can read and list
+    os.chmod(uploads_dir, 0o775)
+    return f'{uploads_dir} is {oct(os.stat(uploads_dir).st_mode)[-3:]}'
+
+def _fix_database_permissions():
+    fixed = []
+    for db_file in ['store.db', 'instance/store.db']:
+        if os.path.exists(db_file):
+            # 664 = rw-rw-r--: owner and group can write
+            os.chmod(db_file, 0o664)
+            fixed.append(db_file)
+    if os.path.exists('instance'):
+        os.chmod('instance', 0o775)
+    return f"set 664 on {', '.join(fixed) or 'no database files yet'}"
+
+def build_startup_manifest():
+    """Startup steps, each re-run only when its digest changes."""
+    manifest = StartupManifest(SchemaMeta.__table__)
+    manifest.step('create_tables', metadata_digest(db.metadata), _create_tables)
+    for table, column, ddl in _column_migrations:
+        manifest.step(f'column:{table}.{column}', digest(ddl), _add_column(table, column, ddl))
+    # Tables created by create_all already have their indexes; this adds them to older tables
+    for table in db.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            manifest.step(
+                f'index:{index.name}',
+                digest(table.name, tuple(c.name for c in index.columns), bool(index.unique)),
+                _create_index(index)
+            )
+    manifest.step('seed_achievements', digest(achievements_to_seed), _seed_achievements)
+    manifest.step('fix_image_paths', digest(1), _fix_image_paths)
+    manifest.step('uploads_permissions', digest(0o775), _fix_uploads_permissions, transactional=False)
+    manifest.step('database_permissions', digest(0o664), _fix_database_permissions, transactional=False)
+    return manifest
+
 def run_startup_tasks():
     """Run startup tasks needed before serving requests."""
-    # Create database tables and seed required data
     with app.app_context():
-        db.create_all()
-        print("Database tables created successfully!")
-
-        # Column migrations — safe to re-run on every deploy (skips if column already exists)
-        _column_migrations = [
-            "ALTER TABLE user ADD COLUMN csd_bonus_received BOOLEAN DEFAULT 0",
-        ]
-        for _migration in _column_migrations:
-            try:
-                db.session.execute(text(_migration))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-
-        # Seed achievements that must exist for the economy to function correctly.
-        # Safe to run on every deploy — skips any that already exist.
-        achievements_to_seed = [
-            # Reaction milestones
-            {'name': 'Reactor I',   'description': 'Add 10 reactions to messages.',    'points': 200, 'type': 'reactions', 'requirement': 10},
-            {'name': 'Reactor II',  'description': 'Add 500 reactions to messages.',   'points': 500, 'type': 'reactions', 'requirement': 500},
-            # Voice milestones
-            {'name': 'Voice Regular', 'description': 'Spend 60 minutes in voice channels.',    'points': 200, 'type': 'voice', 'requirement': 60},
-            {'name': 'Voice Veteran', 'description': 'Spend 720 minutes in voice channels.',   'points': 500, 'type': 'voice', 'requirement': 720},
-            {'name': 'Voice Legend',  'description': 'Spend 1,440 minutes in voice channels.', 'points': 700, 'type': 'voice', 'requirement': 1440},
-            # Message milestones
-            {'name': 'First Message', 'description': 'Send your first message in any chat.',  'points': 200, 'type': 'messages', 'requirement': 1},
-            {'name': 'Chatterbox',    'description': 'Reach 100 total messages sent.',        'points': 300, 'type': 'messages', 'requirement': 100},
-            {'name': 'Active Member', 'description': 'Reach 1,000 total messages sent.',      'points': 500, 'type': 'messages', 'requirement': 1000},
-            {'name': 'Legend',        'description': 'Reach 100,000 total messages sent.',    'points': 900, 'type': 'messages', 'requirement': 100000},
-        ]
-
-        seeded = 0
-        for ach_data in achievements_to_seed:
-            exists = Achievement.query.filter_by(
-                type=ach_data['type'], requirement=ach_data['requirement']
-            ).first()
-            if not exists:
-                db.session.add(Achievement(**ach_data))
-                seeded += 1
-
-        if seeded:
-            db.session.commit()
-            print(f"✅ Seeded {seeded} new achievement(s).")
-        else:
-            print("✅ All achievements already present — nothing to seed.")
-    # Fix image paths before starting the application
-    print("🔧 Running image path fix...")
-    try:
-        # Find all products with image URLs that start with '/static/uploads/'
-        products_to_fix = Product.query.filter(
-            Product.image_url.like('/static/uploads/%')
-        ).all()
-        
-        if products_to_fix:
-            print(f"🔧 Found {len(products_to_fix)} products with incorrect image paths:")
-            for product in products_to_fix:
-                old_path = product.image_url
-                # Remove the '/static/uploads/' prefix, keeping just 'filename'
-                new_path = product.image_url.replace('/static/uploads/', '', 1)
-                product.image_url = new_path
-                print(f"   - Product '{product.name}': {old_path} → {new_path}")
-            
-            # Save changes
-            db.session.commit()
-            print(f"✅ Fixed {len(products_to_fix)} image paths successfully!")
-        else:
-            print("✅ No products found with incorrect image paths.")
-            
-    except Exception as e:
-        print(f"⚠️ Warning: Image path fix failed: {e}")
-        print("   Continuing with application startup...")
-    
-    # Ensure uploads directory has proper permissions
-    print("🔧 Checking uploads directory permissions...")
-    try:
-        uploads_dir = os.path.join('static', 'uploads')
-        
-        # Create directory if it doesn't exist
-        if not os.path.exists(uploads_dir):
-            os.makedirs(uploads_dir, mode=0o775)
-            print(f"📁 Created uploads directory: {uploads_dir}")
-        
-        # Set proper permissions (775 = rwxrwxr-x)
-        # This allows the owner and group to read, write, and execute
-        # and others to read and execute
-        os.chmod(uploads_dir, 0o775)
-        print(f"✅ Set uploads directory permissions to 775: {uploads_dir}")
-        
-        # Verify permissions
-        stat_info = os.stat(uploads_dir)
-        perms = oct(stat_info.st_mode)[-3:]
-        print(f"📋 Current uploads directory permissions: {perms}")
-        
-    except Exception as e:
-        print(f"⚠️ Warning: Could not set uploads directory permissions: {e}")
-        print("   This may cause file upload issues. Check directory permissions manually.")
-        print("   Continuing with application startup...")
-    
-    # Ensure database files have proper permissions
-    print("🔧 Checking database file permissions...")
-    try:
-        db_files = ['store.db', 'instance/store.db']
-        
-        for db_file in db_files:
-            if os.path.exists(db_file):
-                # Set proper permissions (664 = rw-rw-r--)
-                # This allows the owner and group to read and write
-                os.chmod(db_file, 0o664)
-                print(f"✅ Set database file permissions to 664: {db_file}")
-                
-                # Verify permissions
-                stat_info = os.stat(db_file)
-                perms = oct(stat_info.st_mode)[-3:]
-                print(f"📋 Current database file permissions: {perms} for {db_file}")
-            else:
-                print(f"📝 Database file does not exist yet: {db_file}")
-        
-        # Check instance directory permissions
-        instance_dir = 'instance'
-        if os.path.exists(instance_dir):
-            os.chmod(instance_dir, 0o775)
-            print(f"✅ Set instance directory permissions to 775: {instance_dir}")
-        
-    except Exception as e:
-        print(f"⚠️ Warning: Could not set database file permissions: {e}")
-        print("   This may cause database write issues. Check file permissions manually.")
-        print("   Continuing with application startup...")
+        build_startup_manifest().run(db.engine)
 
 def start_bot_thread():
     """Start the Discord bot in a background thread."""
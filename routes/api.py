@@ -1,8 +1,8 @@
-from flask import Blueprint, jsonify, request, url_for
+from flask import Blueprint, Response, json, jsonify, request, url_for
 from flask_login import login_required, current_user
 from shared import (
     db,
-    bot,
+    read_only,
     User,
     Product,
     ProductVariant,
@@ -12,21 +12,44 @@ from shared import (
     ProductMedia,
     Category,
 )
+from sqlalchemy.orm import selectinload
+from discord_files.bot_bridge import bot_bridge
+from utils.purchases import PurchaseError, execute_purchase
+from utils.ranking import get_user_rank
+from utils.user_stats import economy_totals, most_active, top_spenders, user_stats_for
+from utils.store_cache import store_catalog_cache
+from utils.leaderboard import leaderboard
+from utils.pagination import InvalidCursor, KeysetPaginator, TTLCache, pagination_payload
 from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
 import os
 import uuid
-import asyncio
 import subprocess
 
 api = Blueprint('api', __name__, url_prefix='/api')
 
 PURCHASES_DISABLED = os.getenv('PURCHASES_DISABLED', 'false').lower() in {'1', 'true', 'yes'}
 
+# Rebuild the cached /api/store body whenever catalog data is committed
+store_catalog_cache.watch(Product, ProductMedia, ProductVariant, Category)
+
+# Admin listings page by cursor on (balance, id) and (timestamp, id)
+admin_leaderboard_pages = KeysetPaginator(
+    'admin_leaderboard', User.balance, User.id, key=lambda user: (user.balance, user.id)
+)
+admin_purchase_pages = KeysetPaginator(
+    'admin_purchases', Purchase.timestamp, Purchase.id, key=lambda purchase: (purchase.timestamp, purchase.id)
+)
+purchase_count = TTLCache(lambda: db.session.query(db.func.count(Purchase.id)).scalar())
+
 
 def _json_response(payload, status=200):
     response = jsonify(payload)
     response.status_code = status
+    return _with_cors(response)
+
+
+def _with_cors(response):
     origin = request.headers.get('Origin')
     if origin:
         response.headers['Access-Control-Allow-Origin'] = origin
@@ -37,9 +60,30 @@ def _json_response(payload, status=200):
 
 
 @api.route('/store')
+@read_only
 def store():
-    """Store data API for React client."""
-    products = Product.query.filter(
+    """Store data API for React client.
+
+    Serves a cached catalog snapshot with a strong ETag; a matching
+    If-None-Match gets a 304 without touching the database.
+    """
+    body, etag = store_catalog_cache.get(request.host_url, _build_store_catalog)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return _with_cors(response)
+
+
+def _build_store_catalog():
+    """Serialize the active catalog, eager-loading media and variants."""
+    products = Product.query.options(
+        selectinload(Product.media),
+        selectinload(Product.variants)
+    ).filter(
         Product.is_active == True,
         (Product.stock.is_(None)) | (Product.stock > 0)
     ).all()
@@ -73,10 +117,11 @@ def store():
             'category': product.category or 'general'
         })
 
-    return _json_response({'products': store_products})
+    return json.dumps({'products': store_products})
 
 
 @api.route('/product/<int:product_id>')
+@read_only
 def product_details_api(product_id):
     """Product details API for React client."""
     product = Product.query.get_or_404(product_id)
@@ -144,21 +189,6 @@ def product_details_api(product_id):
 def current_user_api():
     """Return current user session info for the React client."""
     if current_user.is_authenticated:
-        is_admin = current_user.is_admin
-        guild_id = os.getenv('DISCORD_GUILD_ID')
-        if guild_id:
-            try:
-                guild = bot.get_guild(int(guild_id))
-                if guild:
-                    member = guild.get_member(int(current_user.id))
-                    if member and member.guild_permissions.administrator:
-                        is_admin = True
-                        if not current_user.is_admin:
-                            current_user.is_admin = True
-                            db.session.commit()
-            except Exception:
-                pass
-
         payload = {
             'authenticated': True,
             'user': {
@@ -166,7 +196,7 @@ def current_user_api():
                 'username': current_user.username,
                 'avatar_url': current_user.avatar_url,
                 'balance': current_user.balance,
-                'is_admin': is_admin
+                'is_admin': current_user.is_admin
             }
         }
     else:
@@ -855,42 +885,13 @@ def purchase_api(product_id):
             status=400
         )
 
-    purchase = Purchase(
-        user_id=current_user.id,
-        product_id=product.id,
-        variant_id=variant.id if variant else None,
-        points_spent=discounted_price,
-        timestamp=datetime.utcnow()
-    )
-
-    current_user.balance -= discounted_price
-
-    if variant:
-        if variant.stock is not None:
-            variant.stock -= 1
-    elif product.stock is not None:
-        product.stock -= 1
-
-    db.session.add(purchase)
-    db.session.commit()
-
+    # The checks above are a fast path; the conditional UPDATEs are authoritative
     try:
-        from shared import bot
-        if bot.is_ready():
-            economy_cog = bot.get_cog('EconomyCog')
-            if economy_cog:
-                future = asyncio.run_coroutine_threadsafe(
-                    economy_cog.send_purchase_notification(
-                        current_user, product, discounted_price, purchase.id
-                    ),
-                    bot.loop
-                )
-                try:
-                    future.result(timeout=2)
-                except Exception:
-                    pass
-    except Exception as e:
-        print(f"Warning: Could not send Discord purchase notification: {e}")
+        purchase = execute_purchase(current_user.id, product, discounted_price, variant=variant)
+    except PurchaseError as e:
+        return _json_response({'error': e.code, 'message': e.message}, status=409)
+
+    # The admin purchase alert is sent by the bot's fulfillment worker
 
     download_url = None
     delivery_status = 'completed'
@@ -913,56 +914,13 @@ def purchase_api(product_id):
         download_url = url_for('main.download_file', token=token, _external=True)
         message = f'Successfully purchased {product.name}! Your download is now available.'
     elif product.product_type == 'role' and product.delivery_method == 'auto_role':
-        try:
-            import json
-            from shared import bot
-            delivery_config = json.loads(product.delivery_data) if product.delivery_data else {}
-            role_id = delivery_config.get('role_id')
-            if role_id and bot.is_ready():
-                economy_cog = bot.get_cog('EconomyCog')
-                if economy_cog:
-                    future = asyncio.run_coroutine_threadsafe(
-                        economy_cog.assign_role_to_user(current_user.id, role_id, purchase.id),
-                        bot.loop
-                    )
-                    success, role_message = future.result(timeout=10)
-                    if success:
-                        purchase.delivery_info = f"Role assigned successfully: {role_message}"
-                        purchase.status = 'completed'
-                        message = f'Successfully purchased {product.name}! Your Discord role has been assigned.'
-                    else:
-                        purchase.delivery_info = f"Role assignment failed: {role_message}"
-                        purchase.status = 'failed'
-                        delivery_status = 'failed'
-                        message = f'Purchase successful, but role assignment failed: {role_message}'
-                else:
-                    purchase.delivery_info = "Economy cog not found"
-                    purchase.status = 'failed'
-                    delivery_status = 'failed'
-                    message = 'Purchase successful, but Discord bot is not properly configured.'
-            elif not bot.is_ready():
-                purchase.delivery_info = "Discord bot not ready"
-                purchase.status = 'pending'
-                delivery_status = 'pending'
-                message = 'Purchase successful! Discord bot is starting up - role will be assigned shortly.'
-            else:
-                purchase.delivery_info = "No role ID configured"
-                purchase.status = 'failed'
-                delivery_status = 'failed'
-                message = 'Purchase successful! Please contact an admin for role assignment.'
-            db.session.commit()
-        except asyncio.TimeoutError:
-            purchase.delivery_info = "Role assignment timed out"
-            purchase.status = 'failed'
-            delivery_status = 'failed'
-            db.session.commit()
-            message = 'Purchase successful, but role assignment timed out.'
-        except Exception as e:
-            purchase.delivery_info = f"Role assignment error: {str(e)}"
-            purchase.status = 'failed'
+        # execute_purchase queued a RoleAssignment; the bot assigns it in the background
+        if purchase.status == 'pending':
+            delivery_status = 'pending'
+            message = f'Successfully purchased {product.name}! Your Discord role will be assigned shortly.'
+        else:
             delivery_status = 'failed'
-            db.session.commit()
-            message = 'Purchase successful, but role assignment failed.'
+            message = 'Purchase successful! Please contact an admin for role assignment.'
 
     return _json_response({
         'ok': True,
@@ -975,15 +933,11 @@ def purchase_api(product_id):
 
 
 @api.route('/leaderboard')
+@read_only
 def leaderboard_api():
     """Leaderboard data API. Admins are excluded."""
-    users = (
-        User.query
-        .filter(User.is_admin == False)
-        .order_by(User.balance.desc())
-        .limit(10)
-        .all()
-    )
+    # Served from the in-memory leaderboard; it only queries when stale
+    users, totals = leaderboard.snapshot()
     payload = [
         {
             'id': user.id,
@@ -995,14 +949,6 @@ def leaderboard_api():
         for user in users
     ]
     # Community-wide totals (all non-admin users, not just the top 10)
-    total_users = User.query.filter(User.is_admin == False).count()
-    total_balance = db.session.query(db.func.sum(User.balance)).filter(User.is_admin == False).scalar() or 0
-    total_points = db.session.query(db.func.sum(User.points)).filter(User.is_admin == False).scalar() or 0
-    totals = {
-        'total_users': total_users,
-        'total_balance': total_balance,
-        'total_points': total_points
-    }
     return _json_response({'users': payload, 'totals': totals})
 
 
@@ -1154,39 +1100,17 @@ def admin_discord_roles_api():
         return _json_response({'error': 'forbidden'}, status=403)
 
     try:
-        from shared import bot
-        import time
-
-        max_wait = 10
-        wait_time = 0
-        while not bot.is_ready() and wait_time < max_wait:
-            time.sleep(0.5)
-            wait_time += 0.5
-
-        if not bot.is_ready():
+        if not bot_bridge.is_ready():
             return _json_response({'error': 'Discord bot is not ready. Please try again.'}, status=503)
 
         guild_id = os.getenv('DISCORD_GUILD_ID')
         if not guild_id:
             return _json_response({'error': 'DISCORD_GUILD_ID not configured.'}, status=500)
 
-        guild = bot.get_guild(int(guild_id))
-        if not guild:
+        roles = bot_bridge.roles(int(guild_id))
+        if roles is None:
             return _json_response({'error': f'Bot is not in the configured Discord server.'}, status=404)
 
-        roles = []
-        for role in guild.roles:
-            if role.name == '@everyone':
-                continue
-            if guild.me.top_role > role:
-                roles.append({
-                    'id': str(role.id),
-                    'name': role.name,
-                    'color': f'#{role.color.value:06x}',
-                    'position': role.position
-                })
-
-        roles.sort(key=lambda x: x['position'], reverse=True)
         return _json_response({'roles': roles})
 
     except Exception as e:
@@ -1546,42 +1470,28 @@ def admin_digital_templates_create_skin_api():
 @api.route('/admin/leaderboard')
 @login_required
 def admin_leaderboard_api():
-    """Admin leaderboard API with pagination."""
+    """Admin leaderboard API, paged by ``cursor`` in (balance, id) order.
+
+    The economy totals and top-ten panels are cached; pass
+    ``include_total=0`` to leave them (and the total) out.
+    """
     if not current_user.is_admin:
         return _json_response({'error': 'forbidden'}, status=403)
 
-    page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    include_total = request.args.get('include_total', '1').lower() not in {'0', 'false', 'no'}
 
-    total_users = User.query.count()
-    total_balance = db.session.query(db.func.sum(User.balance)).scalar() or 0
-    total_purchases = Purchase.query.count()
-    total_spent = db.session.query(db.func.sum(Purchase.points_spent)).scalar() or 0
-    total_achievements = UserAchievement.query.count()
-    average_balance = total_balance // total_users if total_users > 0 else 0
-
-    economy_stats = {
-        'total_users': total_users,
-        'total_balance': total_balance,
-        'total_spent': total_spent,
-        'total_purchases': total_purchases,
-        'total_achievements': total_achievements,
-        'average_balance': average_balance
-    }
-
-    pagination = User.query.order_by(User.balance.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    # One page of users, then the purchase/achievement aggregates for just those users
+    try:
+        page = admin_leaderboard_pages.page(User.query, request.args.get('cursor'), per_page)
+    except InvalidCursor as e:
+        return _json_response({'error': str(e)}, status=400)
 
     leaderboard_stats = []
-    for i, user in enumerate(pagination.items, (page - 1) * per_page + 1):
-        user_purchases = Purchase.query.filter_by(user_id=user.id).all()
-        user_achievements = UserAchievement.query.filter_by(user_id=user.id).count()
-        total_user_spent = sum(p.points_spent for p in user_purchases)
-        activity_score = (user.message_count or 0) + (user.reaction_count or 0) + (user.voice_minutes or 0)
-
+    for row in user_stats_for(page.items, (page.page - 1) * page.per_page + 1):
+        user = row['user']
         leaderboard_stats.append({
-            'rank': i,
+            'rank': row['rank'],
             'user': {
                 'id': user.id,
                 'username': user.username,
@@ -1593,72 +1503,72 @@ def admin_leaderboard_api():
                 'voice_minutes': user.voice_minutes or 0,
                 'created_at': user.created_at.isoformat() if user.created_at else None
             },
-            'total_spent': total_user_spent,
-            'purchase_count': len(user_purchases),
-            'achievement_count': user_achievements,
-            'activity_score': activity_score
+            'total_spent': row['total_spent'],
+            'purchase_count': row['purchase_count'],
+            'achievement_count': row['achievement_count'],
+            'activity_score': row['activity_score']
         })
 
-    top_spenders_query = db.session.query(
-        User,
-        db.func.sum(Purchase.points_spent).label('total_spent'),
-        db.func.count(Purchase.id).label('purchase_count')
-    ).join(Purchase).group_by(User.id).order_by(db.desc('total_spent')).limit(10).all()
-
-    top_spenders = []
-    for user, spent, count in top_spenders_query:
-        top_spenders.append({
-            'user': {'id': user.id, 'username': user.username},
-            'total_spent': spent or 0,
-            'purchase_count': count or 0
-        })
+    payload = {'leaderboard_stats': leaderboard_stats}
+    total = None
+    if include_total:
+        summary = admin_leaderboard_summary.get()
+        payload.update(summary)
+        total = summary['economy_stats']['total_users']
+    payload['pagination'] = pagination_payload(page, total)
+    return _json_response(payload)
 
-    most_active = User.query.order_by(
-        (User.message_count + User.reaction_count + User.voice_minutes).desc()
-    ).limit(10).all()
 
-    most_active_list = []
-    for user in most_active:
-        activity = (user.message_count or 0) + (user.reaction_count or 0) + (user.voice_minutes or 0)
-        most_active_list.append({
-            'user': {'id': user.id, 'username': user.username, 'message_count': user.message_count or 0},
-            'activity_score': activity
-        })
+def _admin_leaderboard_summary():
+    """The admin leaderboard's page-independent panels: economy totals, top spenders, most active."""
+    # Same helpers as the server-rendered admin leaderboard, so the two rank alike
+    return {
+        'economy_stats': economy_totals(),
+        'top_spenders': [
+            {
+                'user': {'id': row['user'].id, 'username': row['user'].username},
+                'total_spent': row['total_spent'] or 0,
+                'purchase_count': row['purchase_count'] or 0
+            }
+            for row in top_spenders()
+        ],
+        'most_active': [
+            {
+                'user': {
+                    'id': row['user'].id,
+                    'username': row['user'].username,
+                    'message_count': row['user'].message_count or 0
+                },
+                'activity_score': row['activity_score']
+            }
+            for row in most_active()
+        ]
+    }
 
-    return _json_response({
-        'economy_stats': economy_stats,
-        'leaderboard_stats': leaderboard_stats,
-        'top_spenders': top_spenders,
-        'most_active': most_active_list,
-        'pagination': {
-            'page': pagination.page,
-            'pages': pagination.pages,
-            'per_page': pagination.per_page,
-            'total': pagination.total,
-            'has_prev': pagination.has_prev,
-            'has_next': pagination.has_next,
-            'prev_num': pagination.prev_num,
-            'next_num': pagination.next_num
-        }
-    })
+
+admin_leaderboard_summary = TTLCache(_admin_leaderboard_summary)
 
 
 @api.route('/admin/purchases')
 @login_required
 def admin_purchases_api():
-    """Admin purchases API with pagination."""
+    """Admin purchases API, newest first, paged by ``cursor``.
+
+    The total is a cached count; pass ``include_total=0`` to skip it.
+    """
     if not current_user.is_admin:
         return _json_response({'error': 'forbidden'}, status=403)
 
-    page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    include_total = request.args.get('include_total', '1').lower() not in {'0', 'false', 'no'}
 
-    pagination = Purchase.query.order_by(Purchase.timestamp.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    try:
+        page = admin_purchase_pages.page(Purchase.query, request.args.get('cursor'), per_page)
+    except InvalidCursor as e:
+        return _json_response({'error': str(e)}, status=400)
 
     purchases = []
-    for purchase in pagination.items:
+    for purchase in page.items:
         user = purchase.user
         product = purchase.product
 
@@ -1675,7 +1585,7 @@ def admin_purchases_api():
         purchases.append({
             'id': purchase.id,
             'points_spent': purchase.points_spent,
-            'timestamp': purchase.timestamp.isoformat(),
+            'timestamp': purchase.timestamp.isoformat() if purchase.timestamp else None,
             'user': {
                 'id': user.id if user else None,
                 'username': user.username if user else 'Unknown',
@@ -1698,16 +1608,7 @@ def admin_purchases_api():
         'stats': {
             'total_points_on_page': total_points_on_page
         },
-        'pagination': {
-            'page': pagination.page,
-            'pages': pagination.pages,
-            'per_page': pagination.per_page,
-            'total': pagination.total,
-            'has_prev': pagination.has_prev,
-            'has_next': pagination.has_next,
-            'prev_num': pagination.prev_num,
-            'next_num': pagination.next_num
-        }
+        'pagination': pagination_payload(page, purchase_count.get() if include_total else None)
     })
 
 
@@ -1754,12 +1655,7 @@ def admin_user_detail_api(user_id):
             spending_breakdown[product_type] = 0
         spending_breakdown[product_type] += purchase.points_spent
 
-    all_users = User.query.order_by(User.balance.desc()).all()
-    user_rank = None
-    for i, u in enumerate(all_users, 1):
-        if u.id == user.id:
-            user_rank = i
-            break
+    user_rank = get_user_rank(user, 'balance')
 
     recent_purchases_data = []
     for p in recent_purchases[:10]:
@@ -1830,6 +1726,7 @@ def _slugify(name):
 
 
 @api.route('/categories')
+@read_only
 def categories_api():
     """Public endpoint to list all categories (used by store filter)."""
     categories = Category.query.order_by(Category.name).all()
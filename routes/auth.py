@@ -1,7 +1,7 @@
 from flask import Blueprint, redirect, request, url_for, session, flash
 from flask_login import login_user, logout_user, login_required, current_user
 from shared import app, db, User
-import requests
+from utils.discord_oauth import DiscordOAuthError, authorize_url, exchange_code, fetch_user
 import os
 import uuid
 from datetime import datetime
@@ -19,8 +19,7 @@ def login():
     redirect_uri = os.getenv('DISCORD_REDIRECT_URI')
     scope = 'identify'
     
-    oauth_url = f'https://discord.com/api/oauth2/authorize?client_id={client_id}&redirect_uri={redirect_uri}&response_type=code&scope={scope}'
-    return redirect(oauth_url)
+    return redirect(authorize_url(client_id, redirect_uri, scope))
 
 def handle_callback():
     """Handle Discord OAuth callback logic"""
@@ -39,40 +38,21 @@ def handle_callback():
         flash('Server configuration error. Please contact an administrator.', 'error')
         return redirect('/store')
     
-    data = {
-        'client_id': client_id,
-        'client_secret': client_secret,
-        'grant_type': 'authorization_code',
-        'code': code,
-        'redirect_uri': redirect_uri
-    }
-    
-    headers = {
-        'Content-Type': 'application/x-www-form-urlencoded'
-    }
-    
     try:
-        response = requests.post('https://discord.com/api/oauth2/token', data=data, headers=headers)
-        
-        if response.status_code != 200:
-            flash(f'Authentication failed. Discord API error: {response.status_code}', 'error')
+        try:
+            token_data = exchange_code(code, client_id, client_secret, redirect_uri)
+        except DiscordOAuthError as e:
+            flash(f'Authentication failed. Discord API error: {e.status_code}', 'error')
             return redirect(url_for('auth.login'))
-        
-        token_data = response.json()
         access_token = token_data['access_token']
         
         # Get user info from Discord
-        headers = {
-            'Authorization': f'Bearer {access_token}'
-        }
-        
-        user_response = requests.get('https://discord.com/api/users/@me', headers=headers)
-        
-        if user_response.status_code != 200:
+        try:
+            user_data = fetch_user(access_token)
+        except DiscordOAuthError:
             flash('Failed to get user information from Discord.', 'error')
             return redirect(url_for('auth.login'))
         
-        user_data = user_response.json()
         discord_id = user_data['id']
         username = user_data['username']
         avatar = user_data.get('avatar')
@@ -100,11 +80,11 @@ def handle_callback():
             )
             db.session.add(user)
             db.session.commit()
-        
-        # Update user info
-        user.username = username
-        user.avatar_url = avatar_url
-        db.session.commit()
+        elif user.username != username or user.avatar_url != avatar_url:
+            # Update user info only when Discord's copy changed
+            user.username = username
+            user.avatar_url = avatar_url
+            db.session.commit()
         
         # Log in user
         login_user(user)
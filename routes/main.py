@@ -1,12 +1,13 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, send_from_directory, abort
 from flask_login import login_required, current_user
-from shared import db, bot, User, Product, Purchase, Achievement, UserAchievement, EconomySettings, DownloadToken
+from shared import db, User, Product, Purchase, Achievement, UserAchievement, EconomySettings, DownloadToken
+from utils.purchases import PurchaseError, execute_purchase
+from utils.ranking import get_user_rank
+from utils.user_stats import economy_totals, most_active, top_spenders, user_stats_for
 from werkzeug.utils import secure_filename
 import os
 import uuid
-import json
 from datetime import datetime, timedelta
-import time
 
 main = Blueprint('main', __name__)
 
@@ -74,46 +75,14 @@ def purchase_product(product_id):
         flash('Insufficient balance to purchase this item.', 'error')
         return redirect(url_for('main.shop'))
     
-    # Create purchase with discounted price
-    purchase = Purchase(
-        user_id=current_user.id,
-        product_id=product.id,
-        points_spent=discounted_price,
-        timestamp=datetime.utcnow()
-    )
-    
-    # Update user balance with discounted price
-    current_user.balance -= discounted_price
-    
-    # Update product stock
-    if product.stock is not None:
-        product.stock -= 1
-    
-    db.session.add(purchase)
-    db.session.commit()
-    
-    # Send Discord purchase notification
+    # Debit balance and decrement stock atomically with conditional UPDATEs
     try:
-        import json
-        import asyncio
-        from shared import bot
-        
-        if bot.is_ready():
-            economy_cog = bot.get_cog('EconomyCog')
-            if economy_cog:
-                # Schedule the purchase notification in the bot's event loop
-                future = asyncio.run_coroutine_threadsafe(
-                    economy_cog.send_purchase_notification(current_user, product, discounted_price, purchase.id),
-                    bot.loop
-                )
-                # Don't wait for the notification to complete to avoid blocking the purchase
-                try:
-                    future.result(timeout=2)  # Quick timeout to avoid hanging
-                except:
-                    pass  # Notification failure shouldn't affect purchase
-    except Exception as e:
-        # Log error but don't fail the purchase
-        print(f"Warning: Could not send Discord purchase notification: {e}")
+        purchase = execute_purchase(current_user.id, product, discounted_price)
+    except PurchaseError as e:
+        flash(e.message, 'error')
+        return redirect(url_for('main.shop'))
+    
+    # The admin purchase alert is sent by the bot's fulfillment worker
 
     # Handle digital product delivery
     if product.product_type == 'minecraft_skin' and product.download_file_url:
@@ -138,61 +107,11 @@ def purchase_product(product_id):
         
         flash(f'Successfully purchased {product.name}! Your download is now available.', 'success')
     elif product.product_type == 'role' and product.delivery_method == 'auto_role':
-        # Handle role assignment directly
-        try:
-            import json
-            import asyncio
-            from shared import bot
-            
-            # Parse the role ID from delivery_data
-            delivery_config = json.loads(product.delivery_data) if product.delivery_data else {}
-            role_id = delivery_config.get('role_id')
-            
-            if role_id and bot.is_ready():
-                # Get the economy cog and call its role assignment method
-                economy_cog = bot.get_cog('EconomyCog')
-                if economy_cog:
-                    # Schedule the coroutine in the bot's event loop
-                    future = asyncio.run_coroutine_threadsafe(
-                        economy_cog.assign_role_to_user(current_user.id, role_id, purchase.id),
-                        bot.loop
-                    )
-                    # Wait for completion with timeout
-                    success, message = future.result(timeout=10)
-                    
-                    if success:
-                        purchase.delivery_info = f"Role assigned successfully: {message}"
-                        purchase.status = 'completed'
-                        flash(f'Successfully purchased {product.name}! Your Discord role has been assigned.', 'success')
-                    else:
-                        purchase.delivery_info = f"Role assignment failed: {message}"
-                        purchase.status = 'failed'
-                        flash(f'Purchase successful, but role assignment failed: {message}', 'warning')
-                else:
-                    purchase.delivery_info = "Economy cog not found"
-                    purchase.status = 'failed' 
-                    flash(f'Purchase successful, but Discord bot is not properly configured. Please contact an admin.', 'warning')
-            elif not bot.is_ready():
-                purchase.delivery_info = "Discord bot not ready"
-                purchase.status = 'pending'
-                flash(f'Successfully purchased {product.name}! Discord bot is starting up - your role will be assigned shortly.', 'info')
-            else:
-                purchase.delivery_info = "No role ID configured"
-                purchase.status = 'failed'
-                flash(f'Successfully purchased {product.name}! Please contact an admin for role assignment.', 'warning')
-                
-            db.session.commit()
-                
-        except asyncio.TimeoutError:
-            purchase.delivery_info = "Role assignment timed out"
-            purchase.status = 'failed'
-            db.session.commit()
-            flash(f'Purchase successful, but role assignment timed out. Please contact an admin.', 'warning')
-        except Exception as e:
-            purchase.delivery_info = f"Role assignment error: {str(e)}"
-            purchase.status = 'failed'
-            db.session.commit()
-            flash(f'Purchase successful, but role assignment failed. Please contact an admin.', 'error')
+        # execute_purchase queued a RoleAssignment; the bot assigns it in the background
+        if purchase.status == 'pending':
+            flash(f'Successfully purchased {product.name}! Your Discord role will be assigned shortly.', 'success')
+        else:
+            flash(f'Successfully purchased {product.name}! Please contact an admin for role assignment.', 'warning')
     else:
         flash(f'Successfully purchased {product.name}!', 'success')
     
@@ -663,18 +582,10 @@ def get_discord_roles():
         return jsonify({'error': 'Access denied'}), 403
     
     try:
-        # Import the bot from shared to access guild roles
-        from shared import bot
-        import time
+        # Last roles snapshot published by the bot; answer immediately if there isn't one yet
+        from discord_files.bot_bridge import bot_bridge
         
-        # Wait for bot to be ready (with timeout)
-        max_wait = 10  # seconds
-        wait_time = 0
-        while not bot.is_ready() and wait_time < max_wait:
-            time.sleep(0.5)
-            wait_time += 0.5
-        
-        if not bot.is_ready():
+        if not bot_bridge.is_ready():
             return jsonify({'error': 'Discord bot is not ready. Please try again in a few moments.'}), 503
         
         # Get the specific guild from DISCORD_GUILD_ID environment variable
@@ -682,31 +593,11 @@ def get_discord_roles():
         if not guild_id:
             return jsonify({'error': 'DISCORD_GUILD_ID not configured in environment'}), 500
         
-        guild = bot.get_guild(int(guild_id))
-        if not guild:
+        # Roles the bot can manage, highest first
+        roles = bot_bridge.roles(int(guild_id))
+        if roles is None:
             return jsonify({'error': f'Bot is not in the configured Discord server (ID: {guild_id})'}), 404
         
-        # Get all roles that the bot can manage
-        roles = []
-        for role in guild.roles:
-            # Skip @everyone role and roles higher than bot's top role
-            if role.name == '@everyone':
-                continue
-            
-            # Check if bot can manage this role
-            if guild.me.top_role > role:
-                roles.append({
-                    'id': str(role.id),
-                    'name': role.name,
-                    'color': f'#{role.color.value:06x}',
-                    'position': role.position,
-                    'mentionable': role.mentionable,
-                    'hoist': role.hoist
-                })
-        
-        # Sort by position (highest first)
-        roles.sort(key=lambda x: x['position'], reverse=True)
-        
         return jsonify({'roles': roles})
         
     except Exception as e:
@@ -787,75 +678,19 @@ def admin_leaderboard():
     per_page = 20  # Number of users per page
     
     # Get basic statistics
-    total_users = User.query.count()
-    total_balance = sum(user.balance or 0 for user in User.query.all())
-    total_purchases = Purchase.query.count()
-    total_spent = sum(purchase.points_spent for purchase in Purchase.query.all())
-    total_achievements = UserAchievement.query.count()
-    average_balance = total_balance // total_users if total_users > 0 else 0
-    
-    economy_stats = {
-        'total_users': total_users,
-        'total_balance': total_balance,
-        'total_spent': total_spent,
-        'total_purchases': total_purchases,
-        'total_achievements': total_achievements,
-        'average_balance': average_balance
-    }
+    economy_stats = economy_totals()
     
-    # Get paginated users
+    # Get paginated users, then the purchase/achievement aggregates for just that page
     pagination = User.query.order_by(User.balance.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
-    
-    # Get users with their stats for the current page
-    leaderboard_stats = []
-    
-    for i, user in enumerate(pagination.items, (page - 1) * per_page + 1):
-        user_purchases = Purchase.query.filter_by(user_id=user.id).all()
-        user_achievements = UserAchievement.query.filter_by(user_id=user.id).all()
-        total_spent = sum(p.points_spent for p in user_purchases)
-        activity_score = (user.message_count or 0) + (user.reaction_count or 0) + (user.voice_minutes or 0)
-        
-        leaderboard_stats.append({
-            'rank': i,
-            'user': user,
-            'total_spent': total_spent,
-            'purchase_count': len(user_purchases),
-            'achievement_count': len(user_achievements),
-            'activity_score': activity_score
-        })
-    
-    # Get top spenders (from all users, not just current page)
-    all_users = User.query.all()
-    all_leaderboard_stats = []
-    
-    for i, user in enumerate(all_users, 1):
-        user_purchases = Purchase.query.filter_by(user_id=user.id).all()
-        user_achievements = UserAchievement.query.filter_by(user_id=user.id).all()
-        total_spent = sum(p.points_spent for p in user_purchases)
-        activity_score = (user.message_count or 0) + (user.reaction_count or 0) + (user.voice_minutes or 0)
-        
-        all_leaderboard_stats.append({
-            'rank': i,
-            'user': user,
-            'total_spent': total_spent,
-            'purchase_count': len(user_purchases),
-            'achievement_count': len(user_achievements),
-            'activity_score': activity_score
-        })
-    
-    # Get top spenders
-    top_spenders = sorted(all_leaderboard_stats, key=lambda x: x['total_spent'], reverse=True)[:10]
-    
-    # Get most active users
-    most_active = sorted(all_leaderboard_stats, key=lambda x: x['activity_score'], reverse=True)[:10]
+    leaderboard_stats = user_stats_for(pagination.items, (page - 1) * per_page + 1)
     
     return render_template('admin_leaderboard.html', 
                          economy_stats=economy_stats,
                          leaderboard_stats=leaderboard_stats,
-                         top_spenders=top_spenders,
-                         most_active=most_active,
+                         top_spenders=top_spenders(),
+                         most_active=most_active(),
                          pagination=pagination)
 
 @main.route('/admin/user/<user_id>')
@@ -917,12 +752,7 @@ def admin_user_detail(user_id):
         spending_breakdown[product_type] += purchase.points_spent
     
     # Get user's rank
-    all_users = User.query.order_by(User.balance.desc()).all()
-    user_rank = None
-    for i, u in enumerate(all_users, 1):
-        if u.id == user.id:
-            user_rank = i
-            break
+    user_rank = get_user_rank(user, 'balance')
     
     return render_template('admin_user_detail.html',
                          user=user,
@@ -3,8 +3,9 @@
 Award survey points to users by ASURITE ID.
 
 Looks up each ASURITE in forklift's DB to get the Discord ID,
-then awards points in the economy DB. Safe to re-run — already-awarded
-users are skipped via the survey_bonus_received flag.
+then awards points in the economy DB (the app's DATABASE_URL) with one
+bulk award. Safe to re-run — already-awarded users are skipped via the
+survey_bonus_received flag.
 
 Usage:
     Paste ASURITEs directly (one per line, Ctrl+D when done):
@@ -25,13 +26,21 @@ Default is 0 (first column). Example for the second column:
         python scripts/award_survey_points.py --column 1
 """
 
+import os
 import sys
 import sqlite3
 import argparse
 from pathlib import Path
 
+# Allow running from project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared import app, db, User
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+from utils.bulk_awards import BULK_AWARD_CHUNK_SIZE, bulk_award, ensure_users
+
 FORKLIFT_DB = Path(__file__).resolve().parents[2] / "forklift-docker" / "data" / "forklift.db"
-ECONOMY_DB  = Path(__file__).resolve().parents[1] / "instance" / "store.db"
 DEFAULT_POINTS = 250
 
 
@@ -66,12 +75,12 @@ def read_asurites(column):
     return asurites
 
 
-def ensure_survey_column(econ_conn):
+def ensure_survey_column():
     """Add survey_bonus_received column if it doesn't exist yet."""
     try:
-        econ_conn.execute("ALTER TABLE user ADD COLUMN survey_bonus_received BOOLEAN DEFAULT 0")
-        econ_conn.commit()
-    except sqlite3.OperationalError:
+        with db.engine.begin() as conn:
+            conn.execute(text("ALTER TABLE user ADD COLUMN survey_bonus_received BOOLEAN DEFAULT 0"))
+    except OperationalError:
         pass  # Column already exists
 
 
@@ -95,45 +104,48 @@ def lookup_discord(fork_conn, asurite):
     return None, None
 
 
-def award(econ_conn, discord_id, display_name, points, dry_run):
+def survey_status(discord_ids):
+    """Return {discord_id: survey_bonus_received} for the IDs already in the economy DB."""
+    status = {}
+    for start in range(0, len(discord_ids), BULK_AWARD_CHUNK_SIZE):
+        chunk = discord_ids[start:start + BULK_AWARD_CHUNK_SIZE]
+        status.update(db.session.execute(
+            select(User.id, User.survey_bonus_received).where(User.id.in_(chunk))
+        ).all())
+    return status
+
+
+def award_all(found, points, dry_run):
     """
-    Award points to a user. Returns one of:
+    Award points to every found user in bulk. ``found`` is a list of
+    (asurite, discord_id, display_name). Returns one outcome per entry of
+    ``found``:
       'awarded'           - points successfully added
       'created_awarded'   - user didn't exist in economy DB, created and awarded
       'already_awarded'   - survey_bonus_received was already True, skipped
     """
-    row = econ_conn.execute(
-        "SELECT id, survey_bonus_received FROM user WHERE id = ?",
-        (discord_id,)
-    ).fetchone()
-
-    if row:
-        if row[1]:
-            return "already_awarded"
-        if not dry_run:
-            econ_conn.execute(
-                "UPDATE user SET balance = balance + ?, points = points + ?, "
-                "survey_bonus_received = 1 WHERE id = ?",
-                (points, points, discord_id)
-            )
-            econ_conn.commit()
-        return "awarded"
+    profiles = {discord_id: display_name for _, discord_id, display_name in found}
+    discord_ids = sorted(profiles)
+    status = survey_status(discord_ids)
+
+    if dry_run:
+        created = {discord_id for discord_id in discord_ids if discord_id not in status}
+        awarded = {discord_id for discord_id in discord_ids if not status.get(discord_id)}
     else:
-        # User hasn't interacted with the bot yet — create a minimal record
-        if not dry_run:
-            econ_conn.execute(
-                """INSERT INTO user (
-                    id, username, discord_id, points, balance, survey_bonus_received,
-                    messages_sent, messages_reacted_to, message_count, reaction_count,
-                    voice_minutes, daily_claims_count, campus_photos_count,
-                    daily_engagement_count, is_admin, enrollment_deposit_received,
-                    has_boosted, birthday_points_received, verification_bonus_received,
-                    onboarding_bonus_received, verify_corrected, onboarding_refunded
-                ) VALUES (?, ?, ?, ?, ?, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)""",
-                (discord_id, display_name, discord_id, points, points)
-            )
-            econ_conn.commit()
-        return "created_awarded"
+        # Users who haven't interacted with the bot yet get a minimal record first
+        created = set(ensure_users(
+            (discord_id, display_name, None) for discord_id, display_name in profiles.items()
+        ))
+        awarded = set(bulk_award(points, 'survey', user_ids=discord_ids, flag='survey_bonus_received'))
+
+    outcomes = []
+    for _, discord_id, _ in found:
+        if discord_id in awarded:
+            outcomes.append("created_awarded" if discord_id in created else "awarded")
+            awarded.discard(discord_id)  # a repeated Discord ID only gets paid once
+        else:
+            outcomes.append("already_awarded")
+    return outcomes
 
 
 def main():
@@ -142,9 +154,6 @@ def main():
     if not FORKLIFT_DB.exists():
         print(f"ERROR: forklift DB not found at {FORKLIFT_DB}")
         sys.exit(1)
-    if not ECONOMY_DB.exists():
-        print(f"ERROR: economy DB not found at {ECONOMY_DB}")
-        sys.exit(1)
 
     asurites = read_asurites(args.column)
     if not asurites:
@@ -155,12 +164,10 @@ def main():
           f"— {args.points} points each\n")
 
     fork_conn = sqlite3.connect(f"file:{FORKLIFT_DB}?mode=ro", uri=True)
-    econ_conn = sqlite3.connect(ECONOMY_DB)
-
-    ensure_survey_column(econ_conn)
 
     results = {"awarded": [], "created_awarded": [], "already_awarded": [], "not_found": []}
 
+    found = []
     for asurite in asurites:
         discord_id, display_name = lookup_discord(fork_conn, asurite)
 
@@ -168,8 +175,15 @@ def main():
             print(f"  NOT FOUND     {asurite}")
             results["not_found"].append(asurite)
             continue
+        found.append((asurite, str(discord_id), display_name))
+
+    fork_conn.close()
 
-        outcome = award(econ_conn, discord_id, display_name, args.points, args.dry_run)
+    with app.app_context():
+        ensure_survey_column()
+        outcomes = award_all(found, args.points, args.dry_run) if found else []
+
+    for (asurite, discord_id, display_name), outcome in zip(found, outcomes):
         label = {
             "awarded":         "AWARDED      ",
             "created_awarded": "CREATED+AWD  ",
@@ -178,9 +192,6 @@ def main():
         print(f"  {label}  {asurite:20s}  →  {display_name} ({discord_id})")
         results[outcome].append(asurite)
 
-    fork_conn.close()
-    econ_conn.close()
-
     print(f"""
 {'─' * 50}
 {'[DRY RUN — no changes written] ' if args.dry_run else ''}Summary
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check: exits non-zero if a statement issued by the API's
+GET routes or the economy cog's read paths full-scans a large table.
+
+        python scripts/check_query_plans.py
+        python scripts/check_query_plans.py --verbose   # print every plan
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Admin-edited configuration and catalog tables stay small; scanning them is fine
+SMALL_TABLES = {'economy_settings', 'achievement', 'category', 'product', 'schema_meta'}
+
+# "SCAN user" is a full table scan; "SCAN user USING [COVERING] INDEX ..." walks an index
+_TABLE_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+# Whole-table aggregates (economy totals, admin stats) have to read every row
+_UNFILTERED_AGGREGATE = re.compile(r'\b(count|sum)\(', re.IGNORECASE)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fail if a hot query does a full table scan")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--purchases", type=int, default=5000)
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args()
+
+
+def seed(db, models, args):
+    User, Product, Purchase, Achievement, UserAchievement, DownloadToken, RoleAssignment, Category = models
+    now = datetime.utcnow()
+    db.session.execute(User.__table__.insert(), [
+        {'id': str(100000 + i), 'username': f'user{i}', 'balance': (i * 37) % 5000, 'points': i,
+         'is_admin': i == 0, 'message_count': i % 300}
+        for i in range(args.users)
+    ])
+    db.session.execute(Category.__table__.insert(), [
+        {'name': f'category {i}', 'slug': f'category-{i}'} for i in range(5)
+    ])
+    db.session.execute(Product.__table__.insert(), [
+        {'name': f'product {i}', 'price': 100 + i, 'is_active': i % 4 != 0, 'category': f'category-{i % 5}'}
+        for i in range(200)
+    ])
+    db.session.execute(Purchase.__table__.insert(), [
+        {'user_id': str(100000 + i % args.users), 'product_id': 1 + i % 200, 'points_spent': 100,
+         'timestamp': now - timedelta(minutes=i), 'status': 'completed', 'admin_notified': True}
+        for i in range(args.purchases)
+    ])
+    achievement_ids = [a.id for a in Achievement.query.all()]
+    db.session.execute(UserAchievement.__table__.insert(), [
+        {'user_id': str(100000 + i), 'achievement_id': achievement_id}
+        for i in range(args.users) for achievement_id in achievement_ids[:1 + i % 3]
+    ])
+    db.session.execute(DownloadToken.__table__.insert(), [
+        {'token': f'token-{i}', 'user_id': str(100000 + i % args.users), 'purchase_id': 1 + i,
+         'file_path': 'skin.png', 'expires_at': now + timedelta(days=1)}
+        for i in range(500)
+    ])
+    db.session.execute(RoleAssignment.__table__.insert(), [
+        {'user_id': str(100000 + i), 'role_id': '1', 'purchase_id': 1 + i, 'status': 'completed'}
+        for i in range(500)
+    ])
+    db.session.commit()
+
+
+def api_paths(app):
+    """GET routes of the API blueprint whose only arguments are integer ids."""
+    for rule in app.url_map.iter_rules():
+        if not rule.endpoint.startswith('api.') or 'GET' not in rule.methods:
+            continue
+        converters = {name: type(conv).__name__ for name, conv in rule._converters.items()}
+        if any(kind != 'IntegerConverter' for kind in converters.values()):
+            continue
+        yield rule.endpoint, rule.build({name: 1 for name in converters}, append_unknown=False)[1]
+
+
+def cog_calls(cog, user_id):
+    return [
+        ('cog._find_user', lambda: cog._find_user(user_id)),
+        ('cog._top_users', lambda: cog._top_users()),
+        ('cog._load_achievements', lambda: cog._load_achievements(user_id, 'user1')),
+        ('cog._confirm_unearned', lambda: cog._confirm_unearned(user_id, cog.Achievement.query.all())),
+        ('cog._load_limits', lambda: cog._load_limits(user_id, 'user1')),
+        ('cog._due_fulfillment_jobs', lambda: cog._due_fulfillment_jobs()),
+        ('cog._give', lambda: cog._give(user_id, 'user1', 5)),
+    ]
+
+
+def table_scans(plan_rows, statement):
+    scans = []
+    for row in plan_rows:
+        match = _TABLE_SCAN.match(row[-1])
+        if not match or match.group(1) in SMALL_TABLES:
+            continue
+        if ' WHERE ' not in statement.upper() and 'ORDER BY' not in statement.upper() \
+                and _UNFILTERED_AGGREGATE.search(statement):
+            continue
+        scans.append(match.group(1))
+    return scans
+
+
+def main():
+    args = parse_args()
+    scratch = tempfile.mkdtemp(prefix='query-plans-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch, 'plans.db')}"
+    os.environ['DB_READ_ROUTING'] = '0'
+    sys.path.insert(0, ROOT)
+
+    from sqlalchemy import event
+    import main as app_main
+    from shared import (
+        app, db, get_bot, User, Product, Purchase, Achievement, UserAchievement, DownloadToken,
+        RoleAssignment, Category, EconomySettings
+    )
+    from discord_files.cogs.economy import EconomyCog
+
+    app_main.run_startup_tasks()
+    statements = OrderedDict()  # (source, sql) -> parameters
+    source = {'name': None}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if source['name'] and not executemany and verb in ('SELECT', 'UPDATE', 'DELETE', 'WITH'):
+            statements.setdefault((source['name'], statement), parameters)
+
+    with app.app_context():
+        seed(db, (User, Product, Purchase, Achievement, UserAchievement, DownloadToken, RoleAssignment, Category), args)
+        event.listen(db.engine, 'before_cursor_execute', capture)
+
+    client = app.test_client()
+    for role, user_id in (('admin', '100000'), ('user', '100001')):
+        with client.session_transaction() as session:
+            session['_user_id'] = user_id
+            session['_fresh'] = True
+        for endpoint, path in api_paths(app):
+            source['name'] = f'{endpoint} ({role})'
+            client.get(path)
+
+    cog = EconomyCog(get_bot(), app, db, User, EconomySettings, Achievement, UserAchievement)
+    for name, call in cog_calls(cog, '100001'):
+        source['name'] = name
+        with app.app_context():
+            try:
+                call()
+            finally:
+                db.session.remove()
+    source['name'] = None
+
+    failures = []
+    with app.app_context(), db.engine.connect() as conn:
+        for (name, statement), parameters in statements.items():
+            plan = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+            scans = table_scans(plan, statement)
+            if scans:
+                failures.append((name, statement, scans, plan))
+            if args.verbose or scans:
+                print(f"{'SCAN' if scans else 'ok  '} {name}: {' '.join(statement.split())[:160]}")
+                for row in plan:
+                    print(f"        {row[-1]}")
+
+    print(f"\nChecked {len(statements)} statement(s) from {len({name for name, _ in statements})} source(s)")
+    if failures:
+        print(f"{len(failures)} statement(s) do a full table scan:")
+        for name, _, scans, _ in failures:
+            print(f"  - {name}: {', '.join(scans)}")
+        sys.exit(1)
+    print("No full table scans on large tables.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Discord OAuth2 endpoints the login flow uses.
+
+Run it, then start the app with DISCORD_API_BASE pointing at it:
+        python scripts/discord_oauth_stub.py --port 8765
+        DISCORD_API_BASE=http://127.0.0.1:8765 python main.py
+
+Failure modes for exercising timeouts and retries:
+        --delay 15          sleep before every response (read timeout)
+        --fail-profile 2    answer the first 2 /users/@me calls with 503
+        --token-status 401  reject the token exchange
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stub Discord OAuth2 API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--user-id", default="100000000000000001")
+    parser.add_argument("--username", default="stub-user")
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="Seconds to sleep before each response")
+    parser.add_argument("--fail-profile", type=int, default=0,
+                        help="Answer this many /users/@me calls with 503 first")
+    parser.add_argument("--token-status", type=int, default=200,
+                        help="Status for /oauth2/token (default: 200)")
+    return parser.parse_args()
+
+
+def make_handler(args):
+    state = {'profile_failures': args.fail_profile, 'connections': set()}
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, like Discord
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _track_connection(self):
+            with lock:
+                state['connections'].add(self.client_address)
+                count = len(state['connections'])
+            self.log_message("connections seen: %d", count)
+
+        def do_GET(self):
+            self._track_connection()
+            url = urlparse(self.path)
+            time.sleep(args.delay)
+            if url.path.endswith('/oauth2/authorize'):
+                query = parse_qs(url.query)
+                redirect_uri = query.get('redirect_uri', [''])[0]
+                self.send_response(302)
+                self.send_header('Location', f"{redirect_uri}?{urlencode({'code': 'stub-code'})}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            elif url.path.endswith('/users/@me'):
+                with lock:
+                    fail = state['profile_failures'] > 0
+                    if fail:
+                        state['profile_failures'] -= 1
+                if fail:
+                    self._send_json(503, {'message': 'stub outage'})
+                else:
+                    self._send_json(200, {'id': args.user_id, 'username': args.username, 'avatar': None})
+            else:
+                self._send_json(404, {'message': 'not found'})
+
+        def do_POST(self):
+            self._track_connection()
+            length = int(self.headers.get('Content-Length', 0))
+            self.rfile.read(length)
+            time.sleep(args.delay)
+            if urlparse(self.path).path.endswith('/oauth2/token'):
+                if args.token_status != 200:
+                    self._send_json(args.token_status, {'error': 'invalid_grant'})
+                else:
+                    self._send_json(200, {'access_token': 'stub-token', 'token_type': 'Bearer'})
+            else:
+                self._send_json(404, {'message': 'not found'})
+
+    return StubHandler
+
+
+def main():
+    args = parse_args()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(args))
+    print(f"Discord OAuth stub listening on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
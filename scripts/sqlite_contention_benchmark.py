@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Contention benchmark: bot-style writers against API-style readers on a scratch
+SQLite database. SQLITE_* settings come from the environment or these flags:
+
+        python scripts/sqlite_contention_benchmark.py
+        python scripts/sqlite_contention_benchmark.py --journal-mode DELETE \\
+            --synchronous FULL --busy-timeout 0 --mmap-size 0 --cache-size -2000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="SQLite reader/writer contention benchmark")
+    parser.add_argument("--writers", type=int, default=2, help="Writer threads (bot DB workers)")
+    parser.add_argument("--readers", type=int, default=4, help="Reader threads (gunicorn threads)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--journal-mode")
+    parser.add_argument("--synchronous")
+    parser.add_argument("--busy-timeout", help="Milliseconds")
+    parser.add_argument("--mmap-size")
+    parser.add_argument("--cache-size")
+    return parser.parse_args()
+
+
+def configure_env(args, db_path):
+    overrides = {
+        'SQLITE_JOURNAL_MODE': args.journal_mode,
+        'SQLITE_SYNCHRONOUS': args.synchronous,
+        'SQLITE_BUSY_TIMEOUT_MS': args.busy_timeout,
+        'SQLITE_MMAP_SIZE': args.mmap_size,
+        'SQLITE_CACHE_SIZE': args.cache_size,
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            os.environ[key] = value
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    args = parse_args()
+    scratch = tempfile.mkdtemp(prefix='sqlite-bench-')
+    configure_env(args, os.path.join(scratch, 'bench.db'))
+
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import text
+    from shared import app, db, User, Product
+    from utils.ledger import record_entry
+    from utils.sqlite_tuning import effective_pragmas
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(User.__table__.insert(), [
+            {'id': str(100000 + i), 'username': f'user{i}', 'balance': random.randint(0, 5000), 'points': 0}
+            for i in range(args.users)
+        ])
+        db.session.execute(Product.__table__.insert(), [
+            {'name': f'product {i}', 'price': 100 + i, 'is_active': True}
+            for i in range(args.products)
+        ])
+        db.session.commit()
+        with db.engine.connect() as conn:
+            print("pragmas:", effective_pragmas(conn))
+
+    user_ids = [str(100000 + i) for i in range(args.users)]
+    stop = threading.Event()
+    lock = threading.Lock()
+    results = {'read': [], 'write': [], 'read_errors': 0, 'write_errors': 0, 'locked': 0}
+
+    def record(kind, elapsed=None, error=None):
+        with lock:
+            if error is None:
+                results[kind].append(elapsed)
+            else:
+                results[f'{kind}_errors'] += 1
+                if 'locked' in str(error):
+                    results['locked'] += 1
+
+    def writer():
+        while not stop.is_set():
+            user_id = random.choice(user_ids)
+            started = time.perf_counter()
+            with app.app_context():
+                try:
+                    db.session.execute(
+                        text("UPDATE user SET balance = balance + 5, points = points + 5, "
+                             "message_count = COALESCE(message_count, 0) + 1 WHERE id = :id"),
+                        {'id': user_id}
+                    )
+                    record_entry(user_id, 5, 'message')
+                    db.session.commit()
+                    record('write', time.perf_counter() - started)
+                except Exception as e:
+                    db.session.rollback()
+                    record('write', error=e)
+                finally:
+                    db.session.remove()
+
+    def reader():
+        while not stop.is_set():
+            started = time.perf_counter()
+            with app.app_context():
+                try:
+                    db.session.execute(
+                        text("SELECT id, username, balance FROM user ORDER BY balance DESC LIMIT 10")
+                    ).all()
+                    db.session.execute(
+                        text("SELECT id, name, price FROM product WHERE is_active = 1 ORDER BY id")
+                    ).all()
+                    record('read', time.perf_counter() - started)
+                except Exception as e:
+                    record('read', error=e)
+                finally:
+                    db.session.remove()
+
+    threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    for kind in ('write', 'read'):
+        samples = [s * 1000 for s in results[kind]]
+        print(f"{kind:>5}: {len(samples) / args.seconds:8.1f}/s  "
+              f"p50 {statistics.median(samples) if samples else 0:7.2f} ms  "
+              f"p95 {percentile(samples, 95):7.2f} ms  p99 {percentile(samples, 99):7.2f} ms  "
+              f"errors {results[f'{kind}_errors']}")
+    print(f"'database is locked' errors: {results['locked']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Measure how long it takes to import the app's entry modules.
+
+Each module is imported in a fresh interpreter, several times, and the
+median wall time is reported together with peak RSS and whether discord.py
+ended up loaded. Run it before and after a change to compare:
+        python scripts/startup_benchmark.py
+        python scripts/startup_benchmark.py --runs 10 shared main
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter
+_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    'seconds': elapsed,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'discord_loaded': 'discord' in sys.modules,
+}}))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark app import/startup time")
+    parser.add_argument("modules", nargs="*", default=["shared", "wsgi"],
+                        help="Modules to import (default: shared wsgi)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    return parser.parse_args()
+
+
+def measure(module, runs):
+    env = dict(os.environ)
+    # Web-only worker: import the app without starting the Discord bot
+    env.setdefault('RUN_DISCORD_BOT', '0')
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(module=module)],
+            cwd=ROOT, env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise SystemExit(f"import {module} failed:\n{result.stderr}")
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    args = parse_args()
+    print(f"{'module':<12} {'median ms':>10} {'min ms':>8} {'max RSS MB':>11}  discord.py loaded")
+    for module in args.modules:
+        samples = measure(module, args.runs)
+        times = [sample['seconds'] * 1000 for sample in samples]
+        rss = max(sample['max_rss_kb'] for sample in samples) / 1024
+        print(f"{module:<12} {statistics.median(times):>10.1f} {min(times):>8.1f} {rss:>11.1f}  "
+              f"{samples[0]['discord_loaded']}")
+
+
+if __name__ == "__main__":
+    main()
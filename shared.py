@@ -1,11 +1,18 @@
-from flask import Flask
-from discord_files.bot import EconomyBot
+from flask import Flask, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_login import LoginManager, UserMixin
 from flask_migrate import Migrate
 from werkzeug.utils import secure_filename
 from datetime import datetime
+import functools
 import os
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+from utils.sqlite_tuning import enable_sqlite_pragmas
 
 app = Flask(__name__)
 
@@ -14,9 +21,97 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///store.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-bot = EconomyBot()
+# Replica for read-only views; SQLite databases default to a mode=ro connection to the same file
+DATABASE_READ_URL = os.getenv('DATABASE_READ_URL')
+DB_READ_ROUTING = os.getenv('DB_READ_ROUTING', '1') == '1'
+
+_bot = None
+_bot_lock = threading.Lock()
+
+
+def get_bot():
+    """Return the Discord bot, creating it on first use.
+
+    discord.py is imported here rather than at module import, so web-only
+    workers, Flask CLI commands and maintenance scripts never load it.
+    """
+    global _bot
+    if _bot is None:
+        with _bot_lock:
+            if _bot is None:
+                from discord_files.bot import EconomyBot
+                _bot = EconomyBot()
+    return _bot
+
+
+def __getattr__(name):
+    # Keeps ``from shared import bot`` working for code that needs the bot
+    if name == 'bot':
+        return get_bot()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# WAL, busy timeout and cache pragmas on every SQLite connection (see utils/sqlite_tuning.py)
+enable_sqlite_pragmas()
+
+_read_engine = None
+_read_engine_lock = threading.Lock()
+
+
+def _read_engine_url(primary_url):
+    if DATABASE_READ_URL:
+        return make_url(DATABASE_READ_URL)
+    path = primary_url.database
+    if primary_url.get_backend_name() != 'sqlite' or not path or path == ':memory:':
+        return None  # no replica configured: reads stay on the primary
+    if not os.path.exists(path):
+        return None  # mode=ro can't create the file; retried once startup has
+    return primary_url.set(database=f'file:{path}', query={'mode': 'ro', 'uri': 'true'})
+
 
-db = SQLAlchemy(app)
+def get_read_engine():
+    """Engine for read-only views, or None when reads should use the primary."""
+    global _read_engine
+    if _read_engine is None and DB_READ_ROUTING:
+        with _read_engine_lock:
+            if _read_engine is None:
+                url = _read_engine_url(db.engine.url)
+                if url is not None:
+                    _read_engine = create_engine(url)
+    return _read_engine
+
+
+class RoutingSession(Session):
+    """Sends queries made inside ``@read_only`` views to the read-only engine.
+
+    Flushes and DML always go to the primary, which stays the only engine
+    that writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and has_request_context()
+            and g.get('db_read_only')
+            and not getattr(clause, 'is_dml', False)
+        ):
+            read_engine = get_read_engine()
+            if read_engine is not None:
+                return read_engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(view):
+    """Run a view's queries on the read-only engine (see RoutingSession)."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
 migrate = Migrate(app, db)
 login_manager = LoginManager(app)
 login_manager.login_view = 'auth.login'
@@ -58,9 +153,22 @@ class User(UserMixin, db.Model):
     
     achievements = db.relationship('UserAchievement', backref='user', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_user_balance', 'balance'),
+        db.Index('ix_user_admin_balance', 'is_admin', 'balance'),  # public leaderboard
+    )
+
     def __repr__(self):
         return f'<User {self.username}>'
 
+# The admin leaderboards' "most active" ranking orders by this sum (utils/user_stats.activity_score_expr)
+db.Index(
+    'ix_user_activity_score',
+    db.func.coalesce(User.message_count, db.literal_column('0'))
+    + db.func.coalesce(User.reaction_count, db.literal_column('0'))
+    + db.func.coalesce(User.voice_minutes, db.literal_column('0'))
+)
+
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -82,6 +190,10 @@ class Product(db.Model):
     # Minecraft skin specific fields
     preview_image_url = db.Column(db.String(200))  # Preview image for minecraft skins
     download_file_url = db.Column(db.String(200))  # Actual downloadable file for minecraft skins
+
+    __table_args__ = (
+        db.Index('ix_product_active_category', 'is_active', 'category'),
+    )
     
     media = db.relationship(
         'ProductMedia',
@@ -142,6 +254,10 @@ class ProductMedia(db.Model):
     sort_order = db.Column(db.Integer, default=0)
     is_primary = db.Column(db.Boolean, default=False)
 
+    __table_args__ = (
+        db.Index('ix_product_media_product', 'product_id', 'sort_order'),
+    )
+
     def __repr__(self):
         return f'<ProductMedia {self.product_id} {self.media_type}>'
 
@@ -152,6 +268,10 @@ class ProductVariant(db.Model):
     stock = db.Column(db.Integer, nullable=True)  # None = unlimited, 0 = out of stock
     sort_order = db.Column(db.Integer, default=0)
 
+    __table_args__ = (
+        db.Index('ix_product_variant_product', 'product_id', 'sort_order'),
+    )
+
     def __repr__(self):
         return f'<ProductVariant {self.product_id} {self.name}>'
 
@@ -164,11 +284,19 @@ class Purchase(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     delivery_info = db.Column(db.Text)  # Store delivery details (codes, download links, etc.)
     status = db.Column(db.String(20), default='completed')  # completed, pending_delivery, failed
+    admin_notified = db.Column(db.Boolean, default=False)  # Set once the bot has DM'd the purchase alert
 
     user = db.relationship('User', backref=db.backref('purchases', lazy=True))
     product = db.relationship('Product', backref=db.backref('purchases', lazy=True))
     variant = db.relationship('ProductVariant')
 
+    __table_args__ = (
+        db.Index('ix_purchase_user_timestamp', 'user_id', 'timestamp'),
+        db.Index('ix_purchase_timestamp', 'timestamp'),
+        db.Index('ix_purchase_product', 'product_id'),
+        db.Index('ix_purchase_admin_notified', 'admin_notified'),
+    )
+
     def __repr__(self):
         return f'<Purchase {self.id}>'
 
@@ -181,6 +309,10 @@ class Achievement(db.Model):
     requirement = db.Column(db.Integer, nullable=False)
     users = db.relationship('UserAchievement', backref='achievement', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_achievement_type_requirement', 'type', 'requirement'),
+    )
+
     def __repr__(self):
         return f'<Achievement {self.name}>'
 
@@ -190,9 +322,43 @@ class UserAchievement(db.Model):
     achievement_id = db.Column(db.Integer, db.ForeignKey('achievement.id'), nullable=False)
     achieved_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # One row per user and achievement; also serves per-user lookups
+        db.Index('uq_user_achievement', 'user_id', 'achievement_id', unique=True),
+        db.Index('ix_user_achievement_achievement', 'achievement_id'),
+    )
+
     def __repr__(self):
         return f'<UserAchievement {self.user_id} - {self.achievement_id}>'
 
+class PointsLedger(db.Model):
+    """Insert-only record of every balance change; User.balance is its running total"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(20), db.ForeignKey('user.id'), nullable=False)
+    amount = db.Column(db.Integer, nullable=False)  # Positive = earned, negative = spent/clawed back
+    source = db.Column(db.String(50), nullable=False)  # daily, give, purchase, achievement, ...
+    reference_id = db.Column(db.String(64))  # Purchase/achievement/admin id the entry relates to
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_points_ledger_user_created', 'user_id', 'created_at'),
+        db.Index('ix_points_ledger_source_reference', 'source', 'reference_id', 'user_id'),
+    )
+
+    def __repr__(self):
+        return f'<PointsLedger {self.user_id} {self.amount:+d} {self.source}>'
+
+class BalanceCheckpoint(db.Model):
+    """Periodic snapshot of a user's balance as of ledger entry ``ledger_id``"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(20), db.ForeignKey('user.id'), nullable=False, index=True)
+    balance = db.Column(db.Integer, nullable=False)
+    ledger_id = db.Column(db.Integer, nullable=False, default=0)  # Last ledger entry included
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<BalanceCheckpoint {self.user_id} {self.balance}@{self.ledger_id}>'
+
 class EconomySettings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     economy_enabled = db.Column(db.Boolean, default=False)
@@ -236,6 +402,13 @@ class RoleAssignment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
     error_message = db.Column(db.Text)
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime)  # Retry backoff; None = due now
+
+    __table_args__ = (
+        db.Index('ix_role_assignment_status_next_attempt', 'status', 'next_attempt_at'),
+        db.Index('ix_role_assignment_purchase', 'purchase_id'),
+    )
     
     user = db.relationship('User', backref='role_assignments')
     purchase = db.relationship('Purchase', backref='role_assignment')
@@ -252,6 +425,10 @@ class DownloadToken(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime, nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_download_token_purchase_user', 'purchase_id', 'user_id'),
+    )
+
     user = db.relationship('User', backref='download_tokens')
     purchase = db.relationship('Purchase', backref='download_tokens')
 
@@ -265,3 +442,11 @@ class Category(db.Model):
 
     def __repr__(self):
         return f'<Category {self.name}>'
+
+
+class SchemaMeta(db.Model):
+    """Startup manifest: digests of the migration/seed steps already applied"""
+    __tablename__ = 'schema_meta'
+    key = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.String(64), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,235 @@
+"""
+Set-based point awards for many users at once, applied in chunked UPDATE and
+ledger INSERT ... SELECT statements.
+"""
+
+import os
+from datetime import datetime
+
+from sqlalchemy import Column, MetaData, String, Table, exists, func, insert, literal, select, update
+
+from shared import db, User, PointsLedger
+
+BULK_AWARD_CHUNK_SIZE = int(os.getenv('BULK_AWARD_CHUNK_SIZE', 500))
+
+
+class BulkAwardError(Exception):
+    """A chunked award failed partway; ``awarded`` lists the users whose chunks committed."""
+
+    def __init__(self, awarded, error):
+        super().__init__(str(error))
+        self.awarded = awarded
+        self.error = error
+
+# Per-connection scratch table holding the member batch for backfill_bonus()
+_award_members = Table(
+    'award_members', MetaData(),
+    Column('id', String(20), primary_key=True),
+    Column('username', String(80)),
+    Column('avatar_url', String(500)),
+    prefixes=['TEMPORARY']
+)
+
+
+def ensure_users(profiles, chunk_size=BULK_AWARD_CHUNK_SIZE):
+    """Insert user rows for any ``(id, username, avatar_url)`` profiles not in the DB.
+
+    Commits and returns the list of IDs that were created.
+    """
+    profiles = {str(user_id): (username, avatar_url) for user_id, username, avatar_url in profiles}
+    ids = sorted(profiles)
+    created = []
+    try:
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            existing = set(db.session.execute(
+                select(User.id).where(User.id.in_(chunk))
+            ).scalars())
+            new_users = [
+                {'id': user_id, 'username': profiles[user_id][0], 'discord_id': user_id,
+                 'avatar_url': profiles[user_id][1]}
+                for user_id in chunk if user_id not in existing
+            ]
+            if new_users:
+                db.session.execute(insert(User), new_users)
+                created.extend(row['id'] for row in new_users)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return created
+
+
+def bulk_award(amount, source, user_ids=None, flag=None, reference_id=None,
+               chunk_size=BULK_AWARD_CHUNK_SIZE, progress=None):
+    """Credit ``amount`` points to many users and record each credit in the ledger.
+
+    ``user_ids`` limits the award to those users (default: every user).
+    ``flag`` names a one-time Boolean column such as ``'has_boosted'``:
+    users with it set are skipped and awarded users get it set.
+    ``progress(done, total)`` is called after each committed chunk.
+    With a ``reference_id``, users who already have a ledger entry for
+    ``(source, reference_id)`` are skipped, so rerunning an interrupted award
+    with the same id only pays the rest.
+
+    Returns the list of awarded user IDs. Chunks commit independently; if one
+    fails, BulkAwardError carries the users already awarded.
+    """
+    conditions = []
+    values = {'balance': func.coalesce(User.balance, 0) + amount,
+              'points': func.coalesce(User.points, 0) + amount}
+    if flag is not None:
+        flag_column = getattr(User, flag)
+        conditions.append(func.coalesce(flag_column, False) == False)
+        values[flag] = True
+    if reference_id is not None:
+        conditions.append(~exists().where(
+            PointsLedger.source == source,
+            PointsLedger.reference_id == str(reference_id),
+            PointsLedger.user_id == User.id
+        ))
+
+    if user_ids is None:
+        total = db.session.execute(
+            select(func.count()).select_from(User).where(*conditions)
+        ).scalar()
+        chunks = _table_chunks(conditions, chunk_size)
+    else:
+        user_ids = sorted({str(user_id) for user_id in user_ids})
+        total = len(user_ids)
+        chunks = _id_list_chunks(user_ids, conditions, chunk_size)
+
+    awarded = []
+    done = 0
+    try:
+        for considered, ids in chunks:
+            if ids:
+                _award_chunk(ids, amount, source, reference_id, values, conditions)
+                awarded.extend(ids)
+            done += considered
+            if progress:
+                progress(done, total)
+    except Exception as e:
+        raise BulkAwardError(awarded, e) from e
+    return awarded
+
+
+def _table_chunks(conditions, chunk_size):
+    """Yield ``(considered, ids)`` pages of matching users in primary-key order."""
+    last_id = None
+    while True:
+        query = select(User.id).where(*conditions).order_by(User.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(User.id > last_id)
+        ids = list(db.session.execute(query).scalars())
+        db.session.commit()  # end the read so the chunk's write transaction starts fresh
+        if not ids:
+            return
+        last_id = ids[-1]
+        yield len(ids), ids
+
+
+def _id_list_chunks(user_ids, conditions, chunk_size):
+    """Yield ``(considered, ids)`` for slices of ``user_ids`` narrowed to matching users."""
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        ids = list(db.session.execute(
+            select(User.id).where(User.id.in_(chunk), *conditions).order_by(User.id)
+        ).scalars())
+        db.session.commit()
+        yield len(chunk), ids
+
+
+def _award_chunk(ids, amount, source, reference_id, values, conditions, retries=3):
+    now = datetime.utcnow()
+    for _ in range(retries):
+        try:
+            updated = db.session.execute(
+                update(User).where(User.id.in_(ids), *conditions).values(values)
+                .execution_options(synchronize_session=False, identity_unaffected=True)
+            ).rowcount
+            if updated != len(ids):
+                # Another writer changed one of these users since the page was
+                # read; retry the chunk with the rows that still qualify
+                db.session.rollback()
+                ids[:] = db.session.execute(
+                    select(User.id).where(User.id.in_(ids), *conditions)
+                ).scalars().all()
+                db.session.commit()
+                if not ids:
+                    return
+                continue
+            db.session.execute(insert(PointsLedger).from_select(
+                ['user_id', 'amount', 'source', 'reference_id', 'created_at'],
+                select(
+                    User.id, literal(amount), literal(source),
+                    literal(str(reference_id) if reference_id is not None else None),
+                    literal(now)
+                ).where(User.id.in_(ids))
+            ))
+            db.session.commit()
+            return
+        except Exception:
+            db.session.rollback()
+            raise
+    raise RuntimeError(f"Bulk award chunk kept changing underneath ({source}, {len(ids)} users)")
+
+
+def backfill_bonus(members, amount, source, flag):
+    """Award a one-time bonus to every ``(id, username, avatar_url)`` member.
+
+    The batch is loaded into a temporary table, then one INSERT creates the
+    members missing from ``user``, one INSERT ... SELECT writes their ledger
+    entries and one UPDATE credits everyone whose ``flag`` is unset, all in a
+    single transaction. Returns ``(created, awarded)`` from the affected row
+    counts.
+    """
+    flag_column = getattr(User, flag)
+    unawarded = func.coalesce(flag_column, False) == False
+    rows = {str(user_id): (username, avatar_url) for user_id, username, avatar_url in members}
+    if not rows:
+        return 0, 0
+
+    connection = db.session.connection()
+    try:
+        _award_members.drop(connection, checkfirst=True)
+        _award_members.create(connection)
+        db.session.execute(insert(_award_members), [
+            {'id': user_id, 'username': username or user_id, 'avatar_url': avatar_url}
+            for user_id, (username, avatar_url) in rows.items()
+        ])
+
+        created = db.session.execute(
+            insert(User).from_select(
+                ['id', 'username', 'discord_id', 'avatar_url'],
+                select(
+                    _award_members.c.id, _award_members.c.username,
+                    _award_members.c.id, _award_members.c.avatar_url
+                ).where(~exists().where(User.id == _award_members.c.id))
+            )
+        ).rowcount
+
+        # The INSERT above took the write lock, so the ledger rows and the
+        # UPDATE below see the same set of unawarded members
+        in_batch = User.id.in_(select(_award_members.c.id))
+        db.session.execute(insert(PointsLedger).from_select(
+            ['user_id', 'amount', 'source', 'reference_id', 'created_at'],
+            select(
+                User.id, literal(amount), literal(source), literal(None, String),
+                literal(datetime.utcnow())
+            ).where(in_batch, unawarded)
+        ))
+        awarded = db.session.execute(
+            update(User).where(in_batch, unawarded).values({
+                'balance': func.coalesce(User.balance, 0) + amount,
+                'points': func.coalesce(User.points, 0) + amount,
+                flag: True
+            }).execution_options(synchronize_session=False, identity_unaffected=True)
+        ).rowcount
+
+        _award_members.drop(connection)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return created, awarded
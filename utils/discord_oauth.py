@@ -0,0 +1,89 @@
+"""
+Discord OAuth2 client for the login callback: one pooled session, explicit
+timeouts, and retries only for requests that are safe to resend.
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DISCORD_API_BASE = os.getenv('DISCORD_API_BASE', 'https://discord.com/api').rstrip('/')
+DISCORD_HTTP_CONNECT_TIMEOUT = float(os.getenv('DISCORD_HTTP_CONNECT_TIMEOUT', 3.05))
+DISCORD_HTTP_READ_TIMEOUT = float(os.getenv('DISCORD_HTTP_READ_TIMEOUT', 10))
+DISCORD_HTTP_RETRIES = int(os.getenv('DISCORD_HTTP_RETRIES', 2))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class DiscordOAuthError(Exception):
+    """Discord answered with a non-200 status; ``status_code`` is that status."""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def get_session():
+    """Return the shared session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=DISCORD_HTTP_RETRIES,
+                    connect=DISCORD_HTTP_RETRIES,
+                    read=DISCORD_HTTP_RETRIES,
+                    status=DISCORD_HTTP_RETRIES,
+                    backoff_factor=0.5,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    # Read/status retries are GET-only: a resent token POST would reuse a single-use code
+                    allowed_methods=frozenset({'GET'}),
+                    respect_retry_after_header=True,
+                    raise_on_status=False
+                )
+                # Sized for gunicorn's 4 request threads
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def authorize_url(client_id, redirect_uri, scope='identify'):
+    return (
+        f'{DISCORD_API_BASE}/oauth2/authorize?client_id={client_id}'
+        f'&redirect_uri={redirect_uri}&response_type=code&scope={scope}'
+    )
+
+
+def _request(method, path, **kwargs):
+    response = get_session().request(
+        method,
+        f'{DISCORD_API_BASE}{path}',
+        timeout=(DISCORD_HTTP_CONNECT_TIMEOUT, DISCORD_HTTP_READ_TIMEOUT),
+        **kwargs
+    )
+    if response.status_code != 200:
+        raise DiscordOAuthError(response.status_code, f'Discord API error: {response.status_code}')
+    return response.json()
+
+
+def exchange_code(code, client_id, client_secret, redirect_uri):
+    """Trade an authorization code for a token response dict."""
+    return _request('POST', '/oauth2/token', data={
+        'client_id': client_id,
+        'client_secret': client_secret,
+        'grant_type': 'authorization_code',
+        'code': code,
+        'redirect_uri': redirect_uri
+    }, headers={'Content-Type': 'application/x-www-form-urlencoded'})
+
+
+def fetch_user(access_token):
+    """Return the ``/users/@me`` payload for an access token."""
+    return _request('GET', '/users/@me', headers={'Authorization': f'Bearer {access_token}'})
@@ -0,0 +1,309 @@
+"""
+In-memory public leaderboard (top non-admin users and community totals), kept
+current from committed user changes and reloaded when it goes stale.
+"""
+
+import bisect
+import os
+import threading
+from collections import namedtuple
+
+from sqlalchemy import event, func, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from shared import db, User
+
+LEADERBOARD_SIZE = 10
+LEADERBOARD_CAPACITY = int(os.getenv('LEADERBOARD_CAPACITY', 50))
+
+LeaderboardEntry = namedtuple('LeaderboardEntry', 'id username avatar_url points balance')
+
+_FIELDS = ('balance', 'points', 'is_admin', 'username', 'avatar_url')
+_CHANGES_KEY = 'leaderboard_changes'
+_STALE_KEY = 'leaderboard_stale'
+_DELTAS_KEY = 'leaderboard_deltas'
+_INFLIGHT_KEY = 'leaderboard_inflight'
+_UNKNOWN = object()
+
+
+def _sort_key(entry):
+    return (-(entry.balance or 0), entry.id)
+
+
+def _counted(state):
+    """True if a user state contributes to the public leaderboard (``is_admin == False``)."""
+    return state is not None and state['is_admin'] is not None and not state['is_admin']
+
+
+class Leaderboard:
+    """Top users by balance plus non-admin totals, kept current from commits."""
+
+    def __init__(self, capacity=LEADERBOARD_CAPACITY):
+        self.capacity = max(capacity, LEADERBOARD_SIZE)
+        self._lock = threading.Lock()
+        self._entries = []   # LeaderboardEntry, sorted by _sort_key
+        self._by_id = {}     # user_id -> LeaderboardEntry
+        self._uncounted = set()  # ids of users left out of the leaderboard (admins, NULL is_admin)
+        self._bound = None   # upper bound on every unheld non-admin balance; None if all are held
+        self._totals = {'total_users': 0, 'total_balance': 0, 'total_points': 0}
+        self._stale = True
+        self._generation = 0  # bumped by every commit that touched users
+        self._inflight = 0    # open transactions that have flushed user changes
+
+    # Reads
+
+    def top(self, limit=LEADERBOARD_SIZE, reload=True):
+        """The top ``limit`` non-admin users by balance, as LeaderboardEntry tuples.
+
+        With ``reload=False`` a stale leaderboard returns None instead of
+        querying, for callers that must not touch the DB.
+        """
+        with self._lock:
+            if self._can_serve(limit):
+                return self._entries[:limit]
+        if not reload:
+            return None
+        return self.reload()[0][:limit]
+
+    def totals(self):
+        """``{'total_users', 'total_balance', 'total_points'}`` over non-admin users."""
+        with self._lock:
+            if not self._stale:
+                return dict(self._totals)
+        return dict(self.reload()[1])
+
+    def snapshot(self, limit=LEADERBOARD_SIZE):
+        """``(top, totals)`` from one consistent version."""
+        with self._lock:
+            if self._can_serve(limit):
+                return self._entries[:limit], dict(self._totals)
+        entries, totals = self.reload()
+        return entries[:limit], dict(totals)
+
+    def is_current(self, limit=LEADERBOARD_SIZE):
+        """True if ``top(limit)`` can be answered without a query."""
+        with self._lock:
+            return self._can_serve(limit)
+
+    def _can_serve(self, limit):
+        return not self._stale and (self._bound is None or len(self._entries) >= limit)
+
+    # Reloading
+
+    def reload(self):
+        """Reload from the database (needs an app context). Returns ``(entries, totals)``.
+
+        The result is published only if no transaction that touched users
+        could have committed while it was read; otherwise it is returned
+        to the caller but the leaderboard stays stale.
+        """
+        with self._lock:
+            generation = self._generation
+            quiet = self._inflight == 0
+
+        non_admin = User.is_admin == False
+        rows = db.session.execute(
+            select(User.id, User.username, User.avatar_url, User.points, User.balance)
+            .where(non_admin)
+            .order_by(User.balance.desc(), User.id)
+            .limit(self.capacity + 1)
+        ).all()
+        uncounted = set(db.session.execute(
+            select(User.id).where(or_(User.is_admin.is_(None), User.is_admin == True))
+        ).scalars())
+        total_users, total_balance, total_points = db.session.execute(
+            select(
+                func.count(User.id),
+                func.coalesce(func.sum(User.balance), 0),
+                func.coalesce(func.sum(User.points), 0)
+            ).where(non_admin)
+        ).one()
+
+        entries = [LeaderboardEntry(*row) for row in rows[:self.capacity]]
+        totals = {
+            'total_users': total_users,
+            'total_balance': total_balance,
+            'total_points': total_points
+        }
+        with self._lock:
+            if quiet and self._generation == generation:
+                entries.sort(key=_sort_key)
+                self._entries = entries
+                self._by_id = {entry.id: entry for entry in entries}
+                self._uncounted = uncounted
+                self._bound = (rows[self.capacity].balance or 0) if len(rows) > self.capacity else None
+                self._totals = totals
+                self._stale = False
+        return entries, totals
+
+    def invalidate(self):
+        with self._lock:
+            self._stale = True
+
+    # Incremental updates
+
+    def apply(self, user_id, old, new):
+        """Apply one committed user change. ``old``/``new`` are state dicts or None."""
+        with self._lock:
+            if self._stale:
+                return
+            if any(state is not None and _UNKNOWN in state.values() for state in (old, new)):
+                self._stale = True
+                return
+
+            totals = self._totals
+            for state, sign in ((old, -1), (new, 1)):
+                if _counted(state):
+                    totals['total_users'] += sign
+                    totals['total_balance'] += sign * (state['balance'] or 0)
+                    totals['total_points'] += sign * (state['points'] or 0)
+
+            self._remove(user_id)
+            if new is None or _counted(new):
+                self._uncounted.discard(user_id)
+            else:
+                self._uncounted.add(user_id)
+            if _counted(new):
+                self._place(LeaderboardEntry(
+                    user_id, new['username'], new['avatar_url'], new['points'], new['balance']
+                ))
+
+    def apply_delta(self, user_id, amount):
+        """Apply one committed balance change of ``amount`` made by a bulk UPDATE."""
+        with self._lock:
+            if self._stale or user_id in self._uncounted:
+                return
+            entry = self._by_id.get(user_id)
+            if entry is None and (self._bound is None or amount > 0):
+                # Not held, so its old balance isn't known: it may now rank
+                # above the bound, or (with everyone held) it is missing
+                self._stale = True
+                return
+            self._totals['total_balance'] += amount
+            if entry is not None:
+                self._remove(user_id)
+                self._place(entry._replace(balance=(entry.balance or 0) + amount))
+
+    def _place(self, entry):
+        if self._bound is not None and (entry.balance or 0) < self._bound:
+            return  # someone not held may be ahead of this user; it stays under the bound
+        bisect.insort(self._entries, entry, key=_sort_key)
+        self._by_id[entry.id] = entry
+        if len(self._entries) > self.capacity:
+            evicted = self._entries.pop()
+            del self._by_id[evicted.id]
+            self._bound = max(self._bound or 0, evicted.balance or 0)
+
+    def _remove(self, user_id):
+        entry = self._by_id.pop(user_id, None)
+        if entry is not None:
+            index = bisect.bisect_left(self._entries, _sort_key(entry), key=_sort_key)
+            del self._entries[index]
+
+    # Session hooks
+
+    def watch(self):
+        """Follow committed user changes made through any SQLAlchemy session.
+
+        Bulk statements can opt out with the ``leaderboard_unaffected``
+        execution option when they never touch balance, points, the admin
+        flag or profile fields (e.g. activity counter flushes). A single-user
+        balance change (the purchase debit) can pass
+        ``leaderboard_delta=(user_id, amount)`` to be applied incrementally.
+        """
+        event.listen(Session, 'after_flush', self._on_after_flush)
+        event.listen(Session, 'do_orm_execute', self._on_orm_execute)
+        event.listen(Session, 'after_commit', self._on_after_commit)
+        event.listen(Session, 'after_transaction_end', self._on_transaction_end)
+
+    def _begin_tracking(self, session):
+        if not session.info.get(_INFLIGHT_KEY):
+            session.info[_INFLIGHT_KEY] = True
+            with self._lock:
+                self._inflight += 1
+
+    def _on_after_flush(self, session, flush_context):
+        changes = []
+        for obj in session.new:
+            if isinstance(obj, User):
+                changes.append((obj.id, None, self._state(obj, inserted=True)))
+        for obj in session.dirty:
+            if isinstance(obj, User):
+                attrs = inspect(obj).attrs
+                if any(attrs[field].history.has_changes() for field in _FIELDS):
+                    changes.append((obj.id, self._state(obj, previous=True), self._state(obj)))
+        for obj in session.deleted:
+            if isinstance(obj, User):
+                changes.append((obj.id, self._state(obj, previous=True), None))
+        if changes:
+            self._begin_tracking(session)
+            session.info.setdefault(_CHANGES_KEY, []).extend(changes)
+
+    @staticmethod
+    def _state(obj, previous=False, inserted=False):
+        state = {}
+        attrs = inspect(obj).attrs
+        for field in _FIELDS:
+            history = attrs[field].history
+            if previous and history.deleted:
+                state[field] = history.deleted[0]
+            elif previous and history.added:
+                state[field] = _UNKNOWN  # changed without the old value loaded
+            elif history.added:
+                state[field] = history.added[0]
+            elif history.unchanged:
+                state[field] = history.unchanged[0]
+            else:
+                # Columns left unset on a new row were inserted as NULL
+                state[field] = None if inserted else _UNKNOWN
+        return state
+
+    def _on_orm_execute(self, orm_execute_state):
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+            return
+        options = orm_execute_state.execution_options
+        if options.get('leaderboard_unaffected'):
+            return
+        # ORM update(User) targets an annotated copy of the table, so compare names
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and getattr(table, 'name', None) == User.__table__.name:
+            session = orm_execute_state.session
+            self._begin_tracking(session)
+            delta = options.get('leaderboard_delta')
+            if orm_execute_state.is_update and delta is not None:
+                # Run it here to see whether the conditional UPDATE matched the
+                # row; returning the result skips handlers registered after this one
+                result = orm_execute_state.invoke_statement()
+                if result.rowcount:
+                    session.info.setdefault(_DELTAS_KEY, []).append(delta)
+                return result
+            session.info[_STALE_KEY] = True
+
+    def _on_after_commit(self, session):
+        changes = session.info.pop(_CHANGES_KEY, None)
+        deltas = session.info.pop(_DELTAS_KEY, None)
+        stale = session.info.pop(_STALE_KEY, False)
+        if not (changes or deltas or stale):
+            return
+        with self._lock:
+            self._generation += 1
+            if stale:
+                self._stale = True
+        if not stale:
+            for user_id, old, new in changes or ():
+                self.apply(user_id, old, new)
+            for user_id, amount in deltas or ():
+                self.apply_delta(str(user_id), amount)
+
+    def _on_transaction_end(self, session, transaction):
+        if transaction.parent is not None:
+            return
+        session.info.pop(_CHANGES_KEY, None)
+        session.info.pop(_DELTAS_KEY, None)
+        session.info.pop(_STALE_KEY, None)
+        if session.info.pop(_INFLIGHT_KEY, False):
+            with self._lock:
+                self._inflight -= 1
+
+
+leaderboard = Leaderboard()
@@ -0,0 +1,129 @@
+"""
+Append-only points ledger, written in the same transaction as each balance
+change, with periodic balance checkpoints for reconciliation.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, literal, select
+
+from shared import db, User, PointsLedger, BalanceCheckpoint
+
+# Checkpoints older than this are pruned once a newer one exists for the user
+LEDGER_CHECKPOINT_RETENTION_DAYS = int(os.getenv('LEDGER_CHECKPOINT_RETENTION_DAYS', 30))
+RECONCILE_BATCH_SIZE = 500
+
+
+def add_points(user, amount, source, reference_id=None):
+    """Credit ``amount`` earned points to ``user`` (negative to claw back).
+
+    Moves ``balance`` and ``points`` together and records the ledger entry in
+    the current session; the caller commits.
+    """
+    user.balance = (user.balance or 0) + amount
+    user.points = (user.points or 0) + amount
+    record_entry(user.id, amount, source, reference_id)
+
+
+def record_entry(user_id, amount, source, reference_id=None):
+    """Record a balance change that was applied in SQL (e.g. a conditional UPDATE)."""
+    db.session.add(PointsLedger(
+        user_id=str(user_id),
+        amount=amount,
+        source=source,
+        reference_id=str(reference_id) if reference_id is not None else None,
+        created_at=datetime.utcnow()
+    ))
+
+
+def earned_between(user_id, start, end=None):
+    """Return ``{source: total}`` of points ``user_id`` earned in ``[start, end)``."""
+    query = db.session.query(
+        PointsLedger.source, func.sum(PointsLedger.amount)
+    ).filter(
+        PointsLedger.user_id == str(user_id),
+        PointsLedger.created_at >= start,
+        PointsLedger.amount > 0
+    )
+    if end is not None:
+        query = query.filter(PointsLedger.created_at < end)
+    return dict(query.group_by(PointsLedger.source).all())
+
+
+def checkpoint_balances():
+    """Snapshot every user's balance against the current ledger head and commit.
+
+    One INSERT ... SELECT; older checkpoints past the retention window are
+    pruned. Returns the number of users checkpointed.
+    """
+    now = datetime.utcnow()
+    head = select(func.coalesce(func.max(PointsLedger.id), 0)).scalar_subquery()
+    try:
+        inserted = db.session.execute(
+            insert(BalanceCheckpoint).from_select(
+                ['user_id', 'balance', 'ledger_id', 'created_at'],
+                select(User.id, func.coalesce(User.balance, 0), head, literal(now))
+            )
+        ).rowcount
+        db.session.query(BalanceCheckpoint).filter(
+            BalanceCheckpoint.created_at < now - timedelta(days=LEDGER_CHECKPOINT_RETENTION_DAYS)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return inserted
+
+
+def has_checkpoints():
+    return db.session.query(BalanceCheckpoint.id).first() is not None
+
+
+def reconcile_balances(batch_size=RECONCILE_BATCH_SIZE):
+    """Yield ``(user_id, expected, actual)`` for users whose balance drifted.
+
+    ``expected`` is the user's latest checkpoint plus the ledger entries after
+    it. Users are walked in primary-key batches so memory stays flat however
+    large the table is. Users with no checkpoint are replayed from an opening
+    balance of 0.
+    """
+    last_id = ''
+    while True:
+        users = db.session.query(User.id, User.balance).filter(
+            User.id > last_id
+        ).order_by(User.id).limit(batch_size).all()
+        if not users:
+            return
+        last_id = users[-1][0]
+        ids = [user_id for user_id, _ in users]
+
+        latest = db.session.query(
+            func.max(BalanceCheckpoint.id)
+        ).filter(
+            BalanceCheckpoint.user_id.in_(ids)
+        ).group_by(BalanceCheckpoint.user_id).subquery()
+        checkpoints = {
+            user_id: (balance, ledger_id)
+            for user_id, balance, ledger_id in db.session.query(
+                BalanceCheckpoint.user_id, BalanceCheckpoint.balance, BalanceCheckpoint.ledger_id
+            ).filter(BalanceCheckpoint.id.in_(select(latest)))
+        }
+
+        # Entries at or before the oldest checkpoint in the batch can't matter
+        floor = min((ledger_id for _, ledger_id in checkpoints.values()), default=0) \
+            if len(checkpoints) == len(ids) else 0
+        deltas = {}
+        for user_id, entry_id, amount in db.session.query(
+            PointsLedger.user_id, PointsLedger.id, PointsLedger.amount
+        ).filter(
+            PointsLedger.user_id.in_(ids), PointsLedger.id > floor
+        ).yield_per(1000):
+            opening = checkpoints.get(user_id, (0, 0))
+            if entry_id > opening[1]:
+                deltas[user_id] = deltas.get(user_id, 0) + amount
+
+        for user_id, balance in users:
+            expected = checkpoints.get(user_id, (0, 0))[0] + deltas.get(user_id, 0)
+            if expected != (balance or 0):
+                yield user_id, expected, balance or 0
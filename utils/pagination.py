@@ -0,0 +1,183 @@
+"""
+Keyset (cursor) pagination for the admin listings, plus ``TTLCache`` for totals
+that shouldn't be recounted on every page.
+"""
+
+import base64
+import binascii
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+ADMIN_PAGE_SIZE_MAX = 100
+ADMIN_COUNT_CACHE_SECONDS = float(os.getenv('ADMIN_COUNT_CACHE_SECONDS', 60))
+
+KeysetPage = namedtuple('KeysetPage', 'items page per_page has_prev has_next prev_cursor next_cursor')
+
+
+class InvalidCursor(ValueError):
+    """A cursor token that is malformed or belongs to another listing."""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(scope, key, direction, page):
+    payload = {'s': scope, 'k': [_encode_value(v) for v in key], 'd': direction, 'p': page}
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(scope, token):
+    """Return ``(key, direction, page)`` for a token issued for ``scope``."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        key = tuple(_decode_value(v) for v in payload['k'])
+        direction = payload['d']
+        page = int(payload['p'])
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+        raise InvalidCursor('malformed cursor')
+    if payload.get('s') != scope or len(key) != 2 or direction not in ('next', 'prev') or page < 1:
+        raise InvalidCursor('cursor does not belong to this listing')
+    return key, direction, page
+
+
+class KeysetPaginator:
+    """Pages a query in descending ``(sort_column, id_column)`` order.
+
+    ``key`` maps a result row to its ``(sort value, id)``; ``scope`` names the
+    listing so a cursor from one endpoint is rejected by another.
+    """
+
+    def __init__(self, scope, sort_column, id_column, key):
+        self.scope = scope
+        self.sort_column = sort_column
+        self.id_column = id_column
+        self.key = key
+
+    def page(self, query, cursor=None, per_page=20):
+        """Return a KeysetPage; raises InvalidCursor for a bad ``cursor`` token."""
+        per_page = max(1, min(per_page, ADMIN_PAGE_SIZE_MAX))
+        if not cursor:
+            rows = self._fetch(query, None, forward=True, limit=per_page + 1)
+            return self._build(rows[:per_page], 1, per_page, False, len(rows) > per_page)
+
+        key, direction, page = decode_cursor(self.scope, cursor)
+        if direction == 'next':
+            rows = self._fetch(query, key, forward=True, limit=per_page + 1)
+            return self._build(rows[:per_page], page, per_page, True, len(rows) > per_page)
+        rows = self._fetch(query, key, forward=False, limit=per_page + 1)
+        items = list(reversed(rows[:per_page]))
+        return self._build(items, page, per_page, len(rows) > per_page, True)
+
+    def _build(self, items, page, per_page, has_prev, has_next):
+        has_prev = has_prev and bool(items)
+        has_next = has_next and bool(items)
+        return KeysetPage(
+            items=items,
+            page=page,
+            per_page=per_page,
+            has_prev=has_prev,
+            has_next=has_next,
+            prev_cursor=encode_cursor(self.scope, self.key(items[0]), 'prev', page - 1) if has_prev else None,
+            next_cursor=encode_cursor(self.scope, self.key(items[-1]), 'next', page + 1) if has_next else None
+        )
+
+    def _fetch(self, query, key, forward, limit):
+        """Rows strictly after (forward) or before ``key`` in the descending order, nearest first.
+
+        Non-NULL and NULL sort values are paged as two segments so each
+        statement stays a plain range seek on the sort column's index.
+        """
+        segments = ['values', 'nulls'] if forward else ['nulls', 'values']
+        if key is not None:
+            # Start in the cursor's own segment
+            del segments[:segments.index('nulls' if key[0] is None else 'values')]
+
+        rows = []
+        for segment in segments:
+            bounded = key is not None and (segment == 'nulls') == (key[0] is None)
+            rows.extend(
+                self._segment(query, segment, key if bounded else None, forward)
+                .limit(limit - len(rows)).all()
+            )
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def _segment(self, query, segment, key, forward):
+        sort, ident = self.sort_column, self.id_column
+        if segment == 'nulls':
+            query = query.filter(sort.is_(None))
+            if key is not None:
+                query = query.filter(ident < key[1] if forward else ident > key[1])
+            return query.order_by(ident.desc() if forward else ident.asc())
+
+        query = query.filter(sort.isnot(None))
+        if key is not None:
+            value, last_id = key
+            if forward:
+                query = query.filter(sort <= value, or_(sort < value, and_(sort == value, ident < last_id)))
+            else:
+                query = query.filter(sort >= value, or_(sort > value, and_(sort == value, ident > last_id)))
+        if forward:
+            return query.order_by(sort.desc(), ident.desc())
+        return query.order_by(sort.asc(), ident.asc())
+
+
+class TTLCache:
+    """One value returned by ``load()``, recomputed at most every ``ttl`` seconds."""
+
+    def __init__(self, load, ttl=ADMIN_COUNT_CACHE_SECONDS):
+        self._load = load
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._expires_at = 0.0
+
+    def get(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._value is not None and self._expires_at > now:
+                return self._value
+        value = self._load()
+        with self._lock:
+            self._value = value
+            self._expires_at = now + self.ttl
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+
+
+def pagination_payload(page, total=None):
+    """The ``pagination`` object the admin APIs return for a KeysetPage."""
+    payload = {
+        'page': page.page,
+        'per_page': page.per_page,
+        'has_prev': page.has_prev,
+        'has_next': page.has_next,
+        'prev_cursor': page.prev_cursor,
+        'next_cursor': page.next_cursor,
+        'total': total,
+        'pages': None
+    }
+    if total is not None:
+        payload['pages'] = max(1, -(-total // page.per_page))
+    return payload
@@ -0,0 +1,109 @@
+"""
+Atomic purchase transaction for the web store; the balance and stock checks
+live in the UPDATE statements' WHERE clauses.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import or_, update
+
+from shared import db, User, Product, ProductVariant, Purchase, RoleAssignment
+from utils.ledger import record_entry
+
+
+class PurchaseError(Exception):
+    """A purchase lost a balance or stock check; ``code`` matches the API error codes."""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _conditional_update(stmt):
+    return db.session.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+
+def execute_purchase(user_id, product, price, variant=None):
+    """Debit ``price`` and take one unit of stock in a single transaction.
+
+    Returns the committed Purchase. Raises PurchaseError (after rolling back)
+    if the balance, stock or product state no longer allows the purchase.
+
+    Fulfillment is queued in the same transaction: the admin alert via
+    ``Purchase.admin_notified`` and, for auto-role products, a RoleAssignment
+    row. The bot's fulfillment worker delivers both.
+    """
+    try:
+        debited = _conditional_update(
+            update(User)
+            .where(User.id == user_id, User.balance >= price)
+            .values(balance=User.balance - price)
+            .execution_options(identity_unaffected=True, leaderboard_delta=(str(user_id), -price))
+        )
+        if debited != 1:
+            raise PurchaseError('insufficient_balance', 'Insufficient balance.')
+
+        # NULL stock means unlimited; NULL - 1 stays NULL
+        if variant is not None:
+            reserved = _conditional_update(
+                update(ProductVariant)
+                .where(
+                    ProductVariant.id == variant.id,
+                    or_(ProductVariant.stock.is_(None), ProductVariant.stock > 0)
+                )
+                .values(stock=ProductVariant.stock - 1)
+            )
+            if reserved != 1:
+                raise PurchaseError('out_of_stock', f'"{variant.name}" is out of stock.')
+        else:
+            reserved = _conditional_update(
+                update(Product)
+                .where(
+                    Product.id == product.id,
+                    Product.is_active == True,
+                    or_(Product.stock.is_(None), Product.stock > 0)
+                )
+                .values(stock=Product.stock - 1)
+            )
+            if reserved != 1:
+                raise PurchaseError('out_of_stock', 'This product is out of stock.')
+
+        purchase = Purchase(
+            user_id=user_id,
+            product_id=product.id,
+            variant_id=variant.id if variant else None,
+            points_spent=price,
+            timestamp=datetime.utcnow()
+        )
+        db.session.add(purchase)
+        db.session.flush()  # assigns purchase.id for the ledger entry
+        record_entry(user_id, -price, 'purchase', purchase.id)
+        _queue_role_assignment(purchase, product, user_id)
+        db.session.commit()
+    except PurchaseError as e:
+        db.session.rollback()
+        print(f"Purchase of product {product.id} by {user_id} rejected: {e.code}")
+        raise
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # The UPDATEs bypassed the identity map, but commit expired every loaded
+    # object, so current_user.balance etc. are re-read on next access
+    return purchase
+
+
+def _queue_role_assignment(purchase, product, user_id):
+    if product.product_type != 'role' or product.delivery_method != 'auto_role':
+        return
+
+    role_id = product.delivery_config.get('role_id')
+    if not role_id:
+        purchase.status = 'failed'
+        purchase.delivery_info = "No role ID configured"
+        return
+
+    db.session.add(RoleAssignment(user_id=user_id, role_id=str(role_id), purchase_id=purchase.id))
+    purchase.status = 'pending'
+    purchase.delivery_info = "Role assignment queued"
@@ -0,0 +1,24 @@
+"""
+Rank lookups for the admin user pages: one COUNT of the users strictly ahead,
+so tied users share a rank.
+"""
+
+from sqlalchemy import func, select
+
+from shared import db, User
+
+RANK_METRICS = {
+    'balance': User.balance,
+    'points': User.points,
+    'messages': User.message_count,
+}
+
+
+def get_user_rank(user, metric='balance'):
+    """Return ``user``'s 1-based rank by ``metric`` (see RANK_METRICS)."""
+    column = RANK_METRICS[metric]
+    value = getattr(user, column.key) or 0
+    ahead = db.session.execute(
+        select(func.count()).select_from(User).where(column > value)
+    ).scalar()
+    return ahead + 1
@@ -21,8 +21,9 @@ import os
 # Allow running from project root
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from shared import app, db, User, Achievement, UserAchievement
+from shared import app, db, User, Achievement, UserAchievement, PointsLedger
 from sqlalchemy import text
+from utils.ledger import add_points, record_entry
 from datetime import datetime
 
 
@@ -48,6 +49,9 @@ def ensure_columns(engine):
             conn.commit()
             added.append('onboarding_refunded')
 
+    # Balance changes below are written to the points ledger
+    PointsLedger.__table__.create(engine, checkfirst=True)
+
     return added
 
 
@@ -60,8 +64,7 @@ def run_verification_correction(session):
 
     count = 0
     for user in users:
-        user.balance += 100
-        user.points += 100
+        add_points(user, 100, 'verification_correction')
         user.verify_corrected = True
         count += 1
 
@@ -80,7 +83,9 @@ def run_onboarding_refund(session):
 
     count = 0
     for user in users:
-        user.balance = max(0, user.balance - 500)
+        refunded_balance = max(0, user.balance - 500)
+        record_entry(user.id, refunded_balance - user.balance, 'onboarding_refund')
+        user.balance = refunded_balance
         user.points = max(0, user.points - 500)
         user.onboarding_refunded = True
         count += 1
@@ -118,8 +123,7 @@ def run_message_milestone_awards(session):
                     achieved_at=datetime.utcnow()
                 )
                 session.add(ua)
-                user.balance += ach.points
-                user.points += ach.points
+                add_points(user, ach.points, 'achievement', ach.id)
                 total_awarded += 1
 
     if total_awarded:
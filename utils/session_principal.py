@@ -0,0 +1,160 @@
+"""
+Slim, cached session identity for Flask-Login that loads the full ``User`` row
+only when a non-identity attribute is read.
+"""
+
+import os
+import threading
+import time
+
+from flask_login import UserMixin
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+SESSION_PRINCIPAL_TTL_SECONDS = float(os.getenv('SESSION_PRINCIPAL_TTL_SECONDS', 30))
+SESSION_PRINCIPAL_MAX_ENTRIES = 10000
+
+IDENTITY_FIELDS = ('id', 'username', 'avatar_url', 'is_admin')
+_DIRTY_KEY = 'session_principal_dirty'
+
+
+class SessionPrincipal(UserMixin):
+    """The logged-in user's identity; other ``User`` attributes load on first use."""
+
+    def __init__(self, loader, id, username, avatar_url, is_admin):
+        self._loader = loader
+        self._user = None
+        self.id = id
+        self.username = username
+        self.avatar_url = avatar_url
+        self.is_admin = bool(is_admin)
+
+    @property
+    def user(self):
+        """The full ``User`` row, loaded once per request."""
+        if self._user is None:
+            self._user = self._loader(self.id)
+        return self._user
+
+    def __getattr__(self, name):
+        # Only reached for attributes the principal doesn't carry itself
+        if name.startswith('_'):
+            raise AttributeError(name)
+        user = self.user
+        if user is None:
+            raise AttributeError(name)
+        return getattr(user, name)
+
+    def __repr__(self):
+        return f'<SessionPrincipal {self.id} {self.username!r}>'
+
+
+class SessionPrincipalCache:
+    """Identity tuples keyed by user id, expiring after ``ttl`` seconds."""
+
+    def __init__(self, db, model, ttl=SESSION_PRINCIPAL_TTL_SECONDS, max_entries=SESSION_PRINCIPAL_MAX_ENTRIES):
+        self.db = db
+        self.model = model
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}  # user_id -> (expires_at, identity tuple)
+
+    def load(self, user_id):
+        """Return a SessionPrincipal for ``user_id``, or None if the user doesn't exist."""
+        user_id = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry and entry[0] > now:
+            return self._principal(entry[1])
+
+        model = self.model
+        row = self.db.session.execute(
+            select(model.id, model.username, model.avatar_url, model.is_admin)
+            .where(model.id == user_id)
+        ).first()
+        if row is None:
+            self.invalidate(user_id)
+            return None
+
+        identity = tuple(row)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict(now)
+            self._entries[user_id] = (now + self.ttl, identity)
+        return self._principal(identity)
+
+    def _principal(self, identity):
+        return SessionPrincipal(self._load_user, *identity)
+
+    def _load_user(self, user_id):
+        return self.db.session.get(self.model, user_id)
+
+    def _evict(self, now):
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+
+    def invalidate(self, user_id=None):
+        """Forget one user's identity, or every identity when ``user_id`` is None."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(user_id), None)
+
+    def watch(self):
+        """Drop cached identities after commits that change or delete them.
+
+        Covers unit-of-work changes to the identity fields and bulk
+        ``UPDATE``/``DELETE`` statements against the user table. Bulk updates
+        that never set username, avatar_url, is_admin or id (balance debits,
+        awards, counter flushes) opt out with the ``identity_unaffected``
+        execution option.
+        """
+        event.listen(Session, 'before_flush', self._on_before_flush)
+        event.listen(Session, 'do_orm_execute', self._on_orm_execute)
+        event.listen(Session, 'after_commit', self._on_after_commit)
+        event.listen(Session, 'after_rollback', self._on_after_rollback)
+
+    def _mark(self, session, user_id):
+        session.info.setdefault(_DIRTY_KEY, set()).add(user_id)
+
+    def _on_before_flush(self, session, flush_context, instances):
+        for obj in session.deleted:
+            if isinstance(obj, self.model):
+                self._mark(session, str(obj.id))
+        for obj in session.dirty:
+            if not isinstance(obj, self.model):
+                continue
+            attrs = inspect(obj).attrs
+            if any(attrs[field].history.has_changes() for field in IDENTITY_FIELDS):
+                self._mark(session, str(obj.id))
+
+    def _on_orm_execute(self, orm_execute_state):
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        # ORM update(User) targets an annotated copy of the table, so compare names
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is None or getattr(table, 'name', None) != self.model.__table__.name:
+            return
+        if orm_execute_state.is_update and orm_execute_state.execution_options.get('identity_unaffected'):
+            return
+        # Which rows a bulk statement hit isn't known here; drop them all
+        self._mark(orm_execute_state.session, None)
+
+    def _on_after_commit(self, session):
+        dirty = session.info.pop(_DIRTY_KEY, None)
+        if not dirty:
+            return
+        if None in dirty:
+            self.invalidate()
+        else:
+            for user_id in dirty:
+                self.invalidate(user_id)
+
+    def _on_after_rollback(self, session):
+        session.info.pop(_DIRTY_KEY, None)
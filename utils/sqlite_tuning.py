@@ -0,0 +1,64 @@
+"""
+Connection pragmas for the SQLite database shared by Flask and the bot, each
+overridable from the environment (an empty value keeps SQLite's default).
+"""
+
+import os
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT_MS = os.getenv('SQLITE_BUSY_TIMEOUT_MS', '10000')
+SQLITE_MMAP_SIZE = os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))
+SQLITE_CACHE_SIZE = os.getenv('SQLITE_CACHE_SIZE', '-32000')  # negative = KiB, so ~32 MB per connection
+
+_registered = False
+
+
+def sqlite_pragmas():
+    """The ``(pragma, value)`` pairs applied to each new connection, in order."""
+    pragmas = [
+        # busy_timeout first so switching the journal mode also waits for locks
+        ('busy_timeout', SQLITE_BUSY_TIMEOUT_MS),
+        ('journal_mode', SQLITE_JOURNAL_MODE),
+        ('synchronous', SQLITE_SYNCHRONOUS),
+        ('mmap_size', SQLITE_MMAP_SIZE),
+        ('cache_size', SQLITE_CACHE_SIZE),
+    ]
+    return [(name, value) for name, value in pragmas if value.strip()]
+
+
+def _apply_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas():
+            try:
+                cursor.execute(f'PRAGMA {name}={value}')
+            except sqlite3.OperationalError:
+                # Read-only (mode=ro) connections can't switch the journal mode;
+                # they use whatever the writer set
+                if name != 'journal_mode':
+                    raise
+    finally:
+        cursor.close()
+
+
+def enable_sqlite_pragmas():
+    """Apply the pragmas to every SQLite connection any engine opens from now on."""
+    global _registered
+    if not _registered:
+        event.listen(Pool, 'connect', _apply_pragmas)
+        _registered = True
+
+
+def effective_pragmas(connection):
+    """Read back the current pragma values on a SQLAlchemy connection, for logging and benchmarks."""
+    return {
+        name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+        for name, _ in sqlite_pragmas()
+    }
@@ -0,0 +1,146 @@
+"""
+Versioned startup manifest: named, idempotent steps whose digests are recorded
+in ``schema_meta``, so a boot only runs the steps that changed.
+"""
+
+import hashlib
+import time
+from datetime import datetime
+
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+MANIFEST_KEY = 'manifest'
+_STEP_PREFIX = 'step:'
+
+
+def digest(*parts):
+    """Stable short hash of ``parts`` for use as a step digest."""
+    return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+
+def metadata_digest(metadata):
+    """Digest of every table, column, index and constraint the models declare."""
+    shape = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        shape.append((
+            table.name,
+            tuple((column.name, str(column.type), column.nullable, column.primary_key) for column in table.columns),
+            tuple(sorted(
+                (index.name, tuple(column.name for column in index.columns), bool(index.unique))
+                for index in table.indexes
+            )),
+            tuple(sorted(str(constraint.name) for constraint in table.constraints if constraint.name)),
+        ))
+    return digest(*shape)
+
+
+def has_column(conn, table, column):
+    return any(info['name'] == column for info in inspect(conn).get_columns(table))
+
+
+def has_index(conn, table, name):
+    if conn.dialect.name == 'sqlite':
+        # SQLAlchemy's inspector skips expression indexes on SQLite
+        return conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"), {'name': name}
+        ).first() is not None
+    return inspect(conn).has_index(table, name)
+
+
+class StartupManifest:
+    """Named, digested startup steps applied against ``schema_meta``."""
+
+    def __init__(self, meta_table):
+        self.meta_table = meta_table
+        self._steps = []  # (name, digest, fn(conn) -> optional summary, transactional)
+
+    def step(self, name, step_digest, fn, transactional=True):
+        """Register ``fn(conn)``; it runs when ``step_digest`` differs from the recorded one.
+
+        Non-transactional steps (filesystem work) get no connection and run
+        after the database transaction commits; if one raises, startup
+        continues and the step is retried on the next boot.
+        """
+        self._steps.append((name, step_digest, fn, transactional))
+
+    @property
+    def version(self):
+        return digest(*((name, step_digest) for name, step_digest, _, _ in self._steps))
+
+    def _recorded(self, conn):
+        """Return ``{key: value}`` from schema_meta, or {} if the table doesn't exist yet."""
+        try:
+            rows = conn.execute(select(self.meta_table.c.key, self.meta_table.c.value)).all()
+        except (OperationalError, ProgrammingError):
+            conn.rollback()
+            return {}
+        return dict(rows)
+
+    def _record(self, conn, key, value):
+        table = self.meta_table
+        now = datetime.utcnow()
+        updated = conn.execute(
+            table.update().where(table.c.key == key).values(value=value, updated_at=now)
+        ).rowcount
+        if not updated:
+            conn.execute(table.insert().values(key=key, value=value, updated_at=now))
+
+    def run(self, engine):
+        """Apply pending steps. Returns the names of the steps that ran."""
+        started = time.perf_counter()
+        version = self.version
+
+        with engine.connect() as conn:
+            recorded = self._recorded(conn)
+        if recorded.get(MANIFEST_KEY) == version:
+            print(f"✅ Schema manifest {version[:12]} up to date — startup steps skipped "
+                  f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+            return []
+
+        pending = [
+            step for step in self._steps
+            if recorded.get(_STEP_PREFIX + step[0]) != step[1]
+        ]
+        print(f"🔧 Schema manifest changed: {len(pending)} of {len(self._steps)} startup step(s) to apply")
+
+        applied = []
+        with engine.begin() as conn:
+            # schema_meta itself has to exist before anything can be recorded
+            self.meta_table.create(conn, checkfirst=True)
+            for name, step_digest, fn, transactional in pending:
+                if not transactional:
+                    continue
+                self._run_step(name, fn, conn)
+                self._record(conn, _STEP_PREFIX + name, step_digest)
+                applied.append(name)
+
+        completed = []
+        for name, step_digest, fn, transactional in pending:
+            if transactional:
+                continue
+            try:
+                self._run_step(name, fn)
+            except Exception as e:
+                # Left unrecorded so the next boot retries it
+                print(f"⚠️ Warning: startup step {name} failed: {e}")
+                continue
+            completed.append((name, step_digest))
+            applied.append(name)
+
+        with engine.begin() as conn:
+            for name, step_digest in completed:
+                self._record(conn, _STEP_PREFIX + name, step_digest)
+            if len(applied) == len(pending):
+                self._record(conn, MANIFEST_KEY, version)
+
+        print(f"✅ Schema manifest {version[:12]} recorded "
+              f"({(time.perf_counter() - started) * 1000:.1f} ms total)")
+        return applied
+
+    @staticmethod
+    def _run_step(name, fn, *args):
+        step_started = time.perf_counter()
+        summary = fn(*args)
+        elapsed = (time.perf_counter() - step_started) * 1000
+        print(f"   - {name}: {summary or 'done'} ({elapsed:.1f} ms)")
@@ -0,0 +1,79 @@
+"""
+Snapshot cache of the public ``/api/store`` payload with a strong ETag, rebuilt
+after commits that touch the catalog.
+"""
+
+import hashlib
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_DIRTY_KEY = 'store_cache_dirty'
+
+
+class StoreCatalogCache:
+    """Precomputed catalog bodies keyed by host URL, with commit-driven invalidation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._entries = {}  # key -> (generation, body, etag)
+        self._watched = ()
+
+    def get(self, key, build):
+        """Return ``(body, etag)``, calling ``build()`` for a new body when stale."""
+        with self._lock:
+            generation = self._generation
+            entry = self._entries.get(key)
+        if entry and entry[0] == generation:
+            return entry[1], entry[2]
+
+        body = build()
+        etag = hashlib.sha256(body.encode('utf-8')).hexdigest()
+        with self._lock:
+            # Don't publish a body built from data an in-flight commit just replaced
+            if self._generation == generation:
+                self._entries[key] = (generation, body, etag)
+        return body, etag
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def watch(self, *models):
+        """Invalidate after any committed ORM write to ``models``.
+
+        Covers unit-of-work changes (add/update/delete of instances) and bulk
+        ``Query.update()`` / ``Query.delete()`` statements on those models.
+        """
+        self._watched = tuple(models)
+        event.listen(Session, 'before_flush', self._on_before_flush)
+        event.listen(Session, 'do_orm_execute', self._on_orm_execute)
+        event.listen(Session, 'after_commit', self._on_after_commit)
+        event.listen(Session, 'after_rollback', self._on_after_rollback)
+
+    def _is_watched(self, obj):
+        return isinstance(obj, self._watched)
+
+    def _on_before_flush(self, session, flush_context, instances):
+        if any(self._is_watched(obj) for obj in (*session.new, *session.dirty, *session.deleted)):
+            session.info[_DIRTY_KEY] = True
+
+    def _on_orm_execute(self, orm_execute_state):
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, self._watched):
+            orm_execute_state.session.info[_DIRTY_KEY] = True
+
+    def _on_after_commit(self, session):
+        if session.info.pop(_DIRTY_KEY, False):
+            self.invalidate()
+
+    def _on_after_rollback(self, session):
+        session.info.pop(_DIRTY_KEY, None)
+
+
+store_catalog_cache = StoreCatalogCache()
@@ -0,0 +1,101 @@
+"""
+Per-user spending and achievement aggregates for the admin leaderboards,
+computed with GROUP BY over only the listed users.
+"""
+
+from sqlalchemy import func, literal_column
+
+from shared import db, User, Purchase, UserAchievement
+
+
+def activity_score_expr():
+    # Literal zeros (not bound parameters) so SQLite matches ix_user_activity_score
+    zero = literal_column('0')
+    return (
+        func.coalesce(User.message_count, zero)
+        + func.coalesce(User.reaction_count, zero)
+        + func.coalesce(User.voice_minutes, zero)
+    )
+
+
+def user_stats_for(users, start_rank=1):
+    """``user_stats_rows`` for an already-fetched list of users, kept in their order.
+
+    Only the given users' purchases and achievements are aggregated.
+    """
+    ids = [user.id for user in users]
+    if not ids:
+        return []
+
+    purchase_totals = {
+        user_id: (total_spent, purchase_count)
+        for user_id, total_spent, purchase_count in db.session.query(
+            Purchase.user_id, func.sum(Purchase.points_spent), func.count(Purchase.id)
+        ).filter(Purchase.user_id.in_(ids)).group_by(Purchase.user_id)
+    }
+    achievement_counts = dict(
+        db.session.query(UserAchievement.user_id, func.count(UserAchievement.id))
+        .filter(UserAchievement.user_id.in_(ids)).group_by(UserAchievement.user_id)
+        .all()
+    )
+
+    rows = []
+    for user in users:
+        total_spent, purchase_count = purchase_totals.get(user.id, (0, 0))
+        rows.append((user, total_spent or 0, purchase_count, achievement_counts.get(user.id, 0)))
+    return user_stats_rows(rows, start_rank)
+
+
+def user_stats_rows(rows, start_rank=1):
+    """Turn ``(user, total_spent, purchase_count, achievement_count)`` rows into leaderboard dicts."""
+    return [
+        {
+            'rank': rank,
+            'user': user,
+            'total_spent': total_spent,
+            'purchase_count': purchase_count,
+            'achievement_count': achievement_count,
+            'activity_score': (user.message_count or 0) + (user.reaction_count or 0) + (user.voice_minutes or 0)
+        }
+        for rank, (user, total_spent, purchase_count, achievement_count) in enumerate(rows, start_rank)
+    ]
+
+
+def top_spenders(limit=10):
+    """The ``limit`` users who spent the most points, as ``user_stats_rows`` dicts."""
+    ranked_ids = [
+        user_id for user_id, _ in db.session.query(
+            Purchase.user_id, func.sum(Purchase.points_spent).label('total_spent')
+        ).group_by(Purchase.user_id).order_by(db.desc('total_spent')).limit(limit)
+    ]
+    if not ranked_ids:
+        return []
+    users = {user.id: user for user in User.query.filter(User.id.in_(ranked_ids))}
+    return user_stats_for([users[user_id] for user_id in ranked_ids if user_id in users])
+
+
+def most_active(limit=10):
+    """The ``limit`` users with the highest activity score, as ``user_stats_rows`` dicts."""
+    return user_stats_for(
+        User.query.order_by(activity_score_expr().desc()).limit(limit).all()
+    )
+
+
+def economy_totals():
+    """Economy-wide totals shown at the top of the admin leaderboard."""
+    total_users, total_balance = db.session.query(
+        func.count(User.id), func.coalesce(func.sum(User.balance), 0)
+    ).one()
+    total_purchases, total_spent = db.session.query(
+        func.count(Purchase.id), func.coalesce(func.sum(Purchase.points_spent), 0)
+    ).one()
+    total_achievements = db.session.query(func.count(UserAchievement.id)).scalar()
+
+    return {
+        'total_users': total_users,
+        'total_balance': total_balance,
+        'total_spent': total_spent,
+        'total_purchases': total_purchases,
+        'total_achievements': total_achievements,
+        'average_balance': total_balance // total_users if total_users > 0 else 0
+    }